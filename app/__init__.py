@@ -32,6 +32,36 @@ def create_app(config=None):
         JWT_REFRESH_TOKEN_EXPIRES=timedelta(days=30),
         JWT_JSON_KEY_ENABLED=True,
         JWT_DECODE_SUBJECT_AS_STRING=False,  # Allow numeric subjects
+        OCCURRENCE_HORIZON_DAYS=int(os.environ.get('OCCURRENCE_HORIZON_DAYS', 365)),
+        OCCURRENCE_INDEX_INTERVAL=int(os.environ.get('OCCURRENCE_INDEX_INTERVAL', 3600)),
+        OCCURRENCE_INDEX_BATCH_SIZE=500,
+        OCCURRENCE_INDEX_WORKER=os.environ.get('OCCURRENCE_INDEX_WORKER', 'True').lower() in ('true', '1', 't'),
+        IMPORT_FOLDER=os.environ.get('IMPORT_FOLDER'),  # defaults to <instance>/imports
+        IMPORT_WORKERS=int(os.environ.get('IMPORT_WORKERS', 2)),
+        IMPORT_CHUNK_SIZE=1000,
+        PERMISSION_CACHE_SIZE=int(os.environ.get('PERMISSION_CACHE_SIZE', 10000)),
+        PERMISSION_CACHE_TTL=int(os.environ.get('PERMISSION_CACHE_TTL', 60)),
+        SHARED_CACHE_URL=os.environ.get('SHARED_CACHE_URL'),  # e.g. redis://localhost:6379/0
+        SHARED_CACHE_TTL=int(os.environ.get('SHARED_CACHE_TTL', 300)),
+        SHARED_CACHE_SIZE=int(os.environ.get('SHARED_CACHE_SIZE', 10000)),
+        BCRYPT_ROUNDS=int(os.environ.get('BCRYPT_ROUNDS', 12)),
+        BCRYPT_WORKERS=int(os.environ.get('BCRYPT_WORKERS', 4)),
+        BCRYPT_MAX_PENDING=int(os.environ.get('BCRYPT_MAX_PENDING', 32)),
+        BCRYPT_TIMEOUT=10,
+        REVOCATION_SYNC_INTERVAL=int(os.environ.get('REVOCATION_SYNC_INTERVAL', 30)),
+        VERSION_KEYFRAME_INTERVAL=int(os.environ.get('VERSION_KEYFRAME_INTERVAL', 10)),
+        VERSION_ENCODING=os.environ.get('VERSION_ENCODING', 'msgpack+zlib'),
+        CHANGELOG_WORKERS=int(os.environ.get('CHANGELOG_WORKERS', 2)),
+        CHANGELOG_BATCH_SIZE=200,
+        CHANGELOG_MAX_PENDING=int(os.environ.get('CHANGELOG_MAX_PENDING', 10000)),
+        CHANGELOG_POLL_INTERVAL=int(os.environ.get('CHANGELOG_POLL_INTERVAL', 5)),
+        CHANGELOG_BACKPRESSURE_TIMEOUT=5,
+        VERSION_RETAIN_LAST=int(os.environ.get('VERSION_RETAIN_LAST', 100)),
+        VERSION_RETAIN_DAILY_DAYS=int(os.environ.get('VERSION_RETAIN_DAILY_DAYS', 30)),
+        VERSION_RETAIN_WEEKLY_WEEKS=int(os.environ.get('VERSION_RETAIN_WEEKLY_WEEKS', 52)),
+        VERSION_MAX_AGE_DAYS=int(os.environ.get('VERSION_MAX_AGE_DAYS', 0)),  # 0 disables the hard limit
+        VERSION_COMPACTION_INTERVAL=int(os.environ.get('VERSION_COMPACTION_INTERVAL', 0)),  # 0 disables the worker
+        VERSION_COMPACTION_BATCH_SIZE=50,
     )
     
     if config:
@@ -47,20 +77,55 @@ def create_app(config=None):
     
     with app.app_context():
         # Import models
-        from app.models import user, event, permission, version
+        from app.models import user, event, permission, version, occurrence, import_job, revoked_token, group
         
         # Import and register blueprints
         from app.routes.auth import auth_bp
         from app.routes.events import events_bp
         from app.routes.collaboration import collab_bp
         from app.routes.versioning import version_bp
+        from app.routes.imports import imports_bp
+        from app.routes.groups import groups_bp
         
         app.register_blueprint(auth_bp, url_prefix='/api/auth')
         app.register_blueprint(events_bp, url_prefix='/api/events')
         app.register_blueprint(collab_bp, url_prefix='/api/events')
         app.register_blueprint(version_bp, url_prefix='/api/events')
+        app.register_blueprint(imports_bp, url_prefix='/api/imports')
+        app.register_blueprint(groups_bp, url_prefix='/api/groups')
         
         # Create database tables
         db.create_all()
+
+        from app.services.schema import upgrade_schema
+        upgrade_schema(app)
+
+        from app.services.search import ensure_search_index
+        ensure_search_index(app)
+
+        from app.services.permission_cache import init_permission_cache
+        init_permission_cache(app)
+
+        from app.services.revocation import init_revocation
+        init_revocation(app)
+
+        if app.config['IMPORT_WORKERS']:
+            from app.services.imports import resume_import_jobs
+            resume_import_jobs(app)
+
+        if app.config['CHANGELOG_WORKERS']:
+            from app.services.changelog_outbox import start_changelog_workers
+            start_changelog_workers(app)
+
+        if app.config['VERSION_COMPACTION_INTERVAL']:
+            from app.services.retention import start_compaction_worker
+            start_compaction_worker(app)
+
+        if app.config['OCCURRENCE_INDEX_WORKER']:
+            from app.services.occurrence_index import start_horizon_worker
+            start_horizon_worker(app)
         
+    from app.commands import register_commands
+    register_commands(app)
+
     return app 
\ No newline at end of file
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Maintenance commands, run with ``flask --app run <command>``."""
+import click
+
+
+def register_commands(app):
+
+    @app.cli.command('encode-versions')
+    @click.option('--interval', type=int, default=None, help='Versions per keyframe (defaults to VERSION_KEYFRAME_INTERVAL).')
+    @click.option('--encoding', default=None, help='Payload encoding (defaults to VERSION_ENCODING).')
+    @click.option('--batch-size', type=int, default=200, help='Events re-encoded per transaction.')
+    def encode_versions(interval, encoding, batch_size):
+        """Convert stored event versions to keyframe + delta form."""
+        from app.services.version_store import encode_all_versions
+
+        changed = encode_all_versions(interval=interval, encoding=encoding, batch_size=batch_size, log=click.echo)
+        click.echo(f'Done, {changed} version rows re-encoded.')
+
+    @app.cli.command('benchmark-versions')
+    @click.option('--sample', type=int, default=500, help='Stored versions to benchmark against.')
+    @click.option('--rounds', type=int, default=5, help='Timing rounds; the best is reported.')
+    def benchmark_versions(sample, rounds):
+        """Compare size and speed of each version encoding on stored versions."""
+        from app.models.version import EventVersion
+        from app.services.version_codec import benchmark
+        from app.services.version_store import load_version_data
+
+        versions = EventVersion.query.order_by(EventVersion.id.desc()).limit(sample).all()
+        if not versions:
+            click.echo('No stored versions to benchmark.')
+            return
+        load_version_data(versions)
+
+        click.echo(f'{len(versions)} versions, per-version averages')
+        click.echo(f'{"encoding":<14}{"bytes":>10}{"encode us":>12}{"decode us":>12}')
+        for encoding, result in benchmark([version.get_data_dict() for version in versions], rounds=rounds).items():
+            click.echo(f'{encoding:<14}{result["bytes"]:>10.0f}{result["encode_us"]:>12.1f}{result["decode_us"]:>12.1f}')
+
+    @app.cli.command('backfill-changelog')
+    @click.option('--batch-size', type=int, default=None, help='Events backfilled per batch (defaults to CHANGELOG_BATCH_SIZE).')
+    def backfill_changelog_command(batch_size):
+        """Create missing changelog entries for existing version histories."""
+        from app.services.changelog_outbox import backfill_changelog
+
+        queued = backfill_changelog(batch_size=batch_size, log=click.echo)
+        click.echo(f'Done, {queued} missing changelog entries processed.')
+
+    @app.cli.command('compact-versions')
+    @click.option('--batch-size', type=int, default=None, help='Events compacted per transaction (defaults to VERSION_COMPACTION_BATCH_SIZE).')
+    def compact_versions_command(batch_size):
+        """Remove event versions outside the retention policy."""
+        from app.services.retention import compact_versions
+
+        removed, squashed = compact_versions(batch_size=batch_size, log=click.echo)
+        click.echo(f'Done, {removed} versions removed and {squashed} changelog entries squashed.')
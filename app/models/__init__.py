@@ -3,4 +3,8 @@
 from app.models.user import User
 from app.models.event import Event, RecurrencePattern
 from app.models.permission import Permission
-from app.models.version import EventVersion, ChangeLog
\ No newline at end of file
+from app.models.version import EventVersion, ChangeLog, ChangeLogOutbox
+from app.models.occurrence import EventOccurrence
+from app.models.import_job import ImportJob, ImportStatus
+from app.models.revoked_token import RevokedToken
+from app.models.group import Group, GroupMember, GroupPermission
@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
 from app import db
 from datetime import datetime
-import json
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 
@@ -49,6 +48,9 @@ class RecurrencePattern(db.Model):
 
 class Event(db.Model):
     __tablename__ = 'events'
+    __table_args__ = (
+        Index('ix_events_start_id', 'start_time', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False)
@@ -65,6 +67,8 @@ class Event(db.Model):
 
     permissions = relationship('Permission', backref='event', cascade='all, delete-orphan')
 
+    group_permissions = relationship('GroupPermission', backref='event', cascade='all, delete-orphan')
+
     versions = relationship('EventVersion', backref='event', cascade='all, delete-orphan')
 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -96,14 +100,8 @@ class Event(db.Model):
             'current_version': self.current_version
         }
     
-    def create_version(self, user_id):
-        """Create a new version of this event"""
-        from app.models.version import EventVersion
-        
-        # Increment version number
-        self.current_version += 1
-        
-        # Create version record
+    def snapshot(self):
+        """Return the versioned fields of this event as a plain dict."""
         version_data = {
             'title': self.title,
             'description': self.description,
@@ -125,14 +123,13 @@ class Event(db.Model):
                 'custom_rule': self.recurrence_pattern.custom_rule
             }
         
-        version = EventVersion(
-            event_id=self.id,
-            version_number=self.current_version,
-            created_by=user_id,
-            data=json.dumps(version_data)
-        )
-        
-        return version
+        return version_data
+    
+    def create_version(self, user_id):
+        """Create a new version of this event"""
+        from app.services.version_store import create_versions
+
+        return create_versions([self], user_id)[0]
     
     def __repr__(self):
         return f'<Event {self.title}>'
\ No newline at end of file
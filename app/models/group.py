@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from app import db
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from app.models.permission import RoleType
+
+
+class Group(db.Model):
+    __tablename__ = 'groups'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(120), nullable=False)
+    description = Column(Text, nullable=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    owner = relationship('User', foreign_keys=[owner_id])
+    members = relationship('GroupMember', backref='group', cascade='all, delete-orphan', lazy='dynamic')
+    permissions = relationship('GroupPermission', backref='group', cascade='all, delete-orphan')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'owner_id': self.owner_id,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<Group {self.name}>'
+
+
+class GroupMember(db.Model):
+    __tablename__ = 'group_members'
+    __table_args__ = (
+        Index('ux_group_members_group_user', 'group_id', 'user_id', unique=True),
+        Index('ix_group_members_user_group', 'user_id', 'group_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, ForeignKey('groups.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    added_by = Column(Integer, ForeignKey('users.id'))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship('User', foreign_keys=[user_id])
+
+    def to_dict(self):
+        return {
+            'group_id': self.group_id,
+            'user_id': self.user_id,
+            'user': self.user.username if self.user else None,
+            'added_by': self.added_by,
+            'created_at': self.created_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<GroupMember {self.user_id} in {self.group_id}>'
+
+
+class GroupPermission(db.Model):
+    """A role on an event granted to every member of a group."""
+    __tablename__ = 'group_permissions'
+    __table_args__ = (
+        Index('ux_group_permissions_event_group', 'event_id', 'group_id', unique=True),
+        Index('ix_group_permissions_group_event', 'group_id', 'event_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    group_id = Column(Integer, ForeignKey('groups.id', ondelete='CASCADE'), nullable=False)
+    role = Column(Enum(RoleType), nullable=False, default=RoleType.VIEWER)
+    granted_by = Column(Integer, ForeignKey('users.id'))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    granter = relationship('User', foreign_keys=[granted_by])
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'group_id': self.group_id,
+            'group': self.group.name if self.group else None,
+            'role': self.role.value,
+            'granted_by': self.granted_by,
+            'granter': self.granter.username if self.granter else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<GroupPermission {self.group_id} {self.role.value} on {self.event_id}>'
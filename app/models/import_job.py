@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from app import db
+from datetime import datetime
+import json
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum
+from sqlalchemy.orm import relationship
+from enum import Enum as PyEnum
+
+
+class ImportStatus(PyEnum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+
+class ImportJob(db.Model):
+    __tablename__ = 'import_jobs'
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False, index=True)
+    filename = Column(String(255), nullable=False)
+    format = Column(String(20), nullable=False)
+    path = Column(String(512), nullable=False)
+    status = Column(Enum(ImportStatus), nullable=False, default=ImportStatus.PENDING)
+    processed_rows = Column(Integer, default=0)
+    created_events = Column(Integer, default=0)
+    failed_rows = Column(Integer, default=0)
+    errors = Column(Text, nullable=True)  # JSON list of the first row errors
+    message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # refreshed after every chunk while running
+    finished_at = Column(DateTime, nullable=True)
+
+    user = relationship('User')
+
+    def __init__(self, user_id, filename, format, path):
+        self.user_id = user_id
+        self.filename = filename
+        self.format = format
+        self.path = path
+
+    def get_errors(self):
+        return json.loads(self.errors) if self.errors else []
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'format': self.format,
+            'status': self.status.value,
+            'processed_rows': self.processed_rows,
+            'created_events': self.created_events,
+            'failed_rows': self.failed_rows,
+            'errors': self.get_errors(),
+            'message': self.message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} {self.status.value}>'
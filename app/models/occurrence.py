@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from app import db
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+
+class EventOccurrence(db.Model):
+    """Materialized occurrence of an event, used for calendar range queries."""
+    __tablename__ = 'event_occurrences'
+    __table_args__ = (
+        Index('ix_event_occurrences_event_start', 'event_id', 'start_time'),
+        Index('ix_event_occurrences_event_index', 'event_id', 'occurrence_index', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    occurrence_index = Column(Integer, nullable=False, default=0)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+
+    event = relationship('Event')
+
+    def to_dict(self):
+        return {
+            'event_id': self.event_id,
+            'occurrence_index': self.occurrence_index,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<EventOccurrence {self.event_id} #{self.occurrence_index}>'
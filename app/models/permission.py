@@ -1,6 +1,6 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 
@@ -11,6 +11,9 @@ class RoleType(PyEnum):
 
 class Permission(db.Model):
     __tablename__ = 'permissions'
+    __table_args__ = (
+        Index('ix_permissions_user_event', 'user_id', 'event_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
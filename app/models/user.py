@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from app import db
+from app.services.passwords import get_password_hasher
 from datetime import datetime
-import bcrypt
 from sqlalchemy import Column, Integer, String, DateTime, Boolean
 
 
@@ -22,14 +22,13 @@ class User(db.Model):
         self.set_password(password)
 
     def set_password(self, password):
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        self.password_hash = bcrypt.hashpw(password_bytes, salt).decode('utf-8')
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
-        password_bytes = password.encode('utf-8')
-        hash_bytes = self.password_hash.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hash_bytes)
+        return get_password_hasher().verify(password, self.password_hash)
+
+    def password_needs_rehash(self):
+        return get_password_hasher().needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
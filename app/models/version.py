@@ -1,22 +1,39 @@
 from app import db
 from datetime import datetime
 import json
-import difflib
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index, LargeBinary
 from sqlalchemy.orm import relationship
 
 class EventVersion(db.Model):
     __tablename__ = 'event_versions'
+    __table_args__ = (
+        Index('ix_event_versions_event_version', 'event_id', 'version_number'),
+        Index('ix_event_versions_event_created', 'event_id', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
     version_number = Column(Integer, nullable=False)
-    data = Column(Text, nullable=False)  # JSON string of event data
+    data = Column(Text, nullable=False)  # JSON string of event data, or of a delta (see keyframe_version)
+    # Format of the stored payload (see app.services.version_codec); NULL means JSON in ``data``
+    encoding = Column(String(16), nullable=True)
+    payload = Column(LargeBinary, nullable=True)  # binary encodings keep their bytes here
     created_at = Column(DateTime, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey('users.id'), nullable=False)
+    # None for keyframes (full snapshots); otherwise the keyframe this delta's chain starts from
+    keyframe_version = Column(Integer, nullable=True)
+    # JSON list of the fields the edit recorded by this version changed; NULL for older rows
+    changed_fields = Column(Text, nullable=True)
+    # Times of the snapshot, kept in plain columns for point-in-time queries
+    start_time = Column(DateTime, nullable=True)
+    end_time = Column(DateTime, nullable=True)
+    is_recurring = Column(Boolean, nullable=True)
     
     # Relationship
     author = relationship('User', foreign_keys=[created_by])
+
+    # Decoded snapshot, filled by app.services.version_store
+    _decoded = None
     
     def __init__(self, event_id, version_number, data, created_by):
         self.event_id = event_id
@@ -25,7 +42,13 @@ class EventVersion(db.Model):
         self.created_by = created_by
     
     def get_data_dict(self):
-        return json.loads(self.data)
+        if self._decoded is None:
+            from app.services.version_store import load_version_data
+            load_version_data([self])
+        return self._decoded
+    
+    def get_changed_fields(self):
+        return json.loads(self.changed_fields) if self.changed_fields is not None else None
     
     def to_dict(self):
         return {
@@ -33,26 +56,22 @@ class EventVersion(db.Model):
             'event_id': self.event_id,
             'version_number': self.version_number,
             'data': self.get_data_dict(),
+            'changed_fields': self.get_changed_fields(),
             'created_at': self.created_at.isoformat(),
             'created_by': self.created_by,
             'author': self.author.username if self.author else None
         }
     
     def diff_with(self, other_version):
-        """Generate a diff between this version and another version."""
-        this_data = json.dumps(self.get_data_dict(), indent=4).splitlines()
-        other_data = json.dumps(other_version.get_data_dict(), indent=4).splitlines()
-        
-        differ = difflib.Differ()
-        diff = list(differ.compare(other_data, this_data))
+        """Generate a changelog entry for the changes from another version to this one."""
+        from app.services.version_diff import diff_states, pack_changes
         
-        # Create changelog entry
         return ChangeLog(
             event_id=self.event_id,
             from_version=other_version.version_number,
             to_version=self.version_number,
-            diff_text='\n'.join(diff),
-            user_id=self.created_by
+            user_id=self.created_by,
+            changes=pack_changes(diff_states(other_version.get_data_dict(), self.get_data_dict()))
         )
     
     def __repr__(self):
@@ -60,12 +79,16 @@ class EventVersion(db.Model):
 
 class ChangeLog(db.Model):
     __tablename__ = 'changelog'
+    __table_args__ = (
+        Index('ix_changelog_event_timestamp', 'event_id', 'timestamp', 'id'),
+    )
     
     id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
     from_version = Column(Integer, nullable=False)
     to_version = Column(Integer, nullable=False)
-    diff_text = Column(Text, nullable=False)
+    diff_text = Column(Text, nullable=False)  # difflib output; empty when ``changes`` is set
+    changes = Column(Text, nullable=True)  # compact JSON field-level diff (see app.services.version_diff)
     timestamp = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     
@@ -73,27 +96,50 @@ class ChangeLog(db.Model):
     event = relationship('Event')
     user = relationship('User')
     
-    def __init__(self, event_id, from_version, to_version, diff_text, user_id):
+    def __init__(self, event_id, from_version, to_version, user_id, diff_text='', changes=None):
         self.event_id = event_id
         self.from_version = from_version
         self.to_version = to_version
         self.diff_text = diff_text
         self.user_id = user_id
+        self.changes = changes
     
-    def to_dict(self):
-        return {
+    def get_changes(self):
+        """Return the structured diff, or None for entries written as difflib text."""
+        if self.changes is None:
+            return None
+        from app.services.version_diff import unpack_changes
+        return unpack_changes(self.changes)
+    
+    def get_text_diff(self):
+        if self.changes is None:
+            return self.diff_text
+        from app.services.version_diff import render_text
+        return render_text(self.get_changes())
+    
+    def to_dict(self, render='text'):
+        changelog_dict = {
             'id': self.id,
             'event_id': self.event_id,
             'from_version': self.from_version,
             'to_version': self.to_version,
-            'diff_text': self.diff_text,
+            'changes': self.get_changes(),
             'timestamp': self.timestamp.isoformat(),
             'user_id': self.user_id,
             'user': self.user.username if self.user else None
         }
+        if render == 'text':
+            changelog_dict['diff_text'] = self.get_text_diff()
+        elif render == 'html':
+            changelog_dict['diff_html'] = self.get_html_diff()
+        return changelog_dict
     
     def get_html_diff(self):
         """Convert the diff text to HTML format for better visualization."""
+        if self.changes is not None:
+            from app.services.version_diff import render_html
+            return render_html(self.get_changes())
+        
         lines = self.diff_text.splitlines()
         html = []
         
@@ -110,4 +156,24 @@ class ChangeLog(db.Model):
         return '\n'.join(html)
     
     def __repr__(self):
-        return f'<ChangeLog {self.event_id} {self.from_version}->{self.to_version}>' 
\ No newline at end of file
+        return f'<ChangeLog {self.event_id} {self.from_version}->{self.to_version}>'
+
+class ChangeLogOutbox(db.Model):
+    """An edit waiting for its changelog entry (see app.services.changelog_outbox)."""
+    __tablename__ = 'changelog_outbox'
+    __table_args__ = (
+        Index('ix_changelog_outbox_event_version', 'event_id', 'from_version'),
+        Index('ix_changelog_outbox_claim_token', 'claim_token'),
+    )
+    
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
+    from_version = Column(Integer, nullable=False)
+    to_version = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime, nullable=True)
+    claim_token = Column(String(32), nullable=True)
+    
+    def __repr__(self):
+        return f'<ChangeLogOutbox {self.event_id} {self.from_version}->{self.to_version}>'
@@ -6,8 +6,9 @@ from flask_jwt_extended import (
 )
 from app import db
 from app.models.user import User
+from app.services.revocation import revoke_token
 from app.utils.validators import UserSchema, LoginSchema
-from app.utils.errors import ValidationError, AuthenticationError
+from app.utils.errors import ValidationError, AuthenticationError, ServiceUnavailableError
 from marshmallow import ValidationError as MarshmallowValidationError
 
 auth_bp = Blueprint('auth', __name__)
@@ -47,6 +48,10 @@ def register():
     except MarshmallowValidationError as e:
         return jsonify({'error': str(e)}), 400
 
+    except ServiceUnavailableError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -67,6 +72,11 @@ def login():
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
 
+        # Upgrade hashes made at an older cost while the plaintext is at hand.
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+
         access_token = create_access_token(identity=str(user.id))
         refresh_token = create_refresh_token(identity=str(user.id))
 
@@ -80,7 +90,12 @@ def login():
     except MarshmallowValidationError as e:
         return jsonify({'error': str(e)}), 400
 
+    except ServiceUnavailableError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -107,11 +122,17 @@ def refresh():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/logout', methods=['POST'])
-@jwt_required()
+@jwt_required(verify_type=False)
 def logout():
     """Invalidate the current token."""
-    
-    return jsonify({'message': 'Logout successful'}), 200
+    try:
+        revoke_token(get_jwt())
+
+        return jsonify({'message': 'Logout successful'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
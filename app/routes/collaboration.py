@@ -4,13 +4,90 @@ from app import db
 from app.models.event import Event
 from app.models.permission import Permission, RoleType
 from app.models.user import User
+from app.models.group import Group, GroupPermission
+from app.services.permission_cache import resolve_permission, invalidate_permission, invalidate_event_permissions
+from app.utils.batching import chunks
 from app.utils.decorators import owner_required
-from app.utils.validators import PermissionSchema
+from app.utils.validators import PermissionSchema, GroupPermissionSchema
 from app.utils.errors import ValidationError, ResourceNotFoundError, AuthorizationError
 from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import selectinload
+from datetime import datetime
 
 collab_bp = Blueprint('collaboration', __name__)
 
+
+def _granted(event_id, user_ids):
+    """Map user_id -> (id, created_at) of their permission rows on an event."""
+    rows = {}
+    for chunk in chunks(user_ids):
+        rows.update((row.user_id, (row.id, row.created_at)) for row in db.session.execute(
+            select(Permission.user_id, Permission.id, Permission.created_at).where(
+                Permission.event_id == event_id,
+                Permission.user_id.in_(chunk)
+            )
+        ))
+    return rows
+
+
+def _upsert_permissions(event_id, roles, granted_by):
+    """Grant ``roles`` ({user_id: RoleType}) on an event and return the permissions as dicts.
+
+    Existing grants are updated and the rest inserted, each as a single
+    executemany. permissions has no unique key on (event_id, user_id) that
+    an ON CONFLICT clause could target, hence the lookup first.
+    """
+    now = datetime.utcnow()
+    existing = _granted(event_id, list(roles))
+
+    updates = [{'id': row_id, 'role': roles[target_id], 'granted_by': granted_by, 'updated_at': now}
+               for target_id, (row_id, _) in existing.items()]
+    inserts = [{'event_id': event_id, 'user_id': target_id, 'role': role, 'granted_by': granted_by,
+                'created_at': now, 'updated_at': now}
+               for target_id, role in roles.items() if target_id not in existing]
+
+    if updates:
+        db.session.execute(update(Permission), updates)
+    if inserts:
+        # No RETURNING: ordered RETURNING degrades to row-at-a-time inserts on SQLite.
+        db.session.execute(insert(Permission), inserts)
+        existing.update(_granted(event_id, [row['user_id'] for row in inserts]))
+
+    return [{
+        'id': existing[target_id][0],
+        'event_id': event_id,
+        'user_id': target_id,
+        'role': role.value,
+        'granted_by': granted_by,
+        'created_at': existing[target_id][1].isoformat(),
+        'updated_at': now.isoformat()
+    } for target_id, role in roles.items()]
+
+
+def _upsert_group_permissions(event_id, roles, granted_by):
+    """Grant ``roles`` ({group_id: RoleType}) on an event; one row per group."""
+    if not roles:
+        return []
+
+    existing = {perm.group_id: perm for perm in GroupPermission.query.filter(
+        GroupPermission.event_id == event_id,
+        GroupPermission.group_id.in_(list(roles))
+    )}
+
+    permissions = []
+    for group_id, role in roles.items():
+        perm = existing.get(group_id)
+        if perm is None:
+            perm = GroupPermission(event_id=event_id, group_id=group_id, role=role, granted_by=granted_by)
+            db.session.add(perm)
+        else:
+            perm.role = role
+            perm.granted_by = granted_by
+        permissions.append(perm)
+    return permissions
+
+
 @collab_bp.route('/<int:id>/share', methods=['POST'])
 @owner_required
 def share_event(id, permission=None):
@@ -23,45 +100,54 @@ def share_event(id, permission=None):
             return jsonify({'error': 'Event not found'}), 404
         
         # Validate data
+        json_data = request.get_json() or {}
         schema = PermissionSchema(many=True)
-        data = schema.load(request.get_json().get('users', []))
-        
-        created_permissions = []
-        
-        for user_permission in data:
-            # Check if user exists
-            target_user = User.query.get(user_permission['user_id'])
-            if not target_user:
-                return jsonify({'error': f'User with ID {user_permission["user_id"]} not found'}), 404
-            
-            # Check if permission already exists
-            existing_permission = Permission.query.filter_by(
-                event_id=id,
-                user_id=user_permission['user_id']
-            ).first()
-            
-            # Create or update permission
-            if existing_permission:
-                existing_permission.role = RoleType(user_permission['role'])
-                existing_permission.granted_by = user_id
-                created_permissions.append(existing_permission)
-            else:
-                new_permission = Permission(
-                    event_id=id,
-                    user_id=user_permission['user_id'],
-                    role=RoleType(user_permission['role']),
-                    granted_by=user_id
-                )
-                db.session.add(new_permission)
-                created_permissions.append(new_permission)
-        
+        data = schema.load(json_data.get('users', []))
+        group_data = GroupPermissionSchema(many=True).load(json_data.get('groups', []))
+
+        # Later entries for the same user or group win.
+        roles = {entry['user_id']: RoleType(entry['role']) for entry in data}
+        group_roles = {entry['group_id']: RoleType(entry['role']) for entry in group_data}
+        user_ids = list(roles)
+
+        usernames = {}
+        for chunk in chunks(user_ids):
+            usernames.update(db.session.execute(
+                select(User.id, User.username).where(User.id.in_(chunk))
+            ).all())
+
+        missing = [target_id for target_id in user_ids if target_id not in usernames]
+        if missing:
+            return jsonify({
+                'error': f'User with ID {missing[0]} not found',
+                'user_ids': missing
+            }), 404
+
+        groups = {group.id: group for group in Group.query.filter(Group.id.in_(list(group_roles)))} if group_roles else {}
+        missing = [group_id for group_id in group_roles if group_id not in groups]
+        if missing:
+            return jsonify({
+                'error': f'Group with ID {missing[0]} not found',
+                'group_ids': missing
+            }), 404
+
+        permissions = _upsert_permissions(id, roles, int(user_id)) if roles else []
+        group_permissions = _upsert_group_permissions(id, group_roles, int(user_id))
         db.session.commit()
-        
+
+        invalidate_event_permissions([id])
+
+        granter = db.session.get(User, int(user_id))
+        for perm in permissions:
+            perm['user'] = usernames[perm['user_id']]
+            perm['granter'] = granter.username if granter else None
+
         return jsonify({
             'message': 'Event shared successfully',
-            'permissions': [perm.to_dict() for perm in created_permissions]
+            'permissions': permissions,
+            'group_permissions': [perm.to_dict() for perm in group_permissions]
         }), 200
-    
+
     except MarshmallowValidationError as e:
         return jsonify({'error': str(e)}), 400
     
@@ -77,19 +163,24 @@ def get_permissions(id):
         user_id = get_jwt_identity()
         
         # Check if user has permission to view this event
-        permission = Permission.query.filter_by(
-            event_id=id,
-            user_id=user_id
-        ).first()
+        permission = resolve_permission(user_id, id)
         
         if not permission:
             return jsonify({'error': 'You do not have permission to view this event'}), 403
         
         # Get all permissions for the event
-        permissions = Permission.query.filter_by(event_id=id).all()
+        permissions = Permission.query.filter_by(event_id=id).options(
+            selectinload(Permission.user),
+            selectinload(Permission.granter)
+        ).all()
+        group_permissions = GroupPermission.query.filter_by(event_id=id).options(
+            selectinload(GroupPermission.group),
+            selectinload(GroupPermission.granter)
+        ).all()
         
         return jsonify({
-            'permissions': [perm.to_dict() for perm in permissions]
+            'permissions': [perm.to_dict() for perm in permissions],
+            'group_permissions': [perm.to_dict() for perm in group_permissions]
         }), 200
     
     except Exception as e:
@@ -136,6 +227,7 @@ def update_permission(id, user_id, permission=None):
         target_permission.granted_by = current_user_id
         
         db.session.commit()
+        invalidate_permission(user_id, id)
         
         return jsonify({
             'message': 'Permission updated successfully',
@@ -182,6 +274,7 @@ def remove_permission(id, user_id, permission=None):
         # Remove permission
         db.session.delete(target_permission)
         db.session.commit()
+        invalidate_permission(user_id, id)
         
         return jsonify({
             'message': 'Permission removed successfully'
@@ -189,4 +282,29 @@ def remove_permission(id, user_id, permission=None):
     
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500 
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500 
+
+@collab_bp.route('/<int:id>/groups/<int:group_id>', methods=['DELETE'])
+@owner_required
+def remove_group_permission(id, group_id, permission=None):
+    """Remove access for a group."""
+    try:
+        target_permission = GroupPermission.query.filter_by(
+            event_id=id,
+            group_id=group_id
+        ).first()
+
+        if not target_permission:
+            return jsonify({'error': 'Permission not found'}), 404
+
+        db.session.delete(target_permission)
+        db.session.commit()
+        invalidate_event_permissions([id])
+
+        return jsonify({
+            'message': 'Permission removed successfully'
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,20 +1,158 @@
 # -*- coding: utf-8 -*-
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
 from app import db
 from app.models.event import Event, RecurrencePattern, RecurrenceType
 from app.models.permission import Permission, RoleType
+from app.models.group import GroupPermission
 from app.models.user import User
+from app.models.occurrence import EventOccurrence
+from app.models.version import EventVersion, ChangeLog, ChangeLogOutbox
+from app.services.recurrence import Series, expand_events
+from app.services.occurrence_index import (
+    index_event, index_events, remove_event, remove_events, indexed_until, horizon_end, occurrences_for_user
+)
+from app.services.conflicts import find_conflicts, find_overlaps
+from app.services.freebusy import free_busy
+from app.services.search import apply_search, update_search_index, remove_from_search_index
+from app.services.bulk import bulk_create_events
+from app.services.version_store import create_versions, load_version_data, version_in_effect
+from app.services.ical import iter_calendar
+from app.services.permission_cache import ResolvedPermission, invalidate_event_permissions
+from app.services.access import accessible_event_ids, grants_fingerprint, resolve_roles
+from app.services.event_cache import get_event_dict, invalidate_event_snapshots
 from app.utils.decorators import editor_required, owner_required, jwt_required_with_role
-from app.utils.validators import EventSchema, BatchEventSchema
-from app.utils.errors import ValidationError, ResourceNotFoundError, AuthorizationError, ConflictError
+from app.utils.validators import (
+    EventSchema, BatchEventSchema, BatchUpdateSchema, BatchDeleteSchema, FreeBusySchema,
+    parse_datetime, to_naive_utc
+)
+from app.utils.errors import ValidationError, ResourceNotFoundError, AuthorizationError, ConflictError, ServiceUnavailableError
+from app.utils.pagination import keyset_paginate, cached_count
 from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import and_, delete, func, or_
+from sqlalchemy.orm import contains_eager, selectinload
 from sqlalchemy.exc import IntegrityError
+from itertools import islice
+import csv
+import hashlib
+import io
 import json
 
 events_bp = Blueprint('events', __name__)
 
+EXPORT_BATCH_SIZE = 1000
+
+def _flag(name):
+    """Read a boolean query string flag."""
+    return request.args.get(name, 'false').lower() in ('true', '1')
+
+def _describe_occurrence(occurrence, titles):
+    return {
+        'event_id': occurrence.event_id,
+        'title': titles.get(occurrence.event_id),
+        'occurrence_index': occurrence.index,
+        'start_time': occurrence.start.isoformat(),
+        'end_time': occurrence.end.isoformat()
+    }
+
+def _conflict_dicts(pairs):
+    """Serialize conflicting occurrence pairs, looking up all titles in one query."""
+    event_ids = {occurrence.event_id for pair in pairs for occurrence in pair}
+    titles = dict(db.session.query(Event.id, Event.title).filter(Event.id.in_(event_ids)).all()) if event_ids else {}
+    return [{
+        'event': _describe_occurrence(first, titles),
+        'conflicts_with': _describe_occurrence(second, titles)
+    } for first, second in pairs]
+
+def _find_conflicts(user_id, events):
+    """Check flushed events against each other and the user's other accessible events.
+
+    Each event is checked up to the occurrence horizon, or for the length of
+    the horizon from its start if it starts later.
+    """
+    candidates = []
+    for event in events:
+        until = max(horizon_end(), horizon_end(event.start_time))
+        candidates.extend(Series.from_event(event).occurrences(None, until))
+
+    if not candidates:
+        return []
+
+    existing = occurrences_for_user(
+        user_id,
+        min(occurrence.start for occurrence in candidates),
+        max(occurrence.end for occurrence in candidates),
+        exclude_event_ids={event.id for event in events}
+    )
+    return _conflict_dicts(find_conflicts(candidates, existing))
+
+def _apply_event_changes(event, data):
+    """Apply validated (possibly partial) event data to an event and its recurrence pattern."""
+    event.title = data.get('title', event.title)
+    event.description = data.get('description', event.description)
+    event.start_time = data.get('start_time', event.start_time)
+    event.end_time = data.get('end_time', event.end_time)
+    event.location = data.get('location', event.location)
+    event.is_recurring = data.get('is_recurring', event.is_recurring)
+
+    if event.is_recurring and 'recurrence_pattern' in data:
+        recurrence_data = data['recurrence_pattern']
+
+        if not event.recurrence_pattern:
+            pattern = RecurrencePattern(
+                type=RecurrenceType(recurrence_data['type']),
+                interval=recurrence_data.get('interval', 1),
+                days_of_week=recurrence_data.get('days_of_week'),
+                day_of_month=recurrence_data.get('day_of_month'),
+                month_of_year=recurrence_data.get('month_of_year'),
+                end_date=recurrence_data.get('end_date'),
+                count=recurrence_data.get('count'),
+                custom_rule=recurrence_data.get('custom_rule')
+            )
+            event.recurrence_pattern = pattern
+        else:
+            event.recurrence_pattern.type = RecurrenceType(recurrence_data.get('type', event.recurrence_pattern.type.value))
+            event.recurrence_pattern.interval = recurrence_data.get('interval', event.recurrence_pattern.interval)
+            event.recurrence_pattern.days_of_week = recurrence_data.get('days_of_week', event.recurrence_pattern.days_of_week)
+            event.recurrence_pattern.day_of_month = recurrence_data.get('day_of_month', event.recurrence_pattern.day_of_month)
+            event.recurrence_pattern.month_of_year = recurrence_data.get('month_of_year', event.recurrence_pattern.month_of_year)
+            event.recurrence_pattern.end_date = recurrence_data.get('end_date', event.recurrence_pattern.end_date)
+            event.recurrence_pattern.count = recurrence_data.get('count', event.recurrence_pattern.count)
+            event.recurrence_pattern.custom_rule = recurrence_data.get('custom_rule', event.recurrence_pattern.custom_rule)
+
+    if not event.is_recurring and event.recurrence_pattern:
+        db.session.delete(event.recurrence_pattern)
+        event.recurrence_pattern = None
+
+def _filter_window(query, start, end):
+    """Restrict an Event query to events with an occurrence overlapping [start, end]."""
+    if not start and not end:
+        return query
+
+    in_window = [EventOccurrence.event_id == Event.id]
+    if start:
+        in_window.append(EventOccurrence.end_time >= start)
+    if end:
+        in_window.append(EventOccurrence.start_time <= end)
+    window_filter = EventOccurrence.query.filter(*in_window).exists()
+
+    # Series extending past the materialized horizon may still occur in the window.
+    if not end or end > indexed_until():
+        beyond_horizon = Event.is_recurring.is_(True)
+        if end:
+            beyond_horizon = and_(beyond_horizon, Event.start_time <= end)
+        window_filter = or_(window_filter, beyond_horizon)
+
+    return query.filter(window_filter)
+
+def _conflict_response(conflicts):
+    db.session.rollback()
+    return jsonify({
+        'error': 'Event conflicts with existing events',
+        'conflicts': conflicts
+    }), 409
+
 @events_bp.route('', methods=['POST'])
 @jwt_required()
 def create_event():
@@ -79,7 +217,16 @@ def create_event():
         version = event.create_version(user_id_int)
         db.session.add(version)
 
+        if _flag('check_conflicts'):
+            conflicts = _find_conflicts(user_id_int, [event])
+            if conflicts:
+                return _conflict_response(conflicts)
+
+        index_event(event)
+        update_search_index([event])
+
         db.session.commit()
+        invalidate_event_permissions([event.id])
 
         return jsonify({
             'message': 'Event created successfully',
@@ -105,27 +252,68 @@ def get_events():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         search = request.args.get('search')
+        expand = _flag('expand')
+        as_of = request.args.get('as_of')
 
-        query = Event.query.join(Permission).filter(
-            Permission.user_id == user_id
-        )
+        query = Event.query.filter(
+            Event.id.in_(accessible_event_ids(user_id))
+        ).options(selectinload(Event.recurrence_pattern))
+
+        start = end = None
 
         if start_date:
             try:
-                start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-                query = query.filter(Event.end_time >= start)
+                start = parse_datetime(start_date)
             except ValueError:
                 return jsonify({'error': 'Invalid start_date format'}), 400
 
         if end_date:
             try:
-                end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                query = query.filter(Event.start_time <= end)
+                end = parse_datetime(end_date)
             except ValueError:
                 return jsonify({'error': 'Invalid end_date format'}), 400
 
+        if as_of:
+            try:
+                moment = parse_datetime(as_of)
+            except ValueError:
+                return jsonify({'error': 'Invalid as_of format'}), 400
+            if search or expand or 'cursor' in request.args:
+                return jsonify({'error': 'as_of cannot be combined with search, expand or cursor'}), 400
+            return _events_as_of(query, moment, start, end, page, per_page)
+
+        rank = None
         if search:
-            query = query.filter(Event.title.ilike(f'%{search}%'))
+            query, rank = apply_search(query, search)
+
+        if expand:
+            if not start or not end:
+                return jsonify({'error': 'start_date and end_date are required when expand=true'}), 400
+            if end <= indexed_until():
+                return _indexed_occurrences(user_id, search, start, end, page, per_page)
+            return _expanded_events(query, start, end, page, per_page)
+
+        query = _filter_window(query, start, end)
+
+        if 'cursor' in request.args:
+            try:
+                items, next_cursor = keyset_paginate(
+                    query, [Event.start_time, Event.id], request.args.get('cursor'), per_page
+                )
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+            response = {
+                'events': [event.to_dict() for event in items],
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if _flag('include_total'):
+                response['total'] = cached_count(('events', user_id, start_date, end_date, search), query)
+            return jsonify(response), 200
+
+        if rank is not None:
+            query = query.order_by(rank, Event.id)
 
         paginated_events = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -142,17 +330,300 @@ def get_events():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+EXPORT_COLUMNS = [
+    'id', 'title', 'description', 'start_time', 'end_time', 'location', 'is_recurring',
+    'creator_id', 'recurrence_pattern', 'created_at', 'updated_at', 'current_version'
+]
+
+@events_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_events():
+    """Stream every event the user has access to as NDJSON or CSV."""
+    try:
+        user_id = get_jwt_identity()
+        export_format = request.args.get('format', 'ndjson').lower()
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        search = request.args.get('search')
+
+        if export_format not in ('ndjson', 'csv'):
+            return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+        try:
+            start = parse_datetime(start_date) if start_date else None
+            end = parse_datetime(end_date) if end_date else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+
+        query = Event.query.filter(
+            Event.id.in_(accessible_event_ids(user_id))
+        ).options(selectinload(Event.recurrence_pattern))
+
+        if search:
+            query, _ = apply_search(query, search)
+
+        query = _filter_window(query, start, end).order_by(Event.id).yield_per(EXPORT_BATCH_SIZE)
+
+        if export_format == 'ndjson':
+            def generate():
+                for event in query:
+                    yield json.dumps(event.to_dict()) + '\n'
+
+            mimetype = 'application/x-ndjson'
+        else:
+            def generate():
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+                for event in query:
+                    row = event.to_dict()
+                    if row['recurrence_pattern']:
+                        row['recurrence_pattern'] = json.dumps(row['recurrence_pattern'])
+                    writer.writerow([row[column] for column in EXPORT_COLUMNS])
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue()
+
+            mimetype = 'text/csv'
+
+        return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+            'Content-Disposition': f'attachment; filename=events.{export_format}'
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/feed.ics', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def calendar_feed():
+    """Stream the user's events as an iCalendar subscription feed."""
+    try:
+        user_id = get_jwt_identity()
+
+        # Any create, edit, delete, share or membership change alters at least one of these aggregates.
+        fingerprint = tuple(db.session.query(
+            func.count(Event.id), func.max(Event.updated_at), func.sum(Event.id),
+            func.sum(Event.current_version)
+        ).filter(Event.id.in_(accessible_event_ids(user_id))).one()) + grants_fingerprint(user_id)
+        etag = hashlib.sha1(repr((user_id, tuple(fingerprint))).encode('utf-8')).hexdigest()
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        query = Event.query.filter(
+            Event.id.in_(accessible_event_ids(user_id))
+        ).options(selectinload(Event.recurrence_pattern)).order_by(Event.id).yield_per(EXPORT_BATCH_SIZE)
+
+        response = Response(stream_with_context(iter_calendar(query, name='NeoFi')),
+                            mimetype='text/calendar')
+        response.set_etag(etag)
+        response.headers['Content-Disposition'] = 'inline; filename=events.ics'
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/conflicts', methods=['GET'])
+@jwt_required()
+def get_conflicts():
+    """List overlapping events the user has access to within a time window."""
+    try:
+        user_id = get_jwt_identity()
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+
+        if not start_date or not end_date:
+            return jsonify({'error': 'start_date and end_date are required'}), 400
+
+        try:
+            start = parse_datetime(start_date)
+            end = parse_datetime(end_date)
+        except ValueError:
+            return jsonify({'error': 'Invalid date format'}), 400
+
+        conflicts = _conflict_dicts(find_overlaps(occurrences_for_user(user_id, start, end)))
+
+        return jsonify({
+            'conflicts': conflicts,
+            'total': len(conflicts)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/freebusy', methods=['POST'])
+@jwt_required()
+def get_free_busy():
+    """Return merged busy intervals per user and the free gaps shared by all of them."""
+    try:
+        json_data = request.get_json()
+        if not json_data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        schema = FreeBusySchema()
+        data = schema.load(json_data)
+
+        start = to_naive_utc(data['start_date'])
+        end = to_naive_utc(data['end_date'])
+        if start >= end:
+            return jsonify({'error': 'end_date must be after start_date'}), 400
+
+        user_ids = list(dict.fromkeys(data['user_ids']))
+        found = {row.id for row in db.session.query(User.id).filter(User.id.in_(user_ids))}
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        if missing:
+            return jsonify({'error': f'Users not found: {", ".join(map(str, missing))}'}), 404
+
+        busy, free = free_busy(user_ids, start, end)
+
+        def intervals(pairs):
+            return [{'start': interval_start.isoformat(), 'end': interval_end.isoformat()}
+                    for interval_start, interval_end in pairs]
+
+        return jsonify({
+            'start_date': start.isoformat(),
+            'end_date': end.isoformat(),
+            'users': {str(user_id): {'busy': intervals(busy[user_id])} for user_id in user_ids},
+            'free': intervals(free)
+        }), 200
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _occurrence_dict(event_dict, index, start, end):
+    return {
+        **event_dict,
+        'occurrence_index': index,
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat()
+    }
+
+def _indexed_occurrences(user_id, search, start, end, page, per_page):
+    """Respond with occurrences in [start, end] read from the occurrence index."""
+    query = EventOccurrence.query.join(EventOccurrence.event).options(
+        contains_eager(EventOccurrence.event).selectinload(Event.recurrence_pattern)
+    ).filter(
+        EventOccurrence.event_id.in_(accessible_event_ids(user_id)),
+        EventOccurrence.start_time <= end,
+        EventOccurrence.end_time >= start
+    ).order_by(EventOccurrence.start_time, EventOccurrence.event_id)
+
+    if search:
+        query, _ = apply_search(query, search)
+
+    paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+
+    event_dicts = {}
+    items = []
+    for occurrence in paginated.items:
+        if occurrence.event_id not in event_dicts:
+            event_dicts[occurrence.event_id] = occurrence.event.to_dict()
+        items.append(_occurrence_dict(event_dicts[occurrence.event_id], occurrence.occurrence_index,
+                                      occurrence.start_time, occurrence.end_time))
+
+    return jsonify({
+        'occurrences': items,
+        'total': paginated.total,
+        'pages': paginated.pages,
+        'page': page,
+        'per_page': per_page
+    }), 200
+
+def _expanded_events(query, start, end, page, per_page):
+    """Respond with the occurrences of every matching series inside [start, end]."""
+    # Recurring series may have occurrences in the window even if their first one ends before it.
+    events = query.filter(
+        Event.start_time <= end,
+        or_(Event.end_time >= start, Event.is_recurring.is_(True))
+    ).all()
+
+    occurrences = expand_events(events, start, end)
+    page_items = list(islice(occurrences, (page - 1) * per_page, page * per_page))
+    total = max(page - 1, 0) * per_page + len(page_items) + sum(1 for _ in occurrences)
+
+    events_by_id = {event.id: event for event in events}
+    event_dicts = {}
+    items = []
+    for occurrence in page_items:
+        if occurrence.event_id not in event_dicts:
+            event_dicts[occurrence.event_id] = events_by_id[occurrence.event_id].to_dict()
+        items.append(_occurrence_dict(event_dicts[occurrence.event_id], occurrence.index,
+                                      occurrence.start, occurrence.end))
+
+    return jsonify({
+        'occurrences': items,
+        'total': total,
+        'pages': -(-total // per_page) if per_page else 0,
+        'page': page,
+        'per_page': per_page
+    }), 200
+
+AS_OF_FIELDS = ('title', 'description', 'start_time', 'end_time', 'location', 'is_recurring')
+
+def _events_as_of(query, moment, start, end, page, per_page):
+    """Respond with the matching events as they were at ``moment``.
+
+    Each event is joined to the version in effect at ``moment``, if it was
+    edited since, and the window filter, ordering and paging run in SQL on
+    the times of that version. Only the page is decoded. Access is checked against the
+    current permissions, because revoked permissions are not kept: an event
+    shared after ``moment`` is listed and one unshared since is not. Events
+    deleted since are gone and not listed either.
+    """
+    query = query.filter(Event.created_at <= moment).add_entity(EventVersion).outerjoin(
+        EventVersion, EventVersion.id == version_in_effect(Event.id, moment)
+    )
+    start_time = func.coalesce(EventVersion.start_time, Event.start_time)
+    end_time = func.coalesce(EventVersion.end_time, Event.end_time)
+    is_recurring = func.coalesce(EventVersion.is_recurring, Event.is_recurring)
+
+    if start:
+        # Recurring series may have occurrences in the window even if their first one ends before it.
+        query = query.filter(or_(end_time >= start, is_recurring.is_(True)))
+    if end:
+        query = query.filter(start_time <= end)
+
+    paginated = query.order_by(start_time, Event.id).paginate(page=page, per_page=per_page, error_out=False)
+    load_version_data([version for _, version in paginated.items if version is not None])
+
+    items = []
+    for event, version in paginated.items:
+        event_dict = event.to_dict()
+        if version is not None:
+            data = version.get_data_dict()
+            event_dict.update({field: data.get(field) for field in AS_OF_FIELDS})
+            event_dict['recurrence_pattern'] = data.get('recurrence_pattern')
+            event_dict['current_version'] = version.version_number
+        event_dict['as_of_version'] = version.version_number if version is not None else None
+        items.append(event_dict)
+
+    return jsonify({
+        'events': items,
+        'total': paginated.total,
+        'pages': paginated.pages,
+        'page': page,
+        'per_page': per_page,
+        'as_of': moment.isoformat()
+    }), 200
+
 @events_bp.route('/<int:id>', methods=['GET'])
 @jwt_required_with_role(['owner', 'editor', 'viewer'])
 def get_event(id, permission=None):
     """Get a specific event by ID."""
     try:
-        event = Event.query.get(id)
+        event = get_event_dict(id)
 
         if not event:
             return jsonify({'error': 'Event not found'}), 404
 
-        return jsonify(event.to_dict()), 200
+        return jsonify(event), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -174,43 +645,18 @@ def update_event(id, permission=None):
         version = event.create_version(user_id)
         db.session.add(version)
 
-        event.title = data.get('title', event.title)
-        event.description = data.get('description', event.description)
-        event.start_time = data.get('start_time', event.start_time)
-        event.end_time = data.get('end_time', event.end_time)
-        event.location = data.get('location', event.location)
-        event.is_recurring = data.get('is_recurring', event.is_recurring)
+        _apply_event_changes(event, data)
 
-        if event.is_recurring and 'recurrence_pattern' in data:
-            recurrence_data = data['recurrence_pattern']
+        if _flag('check_conflicts'):
+            conflicts = _find_conflicts(user_id, [event])
+            if conflicts:
+                return _conflict_response(conflicts)
 
-            if not event.recurrence_pattern:
-                pattern = RecurrencePattern(
-                    type=RecurrenceType(recurrence_data['type']),
-                    interval=recurrence_data.get('interval', 1),
-                    days_of_week=recurrence_data.get('days_of_week'),
-                    day_of_month=recurrence_data.get('day_of_month'),
-                    month_of_year=recurrence_data.get('month_of_year'),
-                    end_date=recurrence_data.get('end_date'),
-                    count=recurrence_data.get('count'),
-                    custom_rule=recurrence_data.get('custom_rule')
-                )
-                event.recurrence_pattern = pattern
-            else:
-                event.recurrence_pattern.type = RecurrenceType(recurrence_data.get('type', event.recurrence_pattern.type.value))
-                event.recurrence_pattern.interval = recurrence_data.get('interval', event.recurrence_pattern.interval)
-                event.recurrence_pattern.days_of_week = recurrence_data.get('days_of_week', event.recurrence_pattern.days_of_week)
-                event.recurrence_pattern.day_of_month = recurrence_data.get('day_of_month', event.recurrence_pattern.day_of_month)
-                event.recurrence_pattern.month_of_year = recurrence_data.get('month_of_year', event.recurrence_pattern.month_of_year)
-                event.recurrence_pattern.end_date = recurrence_data.get('end_date', event.recurrence_pattern.end_date)
-                event.recurrence_pattern.count = recurrence_data.get('count', event.recurrence_pattern.count)
-                event.recurrence_pattern.custom_rule = recurrence_data.get('custom_rule', event.recurrence_pattern.custom_rule)
-
-        if not event.is_recurring and event.recurrence_pattern:
-            db.session.delete(event.recurrence_pattern)
-            event.recurrence_pattern = None
+        index_event(event)
+        update_search_index([event])
 
         db.session.commit()
+        invalidate_event_snapshots([id])
 
         return jsonify({
             'message': 'Event updated successfully',
@@ -220,6 +666,10 @@ def update_event(id, permission=None):
     except MarshmallowValidationError as e:
         return jsonify({'error': str(e)}), 400
 
+    except ServiceUnavailableError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -234,8 +684,14 @@ def delete_event(id, permission=None):
         if not event:
             return jsonify({'error': 'Event not found'}), 404
 
+        remove_event(event.id)
+        remove_from_search_index([event.id])
+        for model in (ChangeLog, ChangeLogOutbox):
+            db.session.execute(delete(model).where(model.event_id == event.id))
         db.session.delete(event)
         db.session.commit()
+        invalidate_event_permissions([id])
+        invalidate_event_snapshots([id])
 
         return jsonify({'message': 'Event deleted successfully'}), 200
 
@@ -262,67 +718,28 @@ def batch_create_events():
         if not 'events' in data or not data['events']:
             return jsonify({'error': 'No events provided in the request'}), 400
 
-        created_events = []
-
-        for event_data in data['events']:
-            title = event_data.get('title')
-            description = event_data.get('description', '')
-            start_time = event_data.get('start_time')
-            end_time = event_data.get('end_time')
-            location = event_data.get('location')
-            is_recurring = event_data.get('is_recurring', False)
-
-            if not title or not start_time or not end_time:
-                continue
-
-            event = Event(
-                title=title,
-                description=description,
-                start_time=start_time,
-                end_time=end_time,
-                creator_id=user_id_int,
-                location=location,
-                is_recurring=is_recurring
-            )
-
-            if event.is_recurring and 'recurrence_pattern' in event_data:
-                recurrence_data = event_data['recurrence_pattern']
-                pattern = RecurrencePattern(
-                    type=RecurrenceType(recurrence_data['type']),
-                    interval=recurrence_data.get('interval', 1),
-                    days_of_week=recurrence_data.get('days_of_week'),
-                    day_of_month=recurrence_data.get('day_of_month'),
-                    month_of_year=recurrence_data.get('month_of_year'),
-                    end_date=recurrence_data.get('end_date'),
-                    count=recurrence_data.get('count'),
-                    custom_rule=recurrence_data.get('custom_rule')
-                )
-                event.recurrence_pattern = pattern
-
-            db.session.add(event)
-            db.session.flush()
+        created_events = bulk_create_events(data['events'], user_id_int)
 
-            permission = Permission(
-                event_id=event.id,
-                user_id=user_id_int,
-                role=RoleType.OWNER,
-                granted_by=user_id_int
-            )
-            db.session.add(permission)
+        if not created_events:
+            return jsonify({'error': 'No valid events to create'}), 400
 
-            version = event.create_version(user_id_int)
-            db.session.add(version)
+        if _flag('check_conflicts'):
+            conflicts = _find_conflicts(user_id_int, created_events)
+            if conflicts:
+                return _conflict_response(conflicts)
 
-            created_events.append(event)
+        index_events(created_events)
+        update_search_index(created_events)
 
-        if not created_events:
-            return jsonify({'error': 'No valid events to create'}), 400
+        # Serialize before committing so the expired instances are not reloaded one by one.
+        events = [event.to_dict() for event in created_events]
 
         db.session.commit()
+        invalidate_event_permissions([event['id'] for event in events])
 
         return jsonify({
             'message': f'{len(created_events)} events created successfully',
-            'events': [event.to_dict() for event in created_events]
+            'events': events
         }), 201
 
     except MarshmallowValidationError as e:
@@ -330,4 +747,127 @@ def batch_create_events():
 
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+def _batch_permissions(user_id, event_ids, allowed):
+    """Return the IDs in ``event_ids`` the user may not modify, using a single query."""
+    roles = resolve_roles(user_id, event_ids)
+    granted = {event_id for event_id, role in roles.items()
+               if allowed(ResolvedPermission(event_id, user_id, role))}
+    return [event_id for event_id in event_ids if event_id not in granted]
+
+@events_bp.route('/batch', methods=['PATCH'])
+@jwt_required()
+def batch_update_events():
+    """Update multiple events in a single transaction."""
+    try:
+        user_id = get_jwt_identity()
+
+        user_id_int = int(user_id) if isinstance(user_id, str) else user_id
+
+        json_data = request.get_json()
+        if not json_data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        schema = BatchUpdateSchema()
+        data = schema.load(json_data, partial=True)
+
+        changes = {}
+        for event_data in data.get('events', []):
+            if 'id' not in event_data:
+                return jsonify({'error': 'Every event must include an id'}), 400
+            changes[event_data['id']] = event_data
+
+        if not changes:
+            return jsonify({'error': 'No events provided in the request'}), 400
+
+        event_ids = list(changes)
+        denied = _batch_permissions(user_id_int, event_ids, lambda permission: permission.can_edit())
+        if denied:
+            return jsonify({
+                'error': 'Editor or owner permissions required',
+                'event_ids': denied
+            }), 403
+
+        events = Event.query.options(selectinload(Event.recurrence_pattern)).filter(
+            Event.id.in_(event_ids)
+        ).order_by(Event.id).all()
+
+        versions = create_versions(events, user_id_int)
+        for event in events:
+            _apply_event_changes(event, changes[event.id])
+        db.session.add_all(versions)
+
+        if _flag('check_conflicts'):
+            conflicts = _find_conflicts(user_id_int, events)
+            if conflicts:
+                return _conflict_response(conflicts)
+
+        index_events(events)
+        update_search_index(events)
+
+        updated = [event.to_dict() for event in events]
+
+        db.session.commit()
+        invalidate_event_snapshots([event['id'] for event in updated])
+
+        return jsonify({
+            'message': f'{len(updated)} events updated successfully',
+            'events': updated
+        }), 200
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except ServiceUnavailableError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@events_bp.route('/batch', methods=['DELETE'])
+@jwt_required()
+def batch_delete_events():
+    """Delete multiple events in a single transaction."""
+    try:
+        user_id = get_jwt_identity()
+
+        json_data = request.get_json(silent=True)
+        if not json_data and request.args.get('ids'):
+            json_data = {'ids': request.args.get('ids').split(',')}
+        if not json_data:
+            return jsonify({'error': 'No event IDs provided'}), 400
+
+        schema = BatchDeleteSchema()
+        event_ids = list(dict.fromkeys(schema.load(json_data)['ids']))
+
+        denied = _batch_permissions(user_id, event_ids, lambda permission: permission.role == RoleType.OWNER)
+        if denied:
+            return jsonify({
+                'error': 'Only the owner can perform this action',
+                'event_ids': denied
+            }), 403
+
+        remove_events(event_ids)
+        remove_from_search_index(event_ids)
+        for model in (ChangeLog, ChangeLogOutbox, EventVersion, Permission, GroupPermission, RecurrencePattern):
+            db.session.execute(delete(model).where(model.event_id.in_(event_ids)))
+        db.session.execute(delete(Event).where(Event.id.in_(event_ids)))
+
+        db.session.commit()
+        invalidate_event_permissions(event_ids)
+        invalidate_event_snapshots(event_ids)
+
+        return jsonify({
+            'message': f'{len(event_ids)} events deleted successfully',
+            'deleted': event_ids
+        }), 200
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models.group import Group, GroupMember, GroupPermission
+from app.models.user import User
+from app.services.access import group_event_ids
+from app.services.permission_cache import invalidate_event_permissions
+from app.utils.batching import chunks
+from app.utils.validators import GroupSchema, GroupMembersSchema
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import delete, func, insert, or_, select
+from datetime import datetime
+
+groups_bp = Blueprint('groups', __name__)
+
+
+def _current_user_id():
+    user_id = get_jwt_identity()
+    return int(user_id) if isinstance(user_id, str) else user_id
+
+
+def _is_member(group_id, user_id):
+    return db.session.query(GroupMember.id).filter_by(group_id=group_id, user_id=user_id).first() is not None
+
+
+def _group_dict(group):
+    group_dict = group.to_dict()
+    group_dict['member_count'] = group.members.count()
+    return group_dict
+
+
+def _invalidate_group_access(group_id):
+    """Membership changes alter who can reach every event granted to the group."""
+    invalidate_event_permissions(group_event_ids([group_id]))
+
+
+@groups_bp.route('', methods=['POST'])
+@jwt_required()
+def create_group():
+    """Create a group owned (and joined) by the current user."""
+    try:
+        user_id = _current_user_id()
+
+        schema = GroupSchema()
+        data = schema.load(request.get_json())
+
+        group = Group(name=data['name'], description=data.get('description'), owner_id=user_id)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add(GroupMember(group_id=group.id, user_id=user_id, added_by=user_id))
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Group created successfully',
+            'group': _group_dict(group)
+        }), 201
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('', methods=['GET'])
+@jwt_required()
+def get_groups():
+    """List the groups the current user owns or belongs to."""
+    try:
+        user_id = _current_user_id()
+
+        member_counts = select(
+            GroupMember.group_id, func.count(GroupMember.id).label('member_count')
+        ).group_by(GroupMember.group_id).subquery()
+
+        rows = db.session.query(Group, member_counts.c.member_count).outerjoin(
+            member_counts, member_counts.c.group_id == Group.id
+        ).filter(or_(
+            Group.owner_id == user_id,
+            Group.id.in_(select(GroupMember.group_id).where(GroupMember.user_id == user_id))
+        )).order_by(Group.name, Group.id).all()
+
+        return jsonify({
+            'groups': [dict(group.to_dict(), member_count=member_count or 0) for group, member_count in rows]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('/<int:group_id>', methods=['GET'])
+@jwt_required()
+def get_group(group_id):
+    """Get a group and a page of its members."""
+    try:
+        user_id = _current_user_id()
+        group = db.session.get(Group, group_id)
+
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
+
+        if group.owner_id != user_id and not _is_member(group_id, user_id):
+            return jsonify({'error': 'You are not a member of this group'}), 403
+
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 500)
+
+        members = db.session.query(GroupMember.user_id, User.username, GroupMember.created_at).join(
+            User, User.id == GroupMember.user_id
+        ).filter(GroupMember.group_id == group_id).order_by(GroupMember.id).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+
+        return jsonify({
+            'group': group.to_dict(),
+            'members': [{
+                'user_id': member_id,
+                'user': username,
+                'created_at': created_at.isoformat()
+            } for member_id, username, created_at in members.items],
+            'total': members.total,
+            'pages': members.pages,
+            'page': page,
+            'per_page': per_page
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('/<int:group_id>', methods=['PUT'])
+@jwt_required()
+def update_group(group_id):
+    """Rename or describe a group."""
+    try:
+        user_id = _current_user_id()
+        group = db.session.get(Group, group_id)
+
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
+
+        if group.owner_id != user_id:
+            return jsonify({'error': 'Only the group owner can perform this action'}), 403
+
+        schema = GroupSchema()
+        data = schema.load(request.get_json())
+
+        group.name = data['name']
+        group.description = data.get('description', group.description)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Group updated successfully',
+            'group': _group_dict(group)
+        }), 200
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('/<int:group_id>', methods=['DELETE'])
+@jwt_required()
+def delete_group(group_id):
+    """Delete a group together with its memberships and event grants."""
+    try:
+        user_id = _current_user_id()
+        group = db.session.get(Group, group_id)
+
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
+
+        if group.owner_id != user_id:
+            return jsonify({'error': 'Only the group owner can perform this action'}), 403
+
+        event_ids = group_event_ids([group_id])
+        for model in (GroupPermission, GroupMember):
+            db.session.execute(delete(model).where(model.group_id == group_id))
+        db.session.execute(delete(Group).where(Group.id == group_id))
+        db.session.commit()
+        invalidate_event_permissions(event_ids)
+
+        return jsonify({'message': 'Group deleted successfully'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('/<int:group_id>/members', methods=['POST'])
+@jwt_required()
+def add_members(group_id):
+    """Add users to a group."""
+    try:
+        user_id = _current_user_id()
+        group = db.session.get(Group, group_id)
+
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
+
+        if group.owner_id != user_id:
+            return jsonify({'error': 'Only the group owner can perform this action'}), 403
+
+        schema = GroupMembersSchema()
+        user_ids = list(dict.fromkeys(schema.load(request.get_json())['user_ids']))
+
+        found, existing = set(), set()
+        for chunk in chunks(user_ids):
+            found.update(db.session.scalars(select(User.id).where(User.id.in_(chunk))))
+            existing.update(db.session.scalars(select(GroupMember.user_id).where(
+                GroupMember.group_id == group_id,
+                GroupMember.user_id.in_(chunk)
+            )))
+
+        missing = [member_id for member_id in user_ids if member_id not in found]
+        if missing:
+            return jsonify({
+                'error': f'User with ID {missing[0]} not found',
+                'user_ids': missing
+            }), 404
+
+        now = datetime.utcnow()
+        added = [member_id for member_id in user_ids if member_id not in existing]
+        if added:
+            db.session.execute(insert(GroupMember), [
+                {'group_id': group_id, 'user_id': member_id, 'added_by': user_id, 'created_at': now}
+                for member_id in added
+            ])
+        db.session.commit()
+
+        if added:
+            _invalidate_group_access(group_id)
+
+        return jsonify({
+            'message': f'{len(added)} members added',
+            'added': added,
+            'already_members': [member_id for member_id in user_ids if member_id in existing]
+        }), 200
+
+    except MarshmallowValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@groups_bp.route('/<int:group_id>/members/<int:member_id>', methods=['DELETE'])
+@jwt_required()
+def remove_member(group_id, member_id):
+    """Remove a user from a group; members may remove themselves."""
+    try:
+        user_id = _current_user_id()
+        group = db.session.get(Group, group_id)
+
+        if not group:
+            return jsonify({'error': 'Group not found'}), 404
+
+        if group.owner_id != user_id and member_id != user_id:
+            return jsonify({'error': 'Only the group owner can perform this action'}), 403
+
+        if member_id == group.owner_id:
+            return jsonify({'error': 'The group owner cannot be removed'}), 400
+
+        membership = GroupMember.query.filter_by(group_id=group_id, user_id=member_id).first()
+        if not membership:
+            return jsonify({'error': 'Membership not found'}), 404
+
+        db.session.delete(membership)
+        db.session.commit()
+        _invalidate_group_access(group_id)
+
+        return jsonify({'message': 'Member removed successfully'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
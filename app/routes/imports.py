@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db
+from app.models.import_job import ImportJob
+from app.services.imports import create_import_job
+
+imports_bp = Blueprint('imports', __name__)
+
+
+@imports_bp.route('', methods=['POST'])
+@jwt_required()
+def create_import():
+    """Upload a calendar file and start a background import job."""
+    try:
+        user_id = get_jwt_identity()
+
+        user_id_int = int(user_id) if isinstance(user_id, str) else user_id
+
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({'error': 'No file provided'}), 400
+
+        try:
+            job = create_import_job(user_id_int, upload, request.form.get('format') or request.args.get('format'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'message': 'Import started',
+            'import': job.to_dict()
+        }), 202
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@imports_bp.route('', methods=['GET'])
+@jwt_required()
+def list_imports():
+    """List the current user's import jobs, newest first."""
+    try:
+        user_id = get_jwt_identity()
+
+        jobs = ImportJob.query.filter_by(user_id=user_id).order_by(ImportJob.id.desc()).limit(50).all()
+
+        return jsonify({
+            'imports': [job.to_dict() for job in jobs]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@imports_bp.route('/<int:id>', methods=['GET'])
+@jwt_required()
+def get_import(id):
+    """Get the progress of an import job."""
+    try:
+        user_id = get_jwt_identity()
+
+        job = ImportJob.query.filter_by(id=id, user_id=user_id).first()
+
+        if not job:
+            return jsonify({'error': 'Import not found'}), 404
+
+        return jsonify(job.to_dict()), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
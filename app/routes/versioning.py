@@ -6,14 +6,48 @@ from app import db
 from app.models.event import Event
 from app.models.permission import Permission, RoleType
 from app.models.version import EventVersion, ChangeLog
+from app.models.user import User
+from app.services.occurrence_index import index_event
+from app.services.search import update_search_index
+from app.services.event_cache import invalidate_event_snapshots
+from app.services.version_store import load_version_data
+from app.services.version_diff import RENDER_FORMATS, compare_versions as diff_versions, rendered
 from app.utils.decorators import jwt_required_with_role, editor_required
-from app.utils.errors import ValidationError, ResourceNotFoundError, AuthorizationError
+from app.utils.errors import ValidationError, ResourceNotFoundError, AuthorizationError, ServiceUnavailableError
+from app.utils.pagination import keyset_paginate, cached_count
 from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 
 
 version_bp = Blueprint('versioning', __name__)
 
+HISTORY_FIELDS = ('full', 'summary')
+
+
+def _summary_query(event_id):
+    """Version metadata and author names, without the snapshot payload."""
+    return db.session.query(
+        EventVersion.id,
+        EventVersion.version_number,
+        EventVersion.created_at,
+        EventVersion.created_by,
+        EventVersion.changed_fields,
+        User.username
+    ).outerjoin(User, User.id == EventVersion.created_by).filter(EventVersion.event_id == event_id)
+
+
+def _summary_dict(event_id, row):
+    return {
+        'id': row.id,
+        'event_id': event_id,
+        'version_number': row.version_number,
+        'changed_fields': json.loads(row.changed_fields) if row.changed_fields is not None else None,
+        'created_at': row.created_at.isoformat(),
+        'created_by': row.created_by,
+        'author': row.username
+    }
+
 
 @version_bp.route('/<int:id>/history', methods=['GET'])
 @jwt_required_with_role(['owner', 'editor', 'viewer'])
@@ -28,10 +62,45 @@ def get_event_history(id, permission=None):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
 
-        versions = EventVersion.query.filter_by(event_id=id).order_by(EventVersion.version_number.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        fields = request.args.get('fields', 'full')
+        if fields not in HISTORY_FIELDS:
+            return jsonify({'error': f'fields must be one of: {", ".join(HISTORY_FIELDS)}'}), 400
+        summary = fields == 'summary'
+
+        if summary:
+            query = _summary_query(id)
+        else:
+            query = EventVersion.query.filter_by(event_id=id).options(selectinload(EventVersion.author))
+
+        def serialize(items):
+            if summary:
+                return [_summary_dict(id, row) for row in items]
+            load_version_data(items)
+            return [version.to_dict() for version in items]
+
+        if 'cursor' in request.args:
+            try:
+                items, next_cursor = keyset_paginate(
+                    query, [EventVersion.version_number], request.args.get('cursor'), per_page, descending=True
+                )
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+            response = {
+                'versions': serialize(items),
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if request.args.get('include_total', 'false').lower() in ('true', '1'):
+                response['total'] = cached_count(('history', id), query)
+            return jsonify(response), 200
+
+        versions = query.order_by(EventVersion.version_number.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
 
         return jsonify({
-            'versions': [version.to_dict() for version in versions.items],
+            'versions': serialize(versions.items),
             'total': versions.total,
             'pages': versions.pages,
             'page': page,
@@ -97,16 +166,21 @@ def rollback_event(id, version_id, permission=None):
         event.location = version_data.get('location', event.location)
         event.is_recurring = version_data.get('is_recurring', event.is_recurring)
 
-        changelog = current_version.diff_with(target_version)
-        db.session.add(changelog)
+        index_event(event)
+        update_search_index([event])
 
         db.session.commit()
+        invalidate_event_snapshots([id])
 
         return jsonify({
             'message': 'Event rolled back successfully',
             'event': event.to_dict()
         }), 200
 
+    except ServiceUnavailableError as e:
+        db.session.rollback()
+        return jsonify(e.to_dict()), e.status_code
+
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -125,11 +199,35 @@ def get_event_changelog(id, permission=None):
         page = request.args.get('page', 1, type=int)
         per_page = min(request.args.get('per_page', 10, type=int), 100)
 
+        render = request.args.get('format', 'text')
+        if render not in RENDER_FORMATS:
+            return jsonify({'error': f'format must be one of: {", ".join(RENDER_FORMATS)}'}), 400
+
+        if 'cursor' in request.args:
+            query = ChangeLog.query.filter_by(event_id=id).options(selectinload(ChangeLog.user))
+            try:
+                items, next_cursor = keyset_paginate(
+                    query, [ChangeLog.timestamp, ChangeLog.id], request.args.get('cursor'), per_page, descending=True
+                )
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+
+            response = {
+                'changelogs': [log.to_dict(render) for log in items],
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if request.args.get('include_total', 'false').lower() in ('true', '1'):
+                response['total'] = cached_count(('changelog', id), query)
+            return jsonify(response), 200
+
         # Get all change logs for this event
-        changelogs = ChangeLog.query.filter_by(event_id=id).order_by(ChangeLog.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
+        changelogs = ChangeLog.query.filter_by(event_id=id).options(
+            selectinload(ChangeLog.user)
+        ).order_by(ChangeLog.timestamp.desc()).paginate(page=page, per_page=per_page, error_out=False)
 
         return jsonify({
-            'changelogs': [log.to_dict() for log in changelogs.items],
+            'changelogs': [log.to_dict(render) for log in changelogs.items],
             'total': changelogs.total,
             'pages': changelogs.pages,
             'page': page,
@@ -156,24 +254,17 @@ def compare_versions(id, permission=None):
         if not from_version or not to_version:
             return jsonify({'error': 'Both from_version and to_version parameters are required'}), 400
 
-        source_version = EventVersion.query.filter_by(
-            event_id=id,
-            version_number=from_version
-        ).first()
+        render = request.args.get('format', 'text')
+        if render not in RENDER_FORMATS:
+            return jsonify({'error': f'format must be one of: {", ".join(RENDER_FORMATS)}'}), 400
 
-        target_version = EventVersion.query.filter_by(
-            event_id=id,
-            version_number=to_version
-        ).first()
+        changes = diff_versions(id, from_version, to_version)
 
-        if not source_version or not target_version:
+        if changes is None:
             return jsonify({'error': 'One or both versions not found'}), 404
 
-        # Create a diff between the two versions
-        diff = source_version.diff_with(target_version).to_dict()
-
         return jsonify({
-            'comparison': diff,
+            'comparison': dict(rendered(changes, render), event_id=id, from_version=from_version, to_version=to_version),
             'from_version': from_version,
             'to_version': to_version
         }), 200
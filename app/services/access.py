@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Resolve event access from direct grants and group grants.
+
+A user can reach an event through their own ``Permission`` row or through a
+``GroupPermission`` on any group they belong to; the strongest role wins.
+Every helper here compiles to one statement over the (user_id, event_id),
+(user_id, group_id) and (group_id, event_id) indexes, so sharing with a
+whole group costs one row and membership changes never touch event ACLs.
+"""
+from sqlalchemy import func, select, union, union_all
+
+from app import db
+from app.models.group import GroupMember, GroupPermission
+from app.models.permission import Permission, RoleType
+
+ROLE_RANK = {RoleType.VIEWER: 1, RoleType.EDITOR: 2, RoleType.OWNER: 3}
+
+
+def strongest(roles):
+    """Return the highest-ranked role, or None for no roles."""
+    return max(roles, key=ROLE_RANK.__getitem__, default=None)
+
+
+def _role_grants(user_id, event_filter):
+    direct = select(Permission.event_id, Permission.role).where(
+        Permission.user_id == user_id, event_filter(Permission.event_id)
+    )
+    via_group = select(GroupPermission.event_id, GroupPermission.role).join(
+        GroupMember, GroupMember.group_id == GroupPermission.group_id
+    ).where(GroupMember.user_id == user_id, event_filter(GroupPermission.event_id))
+    return union_all(direct, via_group)
+
+
+def resolve_role(user_id, event_id):
+    """Return the user's effective RoleType on an event, or None."""
+    rows = db.session.execute(_role_grants(user_id, lambda column: column == event_id)).all()
+    return strongest(role for _, role in rows)
+
+
+def resolve_roles(user_id, event_ids):
+    """Return {event_id: effective RoleType} for the events the user can access."""
+    roles = {}
+    for event_id, role in db.session.execute(_role_grants(user_id, lambda column: column.in_(event_ids))):
+        roles[event_id] = strongest((roles.get(event_id, role), role))
+    return roles
+
+
+def accessible_event_ids(user_id):
+    """Subquery of the ids of every event the user can access."""
+    return union(
+        select(Permission.event_id).where(Permission.user_id == user_id),
+        select(GroupPermission.event_id).join(
+            GroupMember, GroupMember.group_id == GroupPermission.group_id
+        ).where(GroupMember.user_id == user_id)
+    )
+
+
+def access_pairs(user_ids):
+    """Subquery of distinct (user_id, event_id) pairs the given users can access."""
+    return union(
+        select(Permission.user_id, Permission.event_id).where(Permission.user_id.in_(user_ids)),
+        select(GroupMember.user_id, GroupPermission.event_id).join(
+            GroupPermission, GroupPermission.group_id == GroupMember.group_id
+        ).where(GroupMember.user_id.in_(user_ids))
+    ).subquery()
+
+
+def grants_fingerprint(user_id):
+    """Return a tuple that changes whenever the user's direct or group grants change."""
+    return tuple(db.session.execute(select(
+        select(func.max(Permission.updated_at)).where(Permission.user_id == user_id).scalar_subquery(),
+        select(func.max(GroupPermission.updated_at)).where(GroupPermission.group_id.in_(
+            select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        )).scalar_subquery(),
+        select(func.max(GroupMember.created_at)).where(GroupMember.user_id == user_id).scalar_subquery()
+    )).one())
+
+
+def group_event_ids(group_ids):
+    """Return the ids of events granted to any of the groups."""
+    return db.session.scalars(
+        select(GroupPermission.event_id).where(GroupPermission.group_id.in_(list(group_ids))).distinct()
+    ).all()
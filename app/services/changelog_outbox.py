@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""Changelog entries computed off the request path.
+
+Every edit stores the event as it was before the change as version N (see
+``create_versions``), and inserts a ``ChangeLogOutbox`` row for N -> N+1 in
+the same transaction. The state after the edit is version N+1 once the next
+edit happens, and until then it is the event itself, so a worker can diff
+the two later.
+
+Workers from a pool of ``CHANGELOG_WORKERS`` threads claim outbox rows in
+batches of ``CHANGELOG_BATCH_SIZE``. Each worker writes the ChangeLog rows
+and deletes the claimed outbox rows in one transaction. A claim that is not
+finished within ``CLAIM_TIMEOUT`` can be taken over, so rows survive a
+crashed process and several processes can share one outbox. When more than
+``CHANGELOG_MAX_PENDING`` rows are waiting, new edits wait for the workers
+to catch up for at most ``CHANGELOG_BACKPRESSURE_TIMEOUT`` seconds, then
+fail with 503.
+
+``backfill_changelog`` enqueues entries for versions that have none, for
+histories written before this pipeline existed.
+"""
+from datetime import datetime, timedelta
+import threading
+import time
+import uuid
+
+from flask import current_app, has_app_context
+from sqlalchemy import and_, delete, event, exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased, selectinload
+
+from app import db
+from app.models.event import Event
+from app.models.version import ChangeLog, ChangeLogOutbox, EventVersion
+from app.services.version_diff import diff_states, pack_changes
+from app.services.version_store import load_version_data
+from app.utils.errors import ServiceUnavailableError
+
+EXTENSION_KEY = 'changelog_pipeline'
+PENDING_KEY = 'changelog_pending'
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+class ChangelogBacklogError(ServiceUnavailableError):
+    """Raised when edits outpace the changelog workers."""
+    def __init__(self, message="Too many pending changes, please retry shortly", payload=None):
+        super().__init__(message, payload=payload)
+
+
+class ChangelogPipeline:
+    """Worker threads that drain the changelog outbox, plus the backlog estimate used for backpressure."""
+
+    def __init__(self, app, workers=2, batch_size=200, max_pending=10000, poll_interval=5,
+                 backpressure_timeout=5):
+        self.app = app
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.backpressure_timeout = backpressure_timeout
+        self._condition = threading.Condition()
+        self._signalled = False
+        self._backlog = 0
+        self._threads = []
+
+    def start(self):
+        with self.app.app_context():
+            try:
+                self._backlog = pending_count(self.max_pending)
+            finally:
+                db.session.remove()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'changelog-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self, count):
+        """Wake the workers after ``count`` outbox rows were committed."""
+        with self._condition:
+            self._backlog += count
+            self._signalled = True
+            self._condition.notify_all()
+
+    def wait_for_capacity(self):
+        """Block while the backlog is full; raise ChangelogBacklogError if it stays full."""
+        deadline = time.monotonic() + self.backpressure_timeout
+        with self._condition:
+            while self._backlog >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ChangelogBacklogError()
+                self._condition.wait(remaining)
+
+    def _set_backlog(self, backlog):
+        with self._condition:
+            self._backlog = backlog
+            self._condition.notify_all()
+
+    def _drain(self):
+        with self.app.app_context():
+            try:
+                while process_outbox(self.batch_size) is not None:
+                    self._set_backlog(pending_count(self.max_pending))
+                self._set_backlog(pending_count(self.max_pending))
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._signalled:
+                    self._condition.wait(self.poll_interval)
+                self._signalled = False
+            try:
+                self._drain()
+            except Exception:
+                self.app.logger.exception('Processing the changelog outbox failed')
+
+
+def get_pipeline():
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def start_changelog_workers(app):
+    config = app.config
+    pipeline = ChangelogPipeline(
+        app,
+        workers=config['CHANGELOG_WORKERS'],
+        batch_size=config['CHANGELOG_BATCH_SIZE'],
+        max_pending=config['CHANGELOG_MAX_PENDING'],
+        poll_interval=config['CHANGELOG_POLL_INTERVAL'],
+        backpressure_timeout=config['CHANGELOG_BACKPRESSURE_TIMEOUT']
+    )
+    app.extensions[EXTENSION_KEY] = pipeline
+    pipeline.start()
+    return pipeline
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_workers(session):
+    count = session.info.pop(PENDING_KEY, 0)
+    if count and has_app_context():
+        pipeline = get_pipeline()
+        if pipeline:
+            pipeline.notify(count)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_pending(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def enqueue_changelog(versions):
+    """Queue changelog entries for edits recorded by ``versions`` in the current transaction."""
+    if not versions:
+        return
+    pipeline = get_pipeline()
+    if pipeline:
+        pipeline.wait_for_capacity()
+
+    db.session.add_all(ChangeLogOutbox(
+        event_id=version.event_id,
+        from_version=version.version_number,
+        to_version=version.version_number + 1,
+        user_id=version.created_by
+    ) for version in versions)
+    db.session.info[PENDING_KEY] = db.session.info.get(PENDING_KEY, 0) + len(versions)
+
+
+def pending_count(limit=None):
+    """Count outbox rows, stopping at ``limit`` so a huge backlog stays cheap to measure."""
+    rows = select(ChangeLogOutbox.id)
+    if limit:
+        rows = rows.limit(limit)
+    return db.session.scalar(select(func.count()).select_from(rows.subquery()))
+
+
+def _changelog_rows(claimed):
+    """Build ChangeLog insert rows for claimed outbox rows; unresolvable rows are dropped."""
+    # Events are read before versions: if the next edit commits in between,
+    # its version is then visible to the second query.
+    events = {live.id: live for live in Event.query.options(selectinload(Event.recurrence_pattern)).filter(
+        Event.id.in_({row.event_id for row in claimed})
+    )}
+
+    numbers = {}
+    for row in claimed:
+        numbers.setdefault(row.event_id, set()).update((row.from_version, row.to_version))
+    versions = {(version.event_id, version.version_number): version for version in EventVersion.query.filter(or_(*(
+        and_(EventVersion.event_id == event_id, EventVersion.version_number.in_(event_numbers))
+        for event_id, event_numbers in numbers.items()
+    )))}
+    load_version_data(list(versions.values()))
+
+    entries = []
+    for row in claimed:
+        before = versions.get((row.event_id, row.from_version))
+        after = versions.get((row.event_id, row.to_version))
+        live = events.get(row.event_id)
+        if before is None or live is None:
+            continue
+        if after is not None:
+            after_state = after.get_data_dict()
+        elif live.current_version == row.from_version:
+            after_state = live.snapshot()
+        else:
+            continue
+
+        entries.append({
+            'event_id': row.event_id,
+            'from_version': row.from_version,
+            'to_version': row.to_version,
+            'diff_text': '',
+            'changes': pack_changes(diff_states(before.get_data_dict(), after_state)),
+            'timestamp': row.created_at,
+            'user_id': row.user_id
+        })
+    return entries
+
+
+def process_outbox(batch_size):
+    """Turn one batch of outbox rows into ChangeLog rows.
+
+    Returns the number of rows processed, or None when nothing was left to claim.
+    """
+    now = datetime.utcnow()
+    claimable = or_(ChangeLogOutbox.claimed_at.is_(None), ChangeLogOutbox.claimed_at < now - CLAIM_TIMEOUT)
+    ids = db.session.scalars(
+        select(ChangeLogOutbox.id).where(claimable).order_by(ChangeLogOutbox.id).limit(batch_size)
+    ).all()
+    if not ids:
+        db.session.commit()
+        return None
+
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(ChangeLogOutbox).where(ChangeLogOutbox.id.in_(ids), claimable).values(claimed_at=now, claim_token=token),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+
+    claimed = ChangeLogOutbox.query.filter_by(claim_token=token).all()
+    if claimed:
+        entries = _changelog_rows(claimed)
+        if entries:
+            db.session.execute(insert(ChangeLog), entries)
+        db.session.execute(delete(ChangeLogOutbox).where(ChangeLogOutbox.claim_token == token))
+    db.session.commit()
+    db.session.expunge_all()
+    return len(claimed)
+
+
+def _missing_entries(event_ids):
+    """Select outbox rows for edits of the given events that have neither a changelog entry nor an outbox row."""
+    first = aliased(EventVersion)
+    first_version = select(func.min(first.version_number)).where(
+        first.event_id == EventVersion.event_id
+    ).correlate(EventVersion).scalar_subquery()
+
+    return select(
+        EventVersion.event_id,
+        EventVersion.version_number,
+        EventVersion.version_number + literal(1),
+        EventVersion.created_by,
+        EventVersion.created_at
+    ).where(
+        EventVersion.event_id.in_(event_ids),
+        EventVersion.version_number > first_version,
+        ~exists().where(
+            ChangeLog.event_id == EventVersion.event_id,
+            ChangeLog.from_version == EventVersion.version_number,
+            ChangeLog.to_version > EventVersion.version_number
+        ),
+        ~exists().where(
+            ChangeLogOutbox.event_id == EventVersion.event_id,
+            ChangeLogOutbox.from_version == EventVersion.version_number
+        )
+    )
+
+
+def backfill_changelog(batch_size=None, log=None):
+    """Create the missing changelog entries of existing histories.
+
+    Every version except an event's first records an edit. Edits without an
+    entry are enqueued and processed one batch of events at a time, so the
+    outbox never holds more than a batch of backfill rows.
+    """
+    batch_size = batch_size or current_app.config['CHANGELOG_BATCH_SIZE']
+    last_id = 0
+    total = 0
+    while True:
+        event_ids = db.session.scalars(
+            select(EventVersion.event_id).where(EventVersion.event_id > last_id).distinct()
+            .order_by(EventVersion.event_id).limit(batch_size)
+        ).all()
+        if not event_ids:
+            return total
+
+        result = db.session.execute(insert(ChangeLogOutbox).from_select(
+            ['event_id', 'from_version', 'to_version', 'user_id', 'created_at'],
+            _missing_entries(event_ids)
+        ))
+        db.session.commit()
+        total += max(result.rowcount, 0)
+
+        while process_outbox(current_app.config['CHANGELOG_BATCH_SIZE']) is not None:
+            pass
+        last_id = event_ids[-1]
+        if log:
+            log(f'Backfilled changelog up to event {last_id} ({total} entries queued)')
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Detect overlapping occurrences with a sort-and-sweep pass.
+
+Intervals are visited in start order while the intervals still in progress
+are kept in min-heaps keyed by end time, so checking ``n`` candidates
+against ``m`` existing occurrences costs O((n + m) log(n + m)) plus the
+size of the output, instead of comparing every pair.
+"""
+import heapq
+from itertools import count
+
+
+def _expire(active, now):
+    """Drop intervals that ended at or before ``now`` (touching intervals do not overlap)."""
+    while active and active[0][0] <= now:
+        heapq.heappop(active)
+
+
+def find_conflicts(candidates, existing=()):
+    """Return ``(candidate, other)`` pairs of overlapping occurrences.
+
+    ``other`` is either an existing occurrence or another candidate;
+    occurrences belonging to the same event are never reported against
+    each other, and existing occurrences are not checked among themselves.
+    """
+    tagged = [(occurrence.start, True, occurrence) for occurrence in candidates]
+    tagged.extend((occurrence.start, False, occurrence) for occurrence in existing)
+    tagged.sort(key=lambda item: item[0])
+
+    sequence = count()
+    active_candidates = []
+    active_existing = []
+    conflicts = []
+
+    for start, is_candidate, occurrence in tagged:
+        if occurrence.end <= start:
+            continue
+
+        _expire(active_candidates, start)
+        _expire(active_existing, start)
+
+        for _, _, other in active_candidates:
+            if other.event_id != occurrence.event_id:
+                conflicts.append((other, occurrence))
+
+        if is_candidate:
+            for _, _, other in active_existing:
+                if other.event_id != occurrence.event_id:
+                    conflicts.append((occurrence, other))
+            heapq.heappush(active_candidates, (occurrence.end, next(sequence), occurrence))
+        else:
+            heapq.heappush(active_existing, (occurrence.end, next(sequence), occurrence))
+
+    return conflicts
+
+
+def find_overlaps(occurrences):
+    """Return every pair of overlapping occurrences within a single calendar."""
+    return find_conflicts(occurrences)
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Serialized event snapshots kept in the shared cache.
+
+``GET /api/events/<id>`` is served from here; every route that changes an
+event invalidates its snapshot after committing.
+"""
+from app import db
+from app.models.event import Event
+from app.services.shared_cache import get_shared_cache
+
+SHARED_NAMESPACE = 'event'
+
+
+def get_event_dict(event_id):
+    """Return ``Event.to_dict()`` for an event from the shared cache, or None if it does not exist."""
+    shared = get_shared_cache()
+    hit, value = shared.get(SHARED_NAMESPACE, event_id, 'dict')
+    if hit:
+        return value
+
+    event = db.session.get(Event, event_id)
+    if not event:
+        return None
+    event_dict = event.to_dict()
+    shared.set(SHARED_NAMESPACE, event_id, 'dict', value, event_dict)
+    return event_dict
+
+
+def invalidate_event_snapshots(event_ids):
+    """Drop the cached snapshots of the given events in every worker."""
+    get_shared_cache().invalidate(SHARED_NAMESPACE, [int(event_id) for event_id in event_ids])
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Aggregate busy time across many users.
+
+Busy intervals for every requested user are fetched in one query ordered by
+(user, start), so each user's intervals are merged in a single linear pass
+and the combined free time comes from a k-way merge of those sorted lists.
+"""
+from itertools import groupby
+import heapq
+
+from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models.event import Event
+from app.models.occurrence import EventOccurrence
+from app.services.access import access_pairs
+from app.services.occurrence_index import indexed_until
+from app.services.recurrence import expand_events
+
+
+def merge_intervals(intervals):
+    """Merge (start, end) pairs that are already sorted by start."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def free_gaps(busy, start, end):
+    """Return the gaps in [start, end] not covered by the merged ``busy`` intervals."""
+    gaps = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            gaps.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def _user_intervals(user_ids, start, end):
+    """Yield (user_id, start, end) for accessible occurrences, ordered by user then start."""
+    pairs = access_pairs(user_ids)
+    if end <= indexed_until():
+        return db.session.query(
+            pairs.c.user_id, EventOccurrence.start_time, EventOccurrence.end_time
+        ).join(EventOccurrence, EventOccurrence.event_id == pairs.c.event_id).filter(
+            EventOccurrence.start_time < end,
+            EventOccurrence.end_time > start
+        ).order_by(pairs.c.user_id, EventOccurrence.start_time).all()
+
+    grants = db.session.query(pairs.c.user_id, pairs.c.event_id).join(Event, Event.id == pairs.c.event_id).filter(
+        Event.start_time < end,
+        or_(Event.end_time > start, Event.is_recurring.is_(True))
+    ).all()
+
+    event_ids = {event_id for _, event_id in grants}
+    events = Event.query.options(selectinload(Event.recurrence_pattern)).filter(Event.id.in_(event_ids)).all()
+    by_event = {}
+    for occurrence in expand_events(events, start, end):
+        if occurrence.end > start and occurrence.start < end:
+            by_event.setdefault(occurrence.event_id, []).append((occurrence.start, occurrence.end))
+
+    rows = [(user_id, occ_start, occ_end)
+            for user_id, event_id in grants
+            for occ_start, occ_end in by_event.get(event_id, ())]
+    rows.sort()
+    return rows
+
+
+def free_busy(user_ids, start, end):
+    """Return ({user_id: merged busy intervals}, combined free gaps) within [start, end]."""
+    busy = {user_id: [] for user_id in user_ids}
+
+    for user_id, rows in groupby(_user_intervals(user_ids, start, end), key=lambda row: row[0]):
+        busy[user_id] = merge_intervals(
+            (max(row_start, start), min(row_end, end)) for _, row_start, row_end in rows
+        )
+
+    combined = merge_intervals(heapq.merge(*busy.values()))
+    return busy, free_gaps(combined, start, end)
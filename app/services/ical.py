@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""Serialize events to iCalendar (RFC 5545) and parse .ics files.
+
+Recurring events are written as a single VEVENT with an RRULE derived from
+their ``RecurrencePattern``, so feeds never contain expanded occurrences.
+Rules are mapped so that calendar clients expand them exactly as
+``app.services.recurrence`` does, and imported rules the pattern model
+cannot reproduce are rejected rather than stored as a single occurrence.
+Both directions work on streams: the writer yields one VEVENT at a time and
+the parser yields one event dict per VEVENT.
+"""
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+import re
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - Python < 3.9
+    ZoneInfo = None
+
+from app.models.event import RecurrenceType
+from app.services.recurrence import WEEKDAY_NAMES, Series, parse_days_of_week
+
+PRODID = '-//NeoFi//Event Management//EN'
+WEEKDAY_CODES = {number: name.upper() for name, number in WEEKDAY_NAMES.items()}
+FREQUENCIES = {
+    RecurrenceType.DAILY: 'DAILY',
+    RecurrenceType.WEEKLY: 'WEEKLY',
+    RecurrenceType.MONTHLY: 'MONTHLY',
+    RecurrenceType.YEARLY: 'YEARLY'
+}
+DURATION = re.compile(r'^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$')
+
+
+def _escape(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _unescape(value):
+    return re.sub(r'\\([\\;,nN])', lambda m: '\n' if m.group(1) in 'nN' else m.group(1), value)
+
+
+def _fold(line):
+    """Fold a content line to 75 octets as required by RFC 5545."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence.
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _format_datetime(value):
+    """Format a naive UTC datetime as an iCalendar UTC timestamp."""
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _month_day_parts(day):
+    """Return the RRULE parts for a day of the month, clamped to the end of short months.
+
+    ``Series`` moves e.g. the 31st to the last day of shorter months, while
+    RFC 5545 skips months without that day. Picking the last of the days
+    28..day that exist in a month reproduces the clamping.
+    """
+    if day <= 28:
+        return [f'BYMONTHDAY={day}']
+    return ['BYMONTHDAY=' + ','.join(str(candidate) for candidate in range(28, day + 1)), 'BYSETPOS=-1']
+
+
+def pattern_to_rrule(pattern, start):
+    """Build an RRULE value from a RecurrencePattern, or None if it has no iCalendar form.
+
+    ``start`` is the event start, which supplies the weekday, day and month
+    the pattern leaves out. Custom patterns are expanded as a single
+    occurrence, so they get no RRULE.
+    """
+    if pattern.type == RecurrenceType.CUSTOM:
+        return None
+
+    parts = [f'FREQ={FREQUENCIES[pattern.type]}']
+    if pattern.interval and pattern.interval > 1:
+        parts.append(f'INTERVAL={pattern.interval}')
+    if pattern.type == RecurrenceType.WEEKLY:
+        days = parse_days_of_week(pattern.days_of_week) or [start.weekday()]
+        parts.append('BYDAY=' + ','.join(WEEKDAY_CODES[day] for day in days))
+    if pattern.type == RecurrenceType.YEARLY:
+        parts.append(f'BYMONTH={pattern.month_of_year or start.month}')
+    if pattern.type in (RecurrenceType.MONTHLY, RecurrenceType.YEARLY):
+        parts.extend(_month_day_parts(pattern.day_of_month or start.day))
+    if pattern.count:
+        parts.append(f'COUNT={pattern.count}')
+    elif pattern.end_date:
+        parts.append(f'UNTIL={_format_datetime(pattern.end_date)}')
+    return ';'.join(parts)
+
+
+def _parse_month_day(parts, frequency, month):
+    """Return the day of month an RRULE expands on, or None to use DTSTART's."""
+    if 'BYMONTHDAY' not in parts:
+        if 'BYSETPOS' in parts:
+            raise ValueError('BYSETPOS is only supported with BYMONTHDAY')
+        return None
+
+    days = [int(day) for day in parts['BYMONTHDAY'].split(',')]
+    if 'BYSETPOS' in parts:
+        # Only the clamping form written by _month_day_parts has a pattern equivalent.
+        if parts['BYSETPOS'] != '-1' or days != list(range(28, days[-1] + 1)) or len(days) < 2:
+            raise ValueError('BYSETPOS is only supported to clamp BYMONTHDAY to the end of the month')
+        return days[-1]
+
+    if len(days) != 1 or not 1 <= days[0] <= 31:
+        raise ValueError('BYMONTHDAY must be a single day of the month')
+    day = days[0]
+    # RFC 5545 skips months without the day, the pattern clamps it, so only days every visited month has agree.
+    shortest = monthrange(2001, month)[1] if frequency == 'YEARLY' else 28
+    if day > shortest:
+        raise ValueError(f'BYMONTHDAY={day} skips short months; use BYMONTHDAY=28,...,{day};BYSETPOS=-1')
+    return day
+
+
+def rrule_to_pattern(rule, start):
+    """Map an RRULE value with DTSTART ``start`` onto recurrence_pattern input for EventSchema.
+
+    Raises ValueError for rules the pattern model would expand differently,
+    e.g. ordinal weekdays (``BYDAY=2TU``), several months or a DTSTART that
+    is not itself an occurrence of the rule.
+    """
+    parts = {}
+    for part in rule.split(';'):
+        if '=' in part:
+            key, value = part.split('=', 1)
+            parts[key.strip().upper()] = value.strip().upper()
+
+    frequency = parts.pop('FREQ', '')
+    types = {value: key for key, value in FREQUENCIES.items()}
+    if frequency not in types:
+        raise ValueError(f'Unsupported RRULE frequency: {frequency or "missing"}')
+
+    allowed = {'INTERVAL', 'COUNT', 'UNTIL', 'WKST'} | {
+        'DAILY': set(),
+        'WEEKLY': {'BYDAY'},
+        'MONTHLY': {'BYMONTHDAY', 'BYSETPOS'},
+        'YEARLY': {'BYMONTH', 'BYMONTHDAY', 'BYSETPOS'}
+    }[frequency]
+    unsupported = sorted(set(parts) - allowed)
+    if unsupported:
+        raise ValueError(f'Unsupported RRULE parts for FREQ={frequency}: {", ".join(unsupported)}')
+
+    pattern = {'type': types[frequency].value, 'interval': int(parts.get('INTERVAL', 1))}
+    if pattern['interval'] < 1:
+        raise ValueError('INTERVAL must be positive')
+    # Weeks start on Monday in Series, which only matters when weeks are skipped.
+    if frequency == 'WEEKLY' and pattern['interval'] > 1 and parts.get('WKST', 'MO') != 'MO':
+        raise ValueError('Only WKST=MO is supported with INTERVAL')
+
+    if 'BYDAY' in parts:
+        days = [day.strip() for day in parts['BYDAY'].split(',')]
+        if any(day.lower() not in WEEKDAY_NAMES for day in days):
+            raise ValueError('BYDAY must list plain weekdays')
+        pattern['days_of_week'] = ','.join(days)
+
+    month = start.month
+    if 'BYMONTH' in parts:
+        if not parts['BYMONTH'].isdigit() or not 1 <= int(parts['BYMONTH']) <= 12:
+            raise ValueError('BYMONTH must be a single month')
+        month = pattern['month_of_year'] = int(parts['BYMONTH'])
+    elif frequency == 'YEARLY' and 'BYMONTHDAY' in parts:
+        raise ValueError('FREQ=YEARLY with BYMONTHDAY needs BYMONTH')
+
+    if frequency in ('MONTHLY', 'YEARLY'):
+        day = _parse_month_day(parts, frequency, month)
+        if day is not None:
+            pattern['day_of_month'] = day
+        else:
+            # Clients then repeat DTSTART's day, which has to exist in every month as well.
+            _parse_month_day({'BYMONTHDAY': str(start.day)}, frequency, month)
+
+    # RFC 5545 always counts DTSTART as the first instance; Series only when it matches the rule.
+    first = next(Series(None, start, start, SimpleNamespace(
+        type=types[frequency], interval=pattern['interval'], days_of_week=pattern.get('days_of_week'),
+        day_of_month=pattern.get('day_of_month'), month_of_year=pattern.get('month_of_year'),
+        end_date=None, count=None
+    )).occurrences(), None)
+    if first is None or first.start != start:
+        raise ValueError('DTSTART is not an occurrence of its RRULE')
+
+    if 'COUNT' in parts:
+        pattern['count'] = int(parts['COUNT'])
+    if 'UNTIL' in parts:
+        pattern['end_date'] = _parse_datetime_value(parts['UNTIL'], {}).isoformat()
+    return pattern
+
+
+def event_to_vevent(event):
+    """Return the folded VEVENT block for an event."""
+    start, end, rule = event.start_time, event.end_time, None
+    if event.is_recurring and event.recurrence_pattern:
+        rule = pattern_to_rrule(event.recurrence_pattern, event.start_time)
+        # DTSTART always counts as an occurrence, so start the feed at the first one the series yields.
+        first = next(Series.from_event(event).occurrences(), None) if rule else None
+        if first is not None:
+            start, end = first.start, first.end
+
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.id}@neofi',
+        f'DTSTAMP:{_format_datetime(event.updated_at or event.created_at or datetime.utcnow())}',
+        f'DTSTART:{_format_datetime(start)}',
+        f'DTEND:{_format_datetime(end)}',
+        f'SUMMARY:{_escape(event.title)}',
+        f'SEQUENCE:{event.current_version or 0}'
+    ]
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.location:
+        lines.append(f'LOCATION:{_escape(event.location)}')
+    if event.updated_at:
+        lines.append(f'LAST-MODIFIED:{_format_datetime(event.updated_at)}')
+    if rule:
+        lines.append(f'RRULE:{rule}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines)
+
+
+def iter_calendar(events, name=None):
+    """Yield an iCalendar document chunk by chunk for an iterable of events."""
+    header = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN']
+    if name:
+        header.append(f'X-WR-CALNAME:{_escape(name)}')
+    yield ''.join(_fold(line) for line in header)
+    for event in events:
+        yield event_to_vevent(event)
+    yield _fold('END:VCALENDAR')
+
+
+def _unfold(lines):
+    """Join folded content lines from an iterable of raw text lines."""
+    current = None
+    for raw in lines:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def _split_property(line):
+    """Split 'NAME;PARAM=x:value' into (name, params, value), honouring quoted params."""
+    in_quotes = False
+    for position, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = line[:position], line[position + 1:]
+            break
+    else:
+        return None
+
+    name, *raw_params = head.split(';')
+    params = {}
+    for raw in raw_params:
+        if '=' in raw:
+            key, param_value = raw.split('=', 1)
+            params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+
+def _parse_datetime_value(value, params):
+    """Parse a DATE or DATE-TIME value into a naive UTC datetime."""
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.combine(date(int(value[:4]), int(value[4:6]), int(value[6:8])), datetime.min.time())
+
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    if value.endswith('Z'):
+        return parsed
+    if params.get('TZID') and ZoneInfo is not None:
+        try:
+            local = parsed.replace(tzinfo=ZoneInfo(params['TZID']))
+            return local.astimezone(timezone.utc).replace(tzinfo=None)
+        except (KeyError, ValueError):
+            pass
+    return parsed
+
+
+def _parse_duration(value):
+    match = DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f'Invalid duration: {value}')
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                         minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -duration if sign == '-' else duration
+
+
+def _vevent_to_event(properties):
+    """Convert collected VEVENT properties into EventSchema input."""
+    if 'DTSTART' not in properties:
+        raise ValueError('VEVENT without DTSTART')
+
+    params, value = properties['DTSTART']
+    start = _parse_datetime_value(value, params)
+    all_day = params.get('VALUE') == 'DATE' or len(value.strip()) == 8
+
+    if 'DTEND' in properties:
+        end_params, end_value = properties['DTEND']
+        end = _parse_datetime_value(end_value, end_params)
+    elif 'DURATION' in properties:
+        end = start + _parse_duration(properties['DURATION'][1])
+    else:
+        end = start + (timedelta(days=1) if all_day else timedelta(0))
+
+    event = {
+        'title': _unescape(properties.get('SUMMARY', ({}, ''))[1]) or 'Untitled event',
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat()
+    }
+    if 'DESCRIPTION' in properties:
+        event['description'] = _unescape(properties['DESCRIPTION'][1])
+    if 'LOCATION' in properties:
+        event['location'] = _unescape(properties['LOCATION'][1])
+    if 'RRULE' in properties:
+        event['is_recurring'] = True
+        event['recurrence_pattern'] = rrule_to_pattern(properties['RRULE'][1], start)
+    return event
+
+
+def parse_ics(lines):
+    """Yield (line_number, event dict or exception) for each VEVENT in an .ics stream.
+
+    Overrides of individual occurrences (VEVENTs with RECURRENCE-ID) are
+    skipped because the pattern model cannot represent them.
+    """
+    properties = None
+    depth = 0
+    start_line = 0
+
+    for line_number, line in enumerate(_unfold(lines), start=1):
+        parsed = _split_property(line)
+        if not parsed:
+            continue
+        name, params, value = parsed
+
+        if name == 'BEGIN':
+            if value.upper() == 'VEVENT' and properties is None:
+                properties, depth, start_line = {}, 0, line_number
+            elif properties is not None:
+                depth += 1
+        elif name == 'END' and properties is not None:
+            if depth:
+                depth -= 1
+            elif value.upper() == 'VEVENT':
+                if 'RECURRENCE-ID' not in properties:
+                    try:
+                        yield start_line, _vevent_to_event(properties)
+                    except ValueError as e:
+                        yield start_line, e
+                properties = None
+        elif properties is not None and not depth and name not in properties:
+            properties[name] = (params, value)
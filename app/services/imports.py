@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""Background import of large calendar files.
+
+Uploads (NDJSON, JSON, CSV or iCalendar) are stored on disk and processed by a small thread pool. Each file
+is read as a stream and inserted in chunks of ``IMPORT_CHUNK_SIZE`` rows,
+one transaction per chunk, through the same bulk creation path as
+``POST /api/events/batch``. JSON arrays are parsed element by element, so
+they are never loaded whole either.
+
+Every chunk also commits the job's progress and a heartbeat. A job whose
+heartbeat is older than ``HEARTBEAT_TIMEOUT`` belongs to a stopped process:
+``resume_import_jobs`` queues such jobs and pending ones on startup, and a
+job is resumed after the rows of its last committed chunk. Jobs are claimed
+with a conditional update, so two processes never run the same job.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+import csv
+import json
+import os
+import threading
+import uuid
+
+from flask import current_app
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import and_, or_, select, update
+
+from app import db
+from app.models.import_job import ImportJob, ImportStatus
+from app.services.bulk import bulk_create_events
+from app.services.ical import parse_ics
+from app.services.occurrence_index import index_events
+from app.services.permission_cache import invalidate_event_permissions
+from app.services.search import update_search_index
+from app.utils.validators import EventSchema
+
+SUPPORTED_FORMATS = ('ndjson', 'json', 'csv', 'ics')
+MAX_STORED_ERRORS = 100
+JSON_READ_SIZE = 1 << 16
+HEARTBEAT_TIMEOUT = timedelta(minutes=2)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def import_folder(app=None):
+    app = app or current_app
+    return app.config.get('IMPORT_FOLDER') or os.path.join(app.instance_path, 'imports')
+
+
+def detect_format(filename, requested=None):
+    """Return the import format from an explicit value or the file extension."""
+    if requested:
+        return requested.lower()
+    extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    return {'jsonl': 'ndjson', 'ical': 'ics', 'ifb': 'ics'}.get(extension, extension)
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['IMPORT_WORKERS'],
+                                           thread_name_prefix='event-import')
+        return _executor
+
+
+def create_import_job(user_id, upload, requested_format=None):
+    """Store an uploaded file, record the job and queue it for processing."""
+    app = current_app._get_current_object()
+    file_format = detect_format(upload.filename, requested_format)
+    if file_format not in SUPPORTED_FORMATS:
+        raise ValueError(f'Unsupported import format: {file_format or "unknown"}')
+
+    folder = import_folder(app)
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f'{uuid.uuid4().hex}.{file_format}')
+    upload.save(path)
+
+    job = ImportJob(user_id=user_id, filename=upload.filename or 'upload', format=file_format, path=path)
+    db.session.add(job)
+    db.session.commit()
+
+    _get_executor(app).submit(run_import_job, app, job.id)
+    return job
+
+
+class _JsonArrayReader:
+    """Read the elements of a JSON array from a text stream one at a time."""
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    def _fill(self):
+        """Append the next block of the stream, dropping what has been consumed."""
+        block = self.handle.read(JSON_READ_SIZE)
+        self.buffer = self.buffer[self.position:] + block
+        self.position = 0
+        self.exhausted = not block
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or '' at the end."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\r\n':
+                self.position += 1
+            if self.position < len(self.buffer) or self.exhausted:
+                return self.buffer[self.position:self.position + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Invalid JSON: expected {char!r} at offset {self.position}')
+        self.position += 1
+
+    def value(self):
+        """Decode the next JSON value, reading more of the stream until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A number that ends the buffer may continue in the next block.
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._fill()
+
+    def elements(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() != ',':
+                self.expect(']')
+                return
+            self.position += 1
+
+
+def _read_json(handle):
+    """Yield the events of a JSON array, or of the ``events`` array of an object."""
+    reader = _JsonArrayReader(handle)
+    if reader.peek() != '{':
+        yield from reader.elements()
+        return
+
+    reader.expect('{')
+    while reader.peek() != '}':
+        key = reader.value()
+        reader.expect(':')
+        if key == 'events':
+            yield from reader.elements()
+            return
+        reader.value()
+        if reader.peek() == ',':
+            reader.position += 1
+
+
+def _read_rows(path, file_format):
+    """Yield (line_number, raw_row) pairs from an uploaded file."""
+    if file_format == 'ndjson':
+        with open(path, encoding='utf-8') as handle:
+            for line_number, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield line_number, line
+    elif file_format == 'ics':
+        with open(path, encoding='utf-8') as handle:
+            yield from parse_ics(handle)
+    elif file_format == 'csv':
+        with open(path, encoding='utf-8', newline='') as handle:
+            for line_number, row in enumerate(csv.DictReader(handle), start=2):
+                yield line_number, row
+    else:
+        with open(path, encoding='utf-8') as handle:
+            for position, row in enumerate(_read_json(handle), start=1):
+                yield position, row
+
+
+def _clean_row(raw, fields):
+    """Turn a raw row into input for EventSchema, dropping export-only columns."""
+    # Readers report rows they could not parse as exceptions.
+    if isinstance(raw, Exception):
+        raise raw
+    if isinstance(raw, str):
+        raw = json.loads(raw)
+    if not isinstance(raw, dict):
+        raise ValueError('Expected an object')
+
+    row = {key: value for key, value in raw.items() if key in fields and value not in ('', None)}
+    pattern = row.get('recurrence_pattern')
+    if isinstance(pattern, str):
+        pattern = json.loads(pattern)
+    if isinstance(pattern, dict):
+        row['recurrence_pattern'] = {key: value for key, value in pattern.items()
+                                     if key != 'id' and value is not None}
+    return row
+
+
+def _flush_chunk(job, rows):
+    """Insert one chunk of validated rows and record progress in the same transaction."""
+    created = bulk_create_events(rows, job.user_id) if rows else []
+    index_events(created)
+    update_search_index(created)
+    job.created_events += len(created)
+    job.heartbeat_at = datetime.utcnow()
+    created_ids = [event.id for event in created]
+    db.session.commit()
+    invalidate_event_permissions(created_ids)
+
+
+def _claimable(now):
+    """Jobs nobody is working on: pending ones and running ones whose heartbeat stopped."""
+    stale = now - HEARTBEAT_TIMEOUT
+    return or_(
+        ImportJob.status == ImportStatus.PENDING,
+        and_(ImportJob.status == ImportStatus.RUNNING,
+             or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < stale))
+    )
+
+
+def _claim(app, job_id):
+    """Mark a job as running by this worker; returns False if it is done or another worker holds it.
+
+    A job held by another worker is checked again once its heartbeat could
+    have gone stale, in case that worker's process stopped.
+    """
+    now = datetime.utcnow()
+    claimed = db.session.execute(
+        update(ImportJob).where(ImportJob.id == job_id, _claimable(now)).values(
+            status=ImportStatus.RUNNING, heartbeat_at=now
+        ),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    if claimed:
+        return True
+
+    job = db.session.get(ImportJob, job_id)
+    if job and job.status == ImportStatus.RUNNING:
+        delay = (job.heartbeat_at + HEARTBEAT_TIMEOUT - now).total_seconds() + 1
+        timer = threading.Timer(max(delay, 1), lambda: _get_executor(app).submit(run_import_job, app, job_id))
+        timer.daemon = True
+        timer.start()
+    return False
+
+
+def resume_import_jobs(app):
+    """Queue the jobs a stopped process left pending or running; returns their ids."""
+    job_ids = db.session.scalars(
+        select(ImportJob.id).where(_claimable(datetime.utcnow())).order_by(ImportJob.id)
+    ).all()
+    for job_id in job_ids:
+        _get_executor(app).submit(run_import_job, app, job_id)
+    return job_ids
+
+
+def run_import_job(app, job_id):
+    """Process an import job; runs on the import thread pool.
+
+    A job that already committed some chunks skips the rows they covered.
+    """
+    with app.app_context():
+        if not _claim(app, job_id):
+            return
+
+        job = db.session.get(ImportJob, job_id)
+        path = job.path
+        job.started_at = job.started_at or datetime.utcnow()
+        db.session.commit()
+
+        schema = EventSchema()
+        fields = set(schema.fields)
+        chunk_size = app.config['IMPORT_CHUNK_SIZE']
+        errors = job.get_errors()
+        rows = []
+
+        try:
+            for line_number, raw in islice(_read_rows(path, job.format), job.processed_rows or 0, None):
+                job.processed_rows += 1
+                try:
+                    rows.append(schema.load(_clean_row(raw, fields)))
+                except (MarshmallowValidationError, ValueError) as e:
+                    job.failed_rows += 1
+                    if len(errors) < MAX_STORED_ERRORS:
+                        errors.append({'row': line_number, 'error': str(e)})
+
+                # Commit by rows read rather than rows kept, so progress and the heartbeat advance on bad input too.
+                if job.processed_rows % chunk_size == 0:
+                    job.errors = json.dumps(errors)
+                    _flush_chunk(job, rows)
+                    rows = []
+
+            job.errors = json.dumps(errors)
+            _flush_chunk(job, rows)
+
+            job.status = ImportStatus.COMPLETED
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ImportJob, job_id)
+            job.status = ImportStatus.FAILED
+            job.message = str(e)
+            app.logger.exception('Import job %s failed', job_id)
+        finally:
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Maintain the materialized occurrence index.
+
+Every event has at least one row in ``event_occurrences``; recurring series
+are materialized from their first occurrence up to a rolling horizon of
+``OCCURRENCE_HORIZON_DAYS`` days from now, and an event that starts after the
+horizon keeps its first occurrence. Writes reindex the affected event
+inside the caller's transaction, and a background worker periodically
+extends open-ended series so the horizon keeps rolling forward.
+"""
+from datetime import datetime, timedelta
+from itertools import islice
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.models.event import Event, RecurrencePattern
+from app.models.occurrence import EventOccurrence
+from app.services.access import accessible_event_ids
+from app.services.recurrence import Occurrence, Series, expand_events
+
+
+def horizon_end(now=None):
+    """Return the instant up to which recurring series are materialized."""
+    now = now or datetime.utcnow()
+    return now + timedelta(days=current_app.config['OCCURRENCE_HORIZON_DAYS'])
+
+
+def indexed_until(now=None):
+    """Return the instant up to which the index is guaranteed to be complete.
+
+    The worker extends the horizon every ``OCCURRENCE_INDEX_INTERVAL``
+    seconds, so the guaranteed coverage trails the target horizon by one
+    interval.
+    """
+    return horizon_end(now) - timedelta(seconds=current_app.config['OCCURRENCE_INDEX_INTERVAL'])
+
+
+def _rows(occurrences):
+    return [{
+        'event_id': occurrence.event_id,
+        'occurrence_index': occurrence.index,
+        'start_time': occurrence.start,
+        'end_time': occurrence.end
+    } for occurrence in occurrences]
+
+
+def _initial_occurrences(series, until):
+    """Return the occurrences up to ``until``, or the first one if the series starts after it."""
+    occurrences = list(series.occurrences(None, until))
+    return occurrences or list(islice(series.occurrences(), 1))
+
+
+def index_events(events, until=None):
+    """Rebuild the index rows for the given events within the current transaction."""
+    events = list(events)
+    if not events:
+        return
+
+    until = until or horizon_end()
+    db.session.execute(
+        delete(EventOccurrence).where(EventOccurrence.event_id.in_([event.id for event in events]))
+    )
+
+    rows = []
+    for event in events:
+        rows.extend(_rows(_initial_occurrences(Series.from_event(event), until)))
+
+    if rows:
+        db.session.execute(insert(EventOccurrence), rows)
+
+
+def index_event(event, until=None):
+    """Rebuild the index rows for a single event within the current transaction."""
+    index_events([event], until)
+
+
+def remove_event(event_id):
+    """Drop the index rows of an event that is about to be deleted."""
+    remove_events([event_id])
+
+
+def remove_events(event_ids):
+    """Drop the index rows of several events that are about to be deleted."""
+    db.session.execute(delete(EventOccurrence).where(EventOccurrence.event_id.in_(list(event_ids))))
+
+
+def occurrences_for_user(user_id, start, end, exclude_event_ids=()):
+    """Return the occurrences of every event ``user_id`` can access that overlap [start, end].
+
+    Reads the index when the window is inside the materialized horizon and
+    falls back to expanding the series otherwise.
+    """
+    if end <= indexed_until():
+        query = db.session.query(
+            EventOccurrence.event_id, EventOccurrence.occurrence_index,
+            EventOccurrence.start_time, EventOccurrence.end_time
+        ).filter(
+            EventOccurrence.event_id.in_(accessible_event_ids(user_id)),
+            EventOccurrence.start_time <= end,
+            EventOccurrence.end_time >= start
+        )
+        if exclude_event_ids:
+            query = query.filter(EventOccurrence.event_id.notin_(list(exclude_event_ids)))
+        return [Occurrence(*row) for row in query]
+
+    query = Event.query.options(selectinload(Event.recurrence_pattern)).filter(
+        Event.id.in_(accessible_event_ids(user_id)),
+        Event.start_time <= end,
+        or_(Event.end_time >= start, Event.is_recurring.is_(True))
+    )
+    if exclude_event_ids:
+        query = query.filter(Event.id.notin_(list(exclude_event_ids)))
+    return list(expand_events(query.all(), start, end))
+
+
+def extend_horizon(until=None, batch_size=None):
+    """Materialize missing occurrences up to ``until`` in bounded transactions.
+
+    Covers events that have never been indexed (e.g. rows created before the
+    index existed) and open-ended series whose last materialized occurrence
+    is before ``until``. Returns the number of rows inserted.
+    """
+    until = until or horizon_end()
+    batch_size = batch_size or current_app.config['OCCURRENCE_INDEX_BATCH_SIZE']
+
+    last = select(
+        EventOccurrence.event_id,
+        func.max(EventOccurrence.occurrence_index).label('last_index'),
+        func.max(EventOccurrence.start_time).label('last_start')
+    ).group_by(EventOccurrence.event_id).subquery()
+
+    candidates = select(Event.id, last.c.last_index, last.c.last_start).outerjoin(
+        last, last.c.event_id == Event.id
+    ).outerjoin(
+        RecurrencePattern, RecurrencePattern.event_id == Event.id
+    ).where(or_(
+        last.c.event_id.is_(None),
+        and_(
+            Event.is_recurring.is_(True),
+            last.c.last_start < until,
+            or_(RecurrencePattern.end_date.is_(None), RecurrencePattern.end_date > last.c.last_start),
+            or_(RecurrencePattern.count.is_(None), RecurrencePattern.count > last.c.last_index + 1)
+        )
+    )).order_by(Event.id)
+
+    pending = db.session.execute(candidates).all()
+    inserted = 0
+
+    for offset in range(0, len(pending), batch_size):
+        chunk = pending[offset:offset + batch_size]
+        progress = {row.id: row for row in chunk}
+        events = Event.query.options(selectinload(Event.recurrence_pattern)).filter(
+            Event.id.in_(progress)
+        ).all()
+
+        rows = []
+        for event in events:
+            state = progress[event.id]
+            series = Series.from_event(event)
+            if state.last_start is None:
+                rows.extend(_rows(_initial_occurrences(series, until)))
+            else:
+                rows.extend(_rows(
+                    occurrence for occurrence in series.occurrences(state.last_start, until)
+                    if occurrence.index > state.last_index
+                ))
+
+        if rows:
+            db.session.execute(insert(EventOccurrence), rows)
+        db.session.commit()
+        inserted += len(rows)
+
+    return inserted
+
+
+def start_horizon_worker(app):
+    """Start a daemon thread that keeps extending the occurrence horizon."""
+    interval = app.config['OCCURRENCE_INDEX_INTERVAL']
+
+    def run():
+        while True:
+            with app.app_context():
+                try:
+                    extend_horizon()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Extending the occurrence horizon failed')
+                finally:
+                    db.session.remove()
+            time.sleep(interval)
+
+    worker = threading.Thread(target=run, name='occurrence-horizon', daemon=True)
+    worker.start()
+    return worker
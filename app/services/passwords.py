@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""bcrypt hashing on a dedicated, bounded thread pool.
+
+bcrypt is deliberately slow, so running it directly in request threads lets
+a burst of logins or registrations occupy every worker. Hashes are computed
+on a pool of ``BCRYPT_WORKERS`` threads (bcrypt releases the GIL while it
+works) and at most ``BCRYPT_MAX_PENDING`` calls may be queued or running;
+beyond that callers get ``HasherBusyError`` straight away instead of
+waiting behind the queue.
+
+The cost factor comes from ``BCRYPT_ROUNDS``. Hashes made at another cost
+still verify, and ``needs_rehash`` tells the login route to upgrade them.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import threading
+
+import bcrypt
+from flask import current_app
+
+from app.utils.errors import ServiceUnavailableError
+
+EXTENSION_KEY = 'password_hasher'
+
+
+class HasherBusyError(ServiceUnavailableError):
+    """Raised when the password hashing queue is full."""
+    def __init__(self, message="Too many authentication requests, please retry shortly", payload=None):
+        super().__init__(message, payload=payload)
+
+
+class PasswordHasher:
+    """Run bcrypt calls on a thread pool with a cap on queued work."""
+
+    def __init__(self, rounds=12, workers=4, max_pending=32, timeout=30):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusyError()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HasherBusyError()
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def verify(self, password, password_hash):
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different cost than the configured one."""
+        return hash_rounds(password_hash) != self.rounds
+
+
+def hash_rounds(password_hash):
+    """Return the cost factor of a modular-crypt bcrypt hash ($2b$12$...)."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def get_password_hasher():
+    hasher = current_app.extensions.get(EXTENSION_KEY)
+    if hasher is None:
+        config = current_app.config
+        hasher = current_app.extensions.setdefault(EXTENSION_KEY, PasswordHasher(
+            rounds=config['BCRYPT_ROUNDS'],
+            workers=config['BCRYPT_WORKERS'],
+            max_pending=config['BCRYPT_MAX_PENDING'],
+            timeout=config['BCRYPT_TIMEOUT']
+        ))
+    return hasher
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Resolve (user, event) permissions through a two-level cache.
+
+The first level is a bounded in-process LRU whose entries hold the resolved
+role (or the absence of one) for ``PERMISSION_CACHE_TTL`` seconds. Misses
+fall through to the shared cache, which every worker process reads, and
+only then to the database. Routes that change ACLs invalidate the event's
+shared generation after committing; the broadcast that goes with it clears
+the LRU of every worker, so the TTL only bounds staleness when a
+notification is lost.
+"""
+from collections import OrderedDict, namedtuple
+import threading
+import time
+
+from flask import current_app
+
+from app.models.permission import RoleType
+from app.services.access import resolve_role
+from app.services.shared_cache import get_shared_cache, init_shared_cache
+
+EXTENSION_KEY = 'permission_cache'
+SHARED_NAMESPACE = 'acl'
+_MISSING = object()
+
+
+class ResolvedPermission(namedtuple('ResolvedPermission', ['event_id', 'user_id', 'role'])):
+    """Detached view of a Permission row that is safe to share between requests."""
+    __slots__ = ()
+
+    def can_edit(self):
+        return self.role in (RoleType.OWNER, RoleType.EDITOR)
+
+    def can_view(self):
+        return True
+
+    def can_delete(self):
+        return self.role == RoleType.OWNER
+
+    def can_share(self):
+        return self.role == RoleType.OWNER
+
+
+class PermissionCache:
+    """Thread-safe LRU of (user_id, event_id) -> RoleType or None with per-entry expiry."""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._by_event = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, role = entry
+            if expires < time.monotonic():
+                self._discard(key)
+                return _MISSING
+            self._entries.move_to_end(key)
+            return role
+
+    def set(self, key, role):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, role)
+            self._entries.move_to_end(key)
+            self._by_event.setdefault(key[1], set()).add(key)
+            while len(self._entries) > self.maxsize:
+                oldest, _ = self._entries.popitem(last=False)
+                self._unlink(oldest)
+
+    def invalidate(self, user_id, event_id):
+        with self._lock:
+            self._discard((user_id, event_id))
+
+    def invalidate_event(self, event_id):
+        with self._lock:
+            for key in list(self._by_event.get(event_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_event.clear()
+
+    def _discard(self, key):
+        if self._entries.pop(key, None) is not None:
+            self._unlink(key)
+
+    def _unlink(self, key):
+        keys = self._by_event.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_event[key[1]]
+
+
+def init_permission_cache(app):
+    """Create the worker-local cache and subscribe it to ACL invalidations from other workers."""
+    cache = PermissionCache(maxsize=app.config['PERMISSION_CACHE_SIZE'],
+                            ttl=app.config['PERMISSION_CACHE_TTL'])
+    app.extensions[EXTENSION_KEY] = cache
+
+    shared = app.extensions.get('shared_cache') or init_shared_cache(app)
+
+    def on_invalidate(namespace, scopes):
+        if namespace == SHARED_NAMESPACE:
+            for event_id in scopes:
+                cache.invalidate_event(int(event_id))
+
+    shared.listen(on_invalidate)
+    return cache
+
+
+def get_permission_cache():
+    cache = current_app.extensions.get(EXTENSION_KEY)
+    if cache is None:
+        cache = init_permission_cache(current_app)
+    return cache
+
+
+def _key(user_id, event_id):
+    return int(user_id), int(event_id)
+
+
+def resolve_permission(user_id, event_id):
+    """Return a ResolvedPermission for the user on the event, or None if they have no access."""
+    if user_id is None or event_id is None:
+        return None
+
+    key = _key(user_id, event_id)
+    cache = get_permission_cache()
+
+    role = cache.get(key)
+    if role is _MISSING:
+        role = _load_shared(*key)
+        cache.set(key, role)
+
+    return ResolvedPermission(key[1], key[0], role) if role is not None else None
+
+
+def _load_shared(user_id, event_id):
+    """Read a role from the shared cache, falling back to the database."""
+    shared = get_shared_cache()
+    hit, value = shared.get(SHARED_NAMESPACE, event_id, user_id)
+    if hit:
+        return RoleType(value) if value is not None else None
+
+    role = resolve_role(user_id, event_id)
+    shared.set(SHARED_NAMESPACE, event_id, user_id, value, role.value if role is not None else None)
+    return role
+
+
+def invalidate_permission(user_id, event_id):
+    """Forget the cached permission of one user on one event in every worker."""
+    user_id, event_id = _key(user_id, event_id)
+    get_permission_cache().invalidate(user_id, event_id)
+    get_shared_cache().invalidate(SHARED_NAMESPACE, [event_id])
+
+
+def invalidate_event_permissions(event_ids):
+    """Forget every cached permission on the given events in every worker."""
+    event_ids = [int(event_id) for event_id in event_ids]
+    cache = get_permission_cache()
+    for event_id in event_ids:
+        cache.invalidate_event(event_id)
+    get_shared_cache().invalidate(SHARED_NAMESPACE, event_ids)
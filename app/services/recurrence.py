@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Expand recurrence patterns into concrete occurrences.
+
+Occurrences are produced lazily and each series jumps straight to the first
+period that can touch the requested window, so expanding a long-running
+series costs the same as expanding a new one.
+"""
+from calendar import monthrange
+from collections import namedtuple
+from datetime import datetime, timedelta
+import heapq
+
+from app.models.event import RecurrenceType
+
+
+Occurrence = namedtuple('Occurrence', ['event_id', 'index', 'start', 'end'])
+
+WEEKDAY_NAMES = {
+    'mo': 0, 'tu': 1, 'we': 2, 'th': 3, 'fr': 4, 'sa': 5, 'su': 6
+}
+
+_FULL_NAMES = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+
+def parse_days_of_week(value):
+    """Parse a days_of_week string ("0,2,4", "MO,WE,FR", "mon,thu") into sorted weekday ints.
+
+    Names may be abbreviated to any prefix of at least two letters; anything
+    else raises ValueError.
+    """
+    if not value:
+        return []
+
+    days = set()
+    for token in value.replace(';', ',').split(','):
+        token = token.strip().lower()
+        if not token:
+            continue
+        if token.isdigit():
+            day = int(token)
+            if day > 6:
+                raise ValueError(f'Invalid day of week: {token}')
+            days.add(day)
+        elif token[:2] in WEEKDAY_NAMES and _FULL_NAMES[WEEKDAY_NAMES[token[:2]]].startswith(token):
+            days.add(WEEKDAY_NAMES[token[:2]])
+        else:
+            raise ValueError(f'Invalid day of week: {token}')
+
+    return sorted(days)
+
+
+def _ceil_div(numerator, denominator):
+    """Ceiling division that works for ints and timedeltas."""
+    return -((-numerator) // denominator)
+
+
+def _at(day, time_source):
+    """Combine a date with the time of day of ``time_source``."""
+    return datetime.combine(day, time_source.time())
+
+
+def _clamped(year, month, day, time_source):
+    """Build a datetime, clamping ``day`` to the last day of the month."""
+    return datetime(year, month, min(day, monthrange(year, month)[1]),
+                    time_source.hour, time_source.minute, time_source.second,
+                    time_source.microsecond)
+
+
+class Series:
+    """A single event series that can be expanded over a time window.
+
+    Monthly and yearly patterns clamp days that do not exist in a month
+    (e.g. the 31st) to the last day of that month, which keeps occurrence
+    indexes a pure function of the period number.
+    """
+
+    __slots__ = ('event_id', 'start', 'duration', 'type', 'interval', 'days',
+                 'day_of_month', 'month_of_year', 'until', 'count')
+
+    def __init__(self, event_id, start, end, pattern=None):
+        self.event_id = event_id
+        self.start = start
+        self.duration = end - start
+        self.type = pattern.type if pattern else None
+        self.interval = max(pattern.interval or 1, 1) if pattern else 1
+        self.days = parse_days_of_week(pattern.days_of_week) if pattern else []
+        self.day_of_month = pattern.day_of_month if pattern else None
+        self.month_of_year = pattern.month_of_year if pattern else None
+        self.until = pattern.end_date if pattern else None
+        self.count = pattern.count if pattern else None
+
+    @classmethod
+    def from_event(cls, event):
+        pattern = event.recurrence_pattern if event.is_recurring else None
+        return cls(event.id, event.start_time, event.end_time, pattern)
+
+    def occurrences(self, window_start=None, window_end=None):
+        """Yield occurrences overlapping [window_start, window_end] in start order."""
+        if self.type == RecurrenceType.DAILY:
+            candidates = self._daily(window_start)
+        elif self.type == RecurrenceType.WEEKLY:
+            candidates = self._weekly(window_start)
+        elif self.type == RecurrenceType.MONTHLY:
+            candidates = self._monthly(window_start)
+        elif self.type == RecurrenceType.YEARLY:
+            candidates = self._yearly(window_start)
+        else:
+            candidates = iter([(0, self.start)])
+
+        for index, start in candidates:
+            if self.count is not None and index >= self.count:
+                return
+            if self.until is not None and start > self.until:
+                return
+            if window_end is not None and start > window_end:
+                return
+            end = start + self.duration
+            if window_start is not None and end < window_start:
+                continue
+            yield Occurrence(self.event_id, index, start, end)
+
+    def _daily(self, window_start):
+        step = timedelta(days=self.interval)
+        index = 0
+        if window_start is not None:
+            index = max(0, _ceil_div(window_start - self.duration - self.start, step))
+        while True:
+            yield index, self.start + index * step
+            index += 1
+
+    def _weekly(self, window_start):
+        days = self.days or [self.start.weekday()]
+        anchor = self.start.date() - timedelta(days=self.start.weekday())
+        first_period = [day for day in days if day >= self.start.weekday()]
+        period_length = timedelta(weeks=self.interval)
+
+        period = 0
+        if window_start is not None:
+            offset = window_start - self.duration - _at(anchor, self.start)
+            period = max(0, offset // period_length)
+
+        # Occurrences in earlier periods: the partial first period plus full ones.
+        index = 0 if period == 0 else len(first_period) + (period - 1) * len(days)
+
+        while True:
+            week_start = anchor + period * period_length
+            for day in (first_period if period == 0 else days):
+                yield index, _at(week_start + timedelta(days=day), self.start)
+                index += 1
+            period += 1
+
+    def _monthly(self, window_start):
+        day = self.day_of_month or self.start.day
+        base = self.start.year * 12 + self.start.month - 1
+
+        def nth(period):
+            year, month = divmod(base + period * self.interval, 12)
+            return _clamped(year, month + 1, day, self.start)
+
+        # A day_of_month earlier than the start day puts period 0 before the series start.
+        first = 0 if nth(0) >= self.start else 1
+
+        period = first
+        if window_start is not None:
+            target = window_start - self.duration
+            months = (target.year * 12 + target.month - 1) - base
+            period = max(first, months // self.interval - 1)
+
+        while True:
+            yield period - first, nth(period)
+            period += 1
+
+    def _yearly(self, window_start):
+        month = self.month_of_year or self.start.month
+        day = self.day_of_month or self.start.day
+
+        def nth(period):
+            return _clamped(self.start.year + period * self.interval, month, day, self.start)
+
+        first = 0 if nth(0) >= self.start else 1
+
+        period = first
+        if window_start is not None:
+            target = window_start - self.duration
+            period = max(first, (target.year - self.start.year) // self.interval - 1)
+
+        while True:
+            yield period - first, nth(period)
+            period += 1
+
+
+def expand_event(event, window_start=None, window_end=None):
+    """Lazily yield the occurrences of a single event within a window."""
+    return Series.from_event(event).occurrences(window_start, window_end)
+
+
+def expand_events(events, window_start, window_end):
+    """Lazily yield the occurrences of many events within a window, ordered by start.
+
+    Each series is skipped forward to the window independently and the
+    per-series streams are merged, so the cost is proportional to the number
+    of occurrences produced rather than the age of the series.
+    """
+    streams = [Series.from_event(event).occurrences(window_start, window_end) for event in events]
+    return heapq.merge(*streams, key=lambda occurrence: (occurrence.start, occurrence.event_id))
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Retention policy for event versions and the compactor that enforces it.
+
+Per event, the newest ``VERSION_RETAIN_LAST`` versions are kept. Beyond
+those, the last version of each day is kept for ``VERSION_RETAIN_DAILY_DAYS``
+days, then the last version of each ISO week for ``VERSION_RETAIN_WEEKLY_WEEKS``
+weeks. Anything older is removed. Versions older than
+``VERSION_MAX_AGE_DAYS`` are removed even when the rules above would keep
+them, except for the newest keyframe and the deltas after it. That chain is
+what concurrent edits extend, so the compactor never touches it.
+
+Changelog entries that refer to a removed version are replaced by one
+squashed entry between the two retained versions on either side.
+
+The compactor works through the events in batches of
+``VERSION_COMPACTION_BATCH_SIZE``, one short transaction per batch. It only
+reads version metadata for events with nothing to remove.
+"""
+from datetime import datetime, timedelta
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, or_, select
+
+from app import db
+from app.models.version import ChangeLog, ChangeLogOutbox, EventVersion
+from app.services.version_diff import diff_states, pack_changes
+from app.services.version_store import decode_chain, drop_versions
+
+
+class RetentionPolicy:
+    """Decide which versions of an event to keep."""
+
+    def __init__(self, keep_last=100, daily_days=30, weekly_weeks=52, max_age_days=None):
+        self.keep_last = keep_last
+        self.daily = timedelta(days=daily_days)
+        self.weekly = timedelta(weeks=weekly_weeks)
+        self.max_age = timedelta(days=max_age_days) if max_age_days else None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            keep_last=config['VERSION_RETAIN_LAST'],
+            daily_days=config['VERSION_RETAIN_DAILY_DAYS'],
+            weekly_weeks=config['VERSION_RETAIN_WEEKLY_WEEKS'],
+            max_age_days=config['VERSION_MAX_AGE_DAYS']
+        )
+
+    def candidates(self, now):
+        """Condition on a per-event GROUP BY that holds for every event with something to remove."""
+        condition = func.count(EventVersion.id) > self.keep_last
+        if self.max_age:
+            condition = or_(condition, func.min(EventVersion.created_at) < now - self.max_age)
+        return condition
+
+    def dropped(self, versions, now):
+        """Return the version numbers to remove from ``versions``.
+
+        ``versions`` are (version_number, created_at, is_keyframe) tuples of
+        one event.
+        """
+        keyframes = [number for number, _, is_keyframe in versions if is_keyframe]
+        protected = max(keyframes) if keyframes else min(number for number, _, _ in versions)
+
+        dropped = set()
+        checkpoints = set()
+        ordered = sorted(versions, key=lambda version: version[0], reverse=True)
+        for position, (number, created_at, _) in enumerate(ordered):
+            age = now - (created_at or now)
+            if age <= self.daily:
+                bucket = created_at.date() if created_at else None
+            elif age <= self.weekly:
+                bucket = created_at.isocalendar()[:2]
+            else:
+                bucket = None
+
+            if number >= protected:
+                checkpoints.add(bucket)
+            elif self.max_age and age > self.max_age:
+                dropped.add(number)
+            elif position < self.keep_last:
+                checkpoints.add(bucket)
+            elif bucket is None or bucket in checkpoints:
+                dropped.add(number)
+            else:
+                checkpoints.add(bucket)
+        return dropped
+
+
+def _squash_changelog(event_id, rows, dropped):
+    """Replace the changelog entries that refer to dropped versions of one event."""
+    db.session.execute(delete(ChangeLog).where(
+        ChangeLog.event_id == event_id,
+        or_(ChangeLog.from_version.in_(dropped), ChangeLog.to_version.in_(dropped))
+    ), execution_options={'synchronize_session': False})
+    db.session.execute(delete(ChangeLogOutbox).where(
+        ChangeLogOutbox.event_id == event_id,
+        ChangeLogOutbox.from_version.in_(dropped)
+    ), execution_options={'synchronize_session': False})
+
+    entries = []
+    start = last_dropped = None
+    for row in rows:
+        if row.version_number in dropped:
+            last_dropped = row
+            continue
+        if start is not None and last_dropped is not None:
+            entries.append({
+                'event_id': event_id,
+                'from_version': start.version_number,
+                'to_version': row.version_number,
+                'diff_text': '',
+                'changes': pack_changes(diff_states(start.get_data_dict(), row.get_data_dict())),
+                'timestamp': last_dropped.created_at,
+                'user_id': last_dropped.created_by
+            })
+        start, last_dropped = row, None
+    if entries:
+        db.session.execute(insert(ChangeLog), entries)
+    return len(entries)
+
+
+def compact_versions(policy=None, batch_size=None, now=None, pause=0.05, log=None):
+    """Apply the retention policy to every event; returns (versions removed, changelog entries squashed)."""
+    config = current_app.config
+    policy = policy or RetentionPolicy.from_config(config)
+    batch_size = batch_size or config['VERSION_COMPACTION_BATCH_SIZE']
+    interval = config['VERSION_KEYFRAME_INTERVAL']
+    now = now or datetime.utcnow()
+
+    last_id = 0
+    removed = squashed = 0
+    while True:
+        event_ids = db.session.scalars(
+            select(EventVersion.event_id).where(EventVersion.event_id > last_id)
+            .group_by(EventVersion.event_id).having(policy.candidates(now))
+            .order_by(EventVersion.event_id).limit(batch_size)
+        ).all()
+        if not event_ids:
+            return removed, squashed
+
+        metadata = {}
+        for row in db.session.execute(
+            select(EventVersion.event_id, EventVersion.version_number, EventVersion.created_at,
+                   EventVersion.keyframe_version.is_(None))
+            .where(EventVersion.event_id.in_(event_ids))
+        ):
+            metadata.setdefault(row[0], []).append(tuple(row[1:]))
+        drops = {event_id: policy.dropped(versions, now) for event_id, versions in metadata.items()}
+        drops = {event_id: dropped for event_id, dropped in drops.items() if dropped}
+
+        if drops:
+            histories = {}
+            for row in EventVersion.query.filter(EventVersion.event_id.in_(list(drops))).order_by(
+                EventVersion.event_id, EventVersion.version_number
+            ):
+                histories.setdefault(row.event_id, []).append(row)
+
+            for event_id, rows in histories.items():
+                decode_chain(rows)
+                squashed += _squash_changelog(event_id, rows, drops[event_id])
+                drop_versions(rows, drops[event_id], interval)
+                removed += len(drops[event_id])
+
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = event_ids[-1]
+        if log:
+            log(f'Compacted versions up to event {last_id} ({removed} removed, {squashed} changelog entries squashed)')
+        if drops and pause:
+            time.sleep(pause)
+
+
+def start_compaction_worker(app):
+    """Start a daemon thread that compacts version histories every ``VERSION_COMPACTION_INTERVAL`` seconds."""
+    interval = app.config['VERSION_COMPACTION_INTERVAL']
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    compact_versions()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception('Compacting event versions failed')
+                finally:
+                    db.session.remove()
+
+    worker = threading.Thread(target=run, name='version-compaction', daemon=True)
+    worker.start()
+    return worker
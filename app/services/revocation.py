@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Revoked JWTs, checked on every authenticated request.
+
+Revocations are written to the ``revoked_tokens`` table and kept in memory
+in every worker as a dict of jti -> expiry, so the blocklist check is a
+single dict lookup. A worker learns about revocations made elsewhere from
+the shared cache's notifications and, in case one is missed, by reading
+rows revoked since its last sync every ``REVOCATION_SYNC_INTERVAL``
+seconds. Entries are dropped once the token would have expired anyway.
+"""
+from datetime import datetime, timedelta
+import calendar
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db, jwt
+from app.models.revoked_token import RevokedToken
+from app.services.shared_cache import get_shared_cache, init_shared_cache
+
+EXTENSION_KEY = 'token_revocations'
+SHARED_NAMESPACE = 'revoked'
+# Re-read rows revoked shortly before the last sync, to cover commits that landed out of order.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class TokenRevocations:
+    """In-memory set of revoked jtis with expiry, periodically synced from the database."""
+
+    def __init__(self, sync_interval=30):
+        self.sync_interval = sync_interval
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._next_sync = 0
+
+    def __contains__(self, jti):
+        return jti in self._tokens
+
+    def add(self, jti, expires):
+        with self._lock:
+            self._tokens[jti] = expires
+
+    def maybe_sync(self):
+        if time.monotonic() < self._next_sync or not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._sync()
+        finally:
+            self._lock.release()
+
+    def _sync(self):
+        now = datetime.utcnow()
+        query = RevokedToken.query.with_entities(RevokedToken.jti, RevokedToken.expires_at).filter(
+            RevokedToken.expires_at > now
+        )
+        if self._synced_at is not None:
+            query = query.filter(RevokedToken.revoked_at >= self._synced_at - SYNC_OVERLAP)
+
+        for jti, expires_at in query:
+            self._tokens[jti] = calendar.timegm(expires_at.utctimetuple())
+
+        cutoff = time.time()
+        for jti in [jti for jti, expires in self._tokens.items() if expires <= cutoff]:
+            del self._tokens[jti]
+
+        self._synced_at = now
+        self._next_sync = time.monotonic() + self.sync_interval
+
+
+def init_revocation(app):
+    """Create the worker's revocation set and hook it into JWT verification."""
+    revocations = TokenRevocations(sync_interval=app.config['REVOCATION_SYNC_INTERVAL'])
+    app.extensions[EXTENSION_KEY] = revocations
+
+    shared = app.extensions.get('shared_cache') or init_shared_cache(app)
+
+    def on_revoked(namespace, tokens):
+        if namespace == SHARED_NAMESPACE:
+            for jti, expires in tokens:
+                revocations.add(jti, expires)
+
+    shared.listen(on_revoked)
+    jwt.token_in_blocklist_loader(is_token_revoked)
+    return revocations
+
+
+def get_revocations():
+    revocations = current_app.extensions.get(EXTENSION_KEY)
+    if revocations is None:
+        revocations = init_revocation(current_app)
+    return revocations
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """Blocklist loader for JWTManager."""
+    revocations = get_revocations()
+    revocations.maybe_sync()
+    return jwt_payload['jti'] in revocations
+
+
+def revoke_token(jwt_payload):
+    """Revoke a decoded token in every worker until it expires."""
+    jti = jwt_payload['jti']
+    expires = jwt_payload['exp']
+    user_id = jwt_payload.get('sub')
+
+    now = datetime.utcnow()
+    RevokedToken.query.filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    db.session.add(RevokedToken(
+        jti=jti,
+        token_type=jwt_payload.get('type', 'access'),
+        user_id=int(user_id) if isinstance(user_id, str) and user_id.isdigit() else user_id,
+        expires_at=datetime.utcfromtimestamp(expires),
+        revoked_at=now
+    ))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # already revoked
+
+    get_revocations().add(jti, expires)
+    get_shared_cache().publish(SHARED_NAMESPACE, [[jti, expires]])
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Additive schema upgrades for existing databases.
+
+``db.create_all()`` creates missing tables but never alters existing ones,
+so nullable columns added to a model after its table was created are
+listed here and added with ``ALTER TABLE ... ADD COLUMN`` on startup, and
+indexes declared on a model are created if its table lacks them. Columns
+derived from existing data are filled in right after they are added.
+"""
+from sqlalchemy import inspect, text
+
+from app import db
+
+
+def _added_columns():
+    from app.models.import_job import ImportJob
+    from app.models.version import ChangeLog, EventVersion
+
+    return [
+        EventVersion.__table__.c.keyframe_version,
+        EventVersion.__table__.c.encoding,
+        EventVersion.__table__.c.payload,
+        EventVersion.__table__.c.changed_fields,
+        EventVersion.__table__.c.start_time,
+        EventVersion.__table__.c.end_time,
+        EventVersion.__table__.c.is_recurring,
+        ChangeLog.__table__.c.changes,
+        ImportJob.__table__.c.heartbeat_at,
+    ]
+
+
+def upgrade_schema(app):
+    """Add any missing columns from ``_added_columns`` and any missing model indexes."""
+    inspector = inspect(db.engine)
+    dialect = db.engine.dialect
+    changed = False
+    added = set()
+
+    for column in _added_columns():
+        table = column.table.name
+        existing = {info['name'] for info in inspector.get_columns(table)}
+        if column.name in existing:
+            continue
+        column_type = column.type.compile(dialect=dialect)
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type}'))
+        app.logger.info('Added column %s.%s', table, column.name)
+        added.add(f'{table}.{column.name}')
+        changed = True
+
+    if changed:
+        db.session.commit()
+
+    if 'event_versions.start_time' in added:
+        from app.services.version_store import fill_version_times
+        filled = fill_version_times()
+        app.logger.info('Filled snapshot times of %d event versions', filled)
+
+    for table in db.metadata.sorted_tables:
+        existing = {info['name'] for info in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                app.logger.info('Created index %s', index.name)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""Full-text search over event title, description and location.
+
+SQLite uses an FTS5 table keyed by event id, PostgreSQL a tsvector table
+with a GIN index. Other databases fall back to ``ILIKE`` filters. The
+index is updated in the caller's transaction on every event write.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import Float, Integer, or_, text
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models.event import Event
+
+EXTENSION_KEY = 'event_search'
+
+SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_search "
+    "USING fts5(title, description, location, tokenize='unicode61')",
+)
+
+POSTGRES_DDL = (
+    "CREATE TABLE IF NOT EXISTS event_search ("
+    "event_id INTEGER PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_event_search_document ON event_search USING GIN (document)",
+)
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(:title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(:location, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(:description, '')), 'C')"
+)
+
+TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def _backend():
+    return current_app.extensions.get(EXTENSION_KEY)
+
+
+def ensure_search_index(app):
+    """Create the search table for the configured database and backfill it if needed."""
+    dialect = db.engine.dialect.name
+    backend = None
+
+    try:
+        if dialect == 'sqlite':
+            statements, backend = SQLITE_DDL, 'fts5'
+        elif dialect == 'postgresql':
+            statements, backend = POSTGRES_DDL, 'tsvector'
+        else:
+            statements = ()
+
+        with db.engine.begin() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+    except OperationalError:
+        app.logger.warning('Full-text search is unavailable, falling back to LIKE filters')
+        backend = None
+
+    app.extensions[EXTENSION_KEY] = backend
+
+    if backend:
+        indexed = db.session.execute(text('SELECT count(*) FROM event_search')).scalar()
+        if indexed != Event.query.count():
+            rebuild_search_index()
+            db.session.commit()
+
+
+def _documents(events):
+    return [{
+        'id': event.id,
+        'title': event.title,
+        'description': event.description,
+        'location': event.location
+    } for event in events]
+
+
+def update_search_index(events):
+    """Refresh the search documents of the given events within the current transaction."""
+    backend = _backend()
+    documents = _documents(events)
+    if not backend or not documents:
+        return
+
+    if backend == 'fts5':
+        remove_from_search_index([document['id'] for document in documents])
+        db.session.execute(
+            text('INSERT INTO event_search (rowid, title, description, location) '
+                 'VALUES (:id, :title, :description, :location)'),
+            documents
+        )
+    else:
+        db.session.execute(
+            text(f'INSERT INTO event_search (event_id, document) VALUES (:id, {POSTGRES_DOCUMENT}) '
+                 'ON CONFLICT (event_id) DO UPDATE SET document = EXCLUDED.document'),
+            documents
+        )
+
+
+def remove_from_search_index(event_ids):
+    """Drop the search documents of the given events within the current transaction."""
+    backend = _backend()
+    if not backend or not event_ids:
+        return
+
+    key = 'rowid' if backend == 'fts5' else 'event_id'
+    db.session.execute(
+        text(f'DELETE FROM event_search WHERE {key} IN ({", ".join(str(int(i)) for i in event_ids)})')
+    )
+
+
+def rebuild_search_index(batch_size=1000):
+    """Reindex every event, e.g. after restoring a database without the search table."""
+    if not _backend():
+        return
+
+    db.session.execute(text('DELETE FROM event_search'))
+    last_id = 0
+    while True:
+        events = Event.query.filter(Event.id > last_id).order_by(Event.id).limit(batch_size).all()
+        if not events:
+            break
+        update_search_index(events)
+        last_id = events[-1].id
+
+
+def _match_query(term, backend):
+    tokens = TOKEN.findall(term.lower())
+    if not tokens:
+        return None
+    if backend == 'fts5':
+        return ' '.join(f'"{token}"*' for token in tokens)
+    return ' & '.join(f'{token}:*' for token in tokens)
+
+
+def apply_search(query, term):
+    """Restrict an Event query to rows matching ``term``.
+
+    Returns ``(query, rank)``, where ``rank`` is a column to order by
+    (lower is more relevant) or None when no full-text index is available.
+    """
+    backend = _backend()
+    match = _match_query(term, backend) if backend else None
+
+    if not match:
+        pattern = f'%{term}%'
+        return query.filter(or_(
+            Event.title.ilike(pattern),
+            Event.description.ilike(pattern),
+            Event.location.ilike(pattern)
+        )), None
+
+    if backend == 'fts5':
+        statement = text(
+            'SELECT rowid AS event_id, bm25(event_search, 10.0, 1.0, 5.0) AS rank '
+            'FROM event_search WHERE event_search MATCH :match'
+        )
+    else:
+        statement = text(
+            'SELECT event_id, -ts_rank(document, to_tsquery(\'simple\', :match)) AS rank '
+            'FROM event_search WHERE document @@ to_tsquery(\'simple\', :match)'
+        )
+
+    matches = statement.bindparams(match=match).columns(event_id=Integer, rank=Float).subquery('matches')
+    return query.join(matches, matches.c.event_id == Event.id), matches.c.rank
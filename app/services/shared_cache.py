@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Cache shared by every worker process.
+
+Values are msgpack-encoded and stored next to a per-scope generation
+number. A value is only served if it was written under the current
+generation, so invalidating a scope is a single write that atomically
+orphans every key under it, however many there are. Invalidations are also broadcast so that each
+worker can drop its own in-process caches.
+
+Every invalidation moves a scope to a generation number that has never
+been used before, taken from one store-wide sequence. Generation keys
+expire ``ttl`` seconds after their last invalidation, when every value
+written under an older generation has expired too, so a generation key
+that expires and comes back can never revive a value it orphaned.
+
+``SHARED_CACHE_URL`` selects Redis (``redis://...``); without it an
+in-memory store with the same interface is used, which is what tests and
+single-process deployments run on.
+"""
+from collections import OrderedDict
+import threading
+import time
+
+import msgpack
+from flask import current_app
+
+EXTENSION_KEY = 'shared_cache'
+KEY_PREFIX = 'neofi:'
+CHANNEL = 'neofi:invalidate'
+SEQUENCE_KEY = f'{KEY_PREFIX}gen-sequence'
+
+
+def _pack(value):
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _unpack(raw):
+    return msgpack.unpackb(raw, raw=False)
+
+
+class LocalStore:
+    """In-process stand-in for Redis with the same byte-level semantics.
+
+    At most ``maxsize`` values are kept; beyond that the least recently used
+    one is evicted. Generation keys are never evicted early, because that
+    would serve values under generation 0 again, and only leave when they
+    expire. Expired entries of both kinds are swept every ``sweep_interval``
+    seconds, so keys nobody reads again do not pile up.
+    """
+
+    def __init__(self, maxsize=10000, sweep_interval=60):
+        self.maxsize = maxsize
+        self.sweep_interval = sweep_interval
+        self._values = OrderedDict()
+        self._generations = {}
+        self._sequence = 0
+        self._next_sweep = time.monotonic() + sweep_interval
+        self._handlers = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._values) + len(self._generations)
+
+    @staticmethod
+    def _live(entries, key, now):
+        entry = entries.get(key)
+        if entry and entry[0] is not None and entry[0] < now:
+            del entries[key]
+            entry = None
+        return entry[1] if entry else None
+
+    def _sweep(self, now):
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + self.sweep_interval
+        for entries in (self._values, self._generations):
+            expired = [key for key, (expires, _) in entries.items() if expires is not None and expires < now]
+            for key in expired:
+                del entries[key]
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            values = []
+            for key in keys:
+                if key in self._generations:
+                    values.append(self._live(self._generations, key, now))
+                    continue
+                raw = self._live(self._values, key, now)
+                if raw is not None:
+                    self._values.move_to_end(key)
+                values.append(raw)
+            return values
+
+    def set(self, key, raw, ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            self._values[key] = (now + ttl if ttl else None, raw)
+            self._values.move_to_end(key)
+            while len(self._values) > self.maxsize:
+                self._values.popitem(last=False)
+
+    def new_generations(self, keys, ttl=None):
+        """Move each key to a generation number never used before, expiring after ``ttl`` seconds."""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            for key in keys:
+                self._sequence += 1
+                self._generations[key] = (now + ttl if ttl else None, str(self._sequence).encode('ascii'))
+
+    def publish(self, raw):
+        for handler in list(self._handlers):
+            handler(raw)
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+
+class RedisStore:
+    """Redis-backed store; invalidations travel over a pub/sub channel."""
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def get_many(self, keys):
+        return self.client.mget(keys)
+
+    def set(self, key, raw, ttl=None):
+        self.client.set(key, raw, ex=ttl)
+
+    def new_generations(self, keys, ttl=None):
+        """Move each key to a generation number never used before, expiring after ``ttl`` seconds."""
+        last = self.client.incrby(SEQUENCE_KEY, len(keys))
+        pipeline = self.client.pipeline(transaction=False)
+        for number, key in enumerate(keys, start=last - len(keys) + 1):
+            pipeline.set(key, number, ex=ttl)
+        pipeline.execute()
+
+    def publish(self, raw):
+        self.client.publish(CHANNEL, raw)
+
+    def subscribe(self, handler):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{CHANNEL: lambda message: handler(message['data'])})
+        return pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+
+class SharedCache:
+    """Versioned, msgpack-encoded cache on top of a store."""
+
+    def __init__(self, store, ttl=300):
+        self.store = store
+        self.ttl = ttl
+        self._listeners = []
+        store.subscribe(self._dispatch)
+
+    @staticmethod
+    def _generation_key(namespace, scope):
+        return f'{KEY_PREFIX}gen:{namespace}:{scope}'
+
+    @staticmethod
+    def _value_key(namespace, scope, key):
+        return f'{KEY_PREFIX}{namespace}:{scope}:{key}'
+
+    def get(self, namespace, scope, key):
+        """Return (hit, value_or_generation); pass the generation back to ``set`` on a miss."""
+        raw_generation, raw_value = self.store.get_many([
+            self._generation_key(namespace, scope),
+            self._value_key(namespace, scope, key)
+        ])
+        generation = int(raw_generation) if raw_generation else 0
+        if raw_value is not None:
+            stored_generation, value = _unpack(raw_value)
+            if stored_generation == generation:
+                return True, value
+        return False, generation
+
+    def set(self, namespace, scope, key, generation, value):
+        self.store.set(self._value_key(namespace, scope, key), _pack([generation, value]), self.ttl)
+
+    def invalidate(self, namespace, scopes):
+        """Orphan every value under the given scopes and notify all workers."""
+        scopes = list(scopes)
+        if not scopes:
+            return
+        self.store.new_generations([self._generation_key(namespace, scope) for scope in scopes], self.ttl)
+        self.publish(namespace, scopes)
+
+    def publish(self, namespace, scopes):
+        """Notify every worker's listeners without touching stored values."""
+        self.store.publish(_pack({'namespace': namespace, 'scopes': list(scopes)}))
+
+    def listen(self, callback):
+        """Register ``callback(namespace, scopes)`` for invalidations from any worker."""
+        self._listeners.append(callback)
+
+    def _dispatch(self, raw):
+        try:
+            message = _unpack(raw)
+            namespace, scopes = message['namespace'], message['scopes']
+        except (ValueError, KeyError, TypeError, msgpack.ExtraData):
+            return
+        for callback in list(self._listeners):
+            callback(namespace, scopes)
+
+
+def init_shared_cache(app):
+    url = app.config.get('SHARED_CACHE_URL')
+    store = RedisStore(url) if url else LocalStore(maxsize=app.config['SHARED_CACHE_SIZE'])
+    cache = SharedCache(store, ttl=app.config['SHARED_CACHE_TTL'])
+    app.extensions[EXTENSION_KEY] = cache
+    return cache
+
+
+def get_shared_cache():
+    cache = current_app.extensions.get(EXTENSION_KEY)
+    if cache is None:
+        cache = init_shared_cache(current_app)
+    return cache
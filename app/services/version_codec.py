@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Encodings for EventVersion payloads.
+
+Each row records its own encoding, so rows written under any format stay
+readable after ``VERSION_ENCODING`` changes:
+
+* ``json`` (or NULL, for rows older than this column): JSON text in ``data``.
+* ``msgpack``: msgpack bytes in ``payload``.
+* ``msgpack+zlib``: zlib-compressed msgpack in ``payload``.
+* ``msgpack+zstd``: zstd-compressed msgpack, if the ``zstandard`` package is installed.
+"""
+import json
+import time
+import zlib
+
+import msgpack
+from flask import current_app
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+JSON = 'json'
+MSGPACK = 'msgpack'
+MSGPACK_ZLIB = 'msgpack+zlib'
+MSGPACK_ZSTD = 'msgpack+zstd'
+
+
+def available_encodings():
+    encodings = [JSON, MSGPACK, MSGPACK_ZLIB]
+    if zstandard is not None:
+        encodings.append(MSGPACK_ZSTD)
+    return encodings
+
+
+def configured_encoding():
+    encoding = current_app.config['VERSION_ENCODING']
+    if encoding not in available_encodings():
+        raise ValueError(f'Unsupported VERSION_ENCODING: {encoding}')
+    return encoding
+
+
+def encode(value, encoding=None):
+    """Return the (encoding, data, payload) column values for a version payload."""
+    encoding = encoding or configured_encoding()
+    if encoding == JSON:
+        return JSON, json.dumps(value, separators=(',', ':')), None
+
+    packed = msgpack.packb(value, use_bin_type=True)
+    if encoding == MSGPACK_ZLIB:
+        packed = zlib.compress(packed)
+    elif encoding == MSGPACK_ZSTD:
+        packed = zstandard.ZstdCompressor().compress(packed)
+    return encoding, '', packed
+
+
+def decode(encoding, data, payload):
+    """Decode a payload stored under ``encoding``."""
+    if encoding is None or encoding == JSON:
+        return json.loads(data)
+    if encoding == MSGPACK_ZLIB:
+        return msgpack.unpackb(zlib.decompress(payload), raw=False)
+    if encoding == MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    if encoding == MSGPACK_ZSTD:
+        if zstandard is None:
+            raise ValueError('zstandard is required to read msgpack+zstd versions')
+        return msgpack.unpackb(zstandard.ZstdDecompressor().decompress(payload), raw=False)
+    raise ValueError(f'Unknown version encoding: {encoding}')
+
+
+def stored_size(data, payload):
+    return len((data or '').encode('utf-8')) + len(payload or b'')
+
+
+def benchmark(values, encodings=None, rounds=5):
+    """Measure size and encode/decode time of ``values`` under each encoding.
+
+    Returns {encoding: {'bytes', 'encode_us', 'decode_us'}} with per-value
+    averages; times are the best of ``rounds``.
+    """
+    values = list(values)
+    results = {}
+    if not values:
+        return results
+
+    for encoding in encodings or available_encodings():
+        encoded = [encode(value, encoding) for value in values]
+        size = sum(stored_size(data, payload) for _, data, payload in encoded)
+
+        encode_time = decode_time = float('inf')
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for value in values:
+                encode(value, encoding)
+            encode_time = min(encode_time, time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for row in encoded:
+                decode(*row)
+            decode_time = min(decode_time, time.perf_counter() - started)
+
+        results[encoding] = {
+            'bytes': size / len(values),
+            'encode_us': encode_time * 1e6 / len(values),
+            'decode_us': decode_time * 1e6 / len(values)
+        }
+    return results
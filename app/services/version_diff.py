@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Field-level diffs between event versions.
+
+A diff is a list of changes, one per field that differs between two
+snapshots::
+
+    {'field': 'title', 'op': 'changed', 'old': 'Standup', 'new': 'Daily standup'}
+    {'field': 'location', 'op': 'added', 'new': 'Room 4'}
+    {'field': 'description', 'op': 'changed', 'words': [['=', 'Bring '], ['-', 'notes'], ['+', 'slides']]}
+
+Only long text fields get a word-level diff; everything else carries its
+old and new values. Diffs are stored in this form and rendered to text or
+HTML only when a client asks for them.
+"""
+import html
+import json
+import re
+from difflib import SequenceMatcher
+
+from app import db
+from app.models.version import EventVersion
+from app.services.shared_cache import get_shared_cache
+from app.services.version_store import load_version_data
+
+# Strings at least this long are diffed word by word instead of shown whole.
+WORD_DIFF_MIN_LENGTH = 80
+
+RENDER_FORMATS = ('text', 'html', 'structured')
+
+SHARED_NAMESPACE = 'compare'
+
+_TOKENS = re.compile(r'\s+|[^\s]+')
+
+
+def _word_diff(old, new):
+    old_words, new_words = _TOKENS.findall(old), _TOKENS.findall(new)
+    segments = []
+
+    def emit(op, words):
+        if not words:
+            return
+        if segments and segments[-1][0] == op:
+            segments[-1][1] += ''.join(words)
+        else:
+            segments.append([op, ''.join(words)])
+
+    matcher = SequenceMatcher(None, old_words, new_words, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            emit('=', old_words[i1:i2])
+        else:
+            emit('-', old_words[i1:i2])
+            emit('+', new_words[j1:j2])
+    return segments
+
+
+def diff_states(old, new):
+    """Return the list of changes that turn snapshot ``old`` into ``new``."""
+    changes = []
+    for field in sorted(old.keys() | new.keys()):
+        if field not in new:
+            changes.append({'field': field, 'op': 'removed', 'old': old[field]})
+        elif field not in old:
+            changes.append({'field': field, 'op': 'added', 'new': new[field]})
+        elif old[field] != new[field]:
+            old_value, new_value = old[field], new[field]
+            if (isinstance(old_value, str) and isinstance(new_value, str)
+                    and max(len(old_value), len(new_value)) >= WORD_DIFF_MIN_LENGTH):
+                changes.append({'field': field, 'op': 'changed', 'words': _word_diff(old_value, new_value)})
+            else:
+                changes.append({'field': field, 'op': 'changed', 'old': old_value, 'new': new_value})
+    return changes
+
+
+def pack_changes(changes):
+    return json.dumps(changes, separators=(',', ':'))
+
+
+def unpack_changes(packed):
+    return json.loads(packed)
+
+
+def _value(value):
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def render_text(changes):
+    lines = []
+    for change in changes:
+        field = change['field']
+        if change['op'] == 'added':
+            lines.append(f'+ {field}: {_value(change["new"])}')
+        elif change['op'] == 'removed':
+            lines.append(f'- {field}: {_value(change["old"])}')
+        elif 'words' in change:
+            text = ''.join(
+                words if op == '=' else f'[-{words}-]' if op == '-' else f'{{+{words}+}}'
+                for op, words in change['words']
+            )
+            lines.append(f'~ {field}: {text}')
+        else:
+            lines.append(f'~ {field}: {_value(change["old"])} -> {_value(change["new"])}')
+    return '\n'.join(lines)
+
+
+def render_html(changes):
+    def escaped(value):
+        return html.escape(_value(value))
+
+    rows = []
+    for change in changes:
+        field = f'<span class="field">{html.escape(change["field"])}</span>'
+        if change['op'] == 'added':
+            rows.append(f'<div class="addition">{field} <ins>{escaped(change["new"])}</ins></div>')
+        elif change['op'] == 'removed':
+            rows.append(f'<div class="deletion">{field} <del>{escaped(change["old"])}</del></div>')
+        elif 'words' in change:
+            text = ''.join(
+                escaped(words) if op == '=' else
+                f'<del>{escaped(words)}</del>' if op == '-' else f'<ins>{escaped(words)}</ins>'
+                for op, words in change['words']
+            )
+            rows.append(f'<div class="change">{field} {text}</div>')
+        else:
+            rows.append(f'<div class="change">{field} <del>{escaped(change["old"])}</del> '
+                        f'<ins>{escaped(change["new"])}</ins></div>')
+    return '\n'.join(rows)
+
+
+def rendered(changes, render):
+    """Return the response fields for ``changes`` in one of RENDER_FORMATS."""
+    if render == 'text':
+        return {'changes': changes, 'diff_text': render_text(changes)}
+    if render == 'html':
+        return {'changes': changes, 'diff_html': render_html(changes)}
+    return {'changes': changes}
+
+
+def compare_versions(event_id, from_number, to_number):
+    """Return the changes from one version of an event to another, or None if either is missing.
+
+    Versions never change once written, so results are kept in the shared
+    cache. The key includes the version row ids, which guards against a
+    version being pruned and its number written again.
+    """
+    ids = dict(db.session.query(EventVersion.version_number, EventVersion.id).filter(
+        EventVersion.event_id == event_id,
+        EventVersion.version_number.in_([from_number, to_number])
+    ).all())
+    if from_number not in ids or to_number not in ids:
+        return None
+
+    shared = get_shared_cache()
+    key = f'{from_number}:{to_number}:{ids[from_number]}:{ids[to_number]}'
+    hit, value = shared.get(SHARED_NAMESPACE, event_id, key)
+    if hit:
+        return value
+
+    versions = {version.version_number: version for version in EventVersion.query.filter(
+        EventVersion.id.in_([ids[from_number], ids[to_number]])
+    )}
+    load_version_data(list(versions.values()))
+    changes = diff_states(versions[from_number].get_data_dict(), versions[to_number].get_data_dict())
+    shared.set(SHARED_NAMESPACE, event_id, key, value, changes)
+    return changes
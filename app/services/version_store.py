@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""Delta-encoded storage for event versions.
+
+Every ``VERSION_KEYFRAME_INTERVAL``-th version of an event is a keyframe
+holding the full snapshot, exactly like the rows written before deltas
+existed. The versions in between store only the fields that changed since
+the previous version, plus the number of the keyframe their chain starts
+from (``keyframe_version``). Reading a delta replays the chain from that
+keyframe, which is one range query on (event_id, version_number).
+Keyframes and deltas alike are stored with the codec from
+``app.services.version_codec``.
+
+A version is the event as it was before an edit; the names of the fields
+that edit changed are stored in ``changed_fields`` when it is flushed. The
+snapshot's start_time, end_time and is_recurring are also kept in plain
+columns so point-in-time queries can filter and sort on them in SQL.
+"""
+from datetime import datetime
+import json
+
+from flask import current_app
+from sqlalchemy import and_, delete, event as orm_event, func, or_, select
+from sqlalchemy.orm import Session, aliased
+
+from app import db
+from app.models.version import EventVersion
+from app.services.version_codec import configured_encoding, decode, encode
+
+EDITS_KEY = 'version_edits'
+# Delta chains fetched per query by load_version_data; SQLite limits expression depth.
+LOAD_BATCH_SIZE = 200
+
+
+def compute_delta(old, new):
+    """Return the field-level changes that turn ``old`` into ``new``."""
+    delta = {'set': {key: value for key, value in new.items() if key not in old or old[key] != value}}
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta['unset'] = removed
+    return delta
+
+
+def apply_delta(state, delta):
+    state = dict(state)
+    state.update(delta.get('set', {}))
+    for key in delta.get('unset', ()):
+        state.pop(key, None)
+    return state
+
+
+def changed_fields(old, new):
+    return sorted(key for key in old.keys() | new.keys() if key not in old or key not in new or old[key] != new[key])
+
+
+def _set_payload(version, value, encoding=None):
+    version.encoding, version.data, version.payload = encode(value, encoding)
+
+
+def _set_times(version, state):
+    version.start_time = datetime.fromisoformat(state['start_time']) if state.get('start_time') else None
+    version.end_time = datetime.fromisoformat(state['end_time']) if state.get('end_time') else None
+    version.is_recurring = state.get('is_recurring')
+
+
+def _build(event, state, user_id, delta=None, keyframe_version=None):
+    version = EventVersion(event_id=event.id, version_number=event.current_version, data='', created_by=user_id)
+    _set_payload(version, state if delta is None else delta)
+    _set_times(version, state)
+    version.keyframe_version = keyframe_version
+    version._decoded = state
+    return version
+
+
+def _replay(rows):
+    """Yield (version, decoded state) for rows of one event ordered by version_number."""
+    state = None
+    for row in rows:
+        payload = decode(row.encoding, row.data, row.payload)
+        if row.keyframe_version is None:
+            state = payload
+        elif state is None:
+            raise ValueError(f'Version {row.version_number} of event {row.event_id} has no keyframe')
+        else:
+            state = apply_delta(state, payload)
+        yield row, state
+
+
+def load_version_data(versions):
+    """Decode the data of several versions with one query per ``LOAD_BATCH_SIZE`` delta chains."""
+    pending = [version for version in versions if version._decoded is None]
+    for version in pending:
+        if version.keyframe_version is None:
+            version._decoded = decode(version.encoding, version.data, version.payload)
+
+    ranges = {}
+    for version in pending:
+        if version._decoded is None:
+            low, high = ranges.get(version.event_id, (version.keyframe_version, version.version_number))
+            ranges[version.event_id] = (min(low, version.keyframe_version), max(high, version.version_number))
+    if not ranges:
+        return
+
+    chains = {}
+    items = list(ranges.items())
+    for offset in range(0, len(items), LOAD_BATCH_SIZE):
+        for row in db.session.query(EventVersion).filter(or_(*(
+            and_(EventVersion.event_id == event_id, EventVersion.version_number.between(low, high))
+            for event_id, (low, high) in items[offset:offset + LOAD_BATCH_SIZE]
+        ))).order_by(EventVersion.event_id, EventVersion.version_number):
+            chains.setdefault(row.event_id, []).append(row)
+
+    states = {}
+    for event_id, rows in chains.items():
+        for row, state in _replay(rows):
+            states[(event_id, row.version_number)] = state
+
+    for version in pending:
+        if version._decoded is None:
+            version._decoded = states[(version.event_id, version.version_number)]
+
+
+def version_in_effect(event_id, moment):
+    """Scalar subquery of the id of the version holding an event's state at ``moment``.
+
+    A version is the event before an edit, so that is the first version
+    created after ``moment``, or NULL if the event has not been edited
+    since. ``event_id`` is usually the correlated ``Event.id``; each lookup
+    is one seek on the (event_id, created_at) index.
+    """
+    return select(EventVersion.id).where(
+        EventVersion.event_id == event_id, EventVersion.created_at > moment
+    ).order_by(EventVersion.created_at, EventVersion.version_number).limit(1).correlate_except(EventVersion).scalar_subquery()
+
+
+def _latest_chains(event_ids):
+    """Return {event_id: rows from the latest keyframe to the latest version}."""
+    event_ids = [event_id for event_id in event_ids if event_id is not None]
+    if not event_ids:
+        return {}
+
+    keyframes = aliased(EventVersion)
+    latest_keyframe = select(func.max(keyframes.version_number)).where(
+        keyframes.event_id == EventVersion.event_id,
+        keyframes.keyframe_version.is_(None)
+    ).correlate(EventVersion).scalar_subquery()
+
+    chains = {}
+    for row in EventVersion.query.filter(
+        EventVersion.event_id.in_(event_ids),
+        EventVersion.version_number >= latest_keyframe
+    ).order_by(EventVersion.event_id, EventVersion.version_number):
+        chains.setdefault(row.event_id, []).append(row)
+    return chains
+
+
+def create_versions(events, user_id):
+    """Bump ``current_version`` of each event and return its new EventVersion rows.
+
+    Versions of events that already had one record an edit, and their
+    changelog entries are queued in the same transaction.
+    """
+    from app.services.changelog_outbox import enqueue_changelog
+
+    interval = current_app.config['VERSION_KEYFRAME_INTERVAL']
+    chains = _latest_chains([event.id for event in events])
+
+    versions = []
+    for event in events:
+        event.current_version += 1
+        state = event.snapshot()
+        chain = chains.get(event.id)
+
+        if not chain or len(chain) >= interval:
+            versions.append(_build(event, state, user_id))
+        else:
+            previous = None
+            for _, previous in _replay(chain):
+                pass
+            versions.append(_build(event, state, user_id, compute_delta(previous, state), chain[0].version_number))
+
+    db.session.info.setdefault(EDITS_KEY, []).extend(zip(versions, events))
+    enqueue_changelog([version for event, version in zip(events, versions) if event.id in chains])
+    return versions
+
+
+@orm_event.listens_for(Session, 'before_flush')
+def _record_changed_fields(session, flush_context, instances):
+    """Store which fields each edit changed, comparing its version with the event as it is now."""
+    for version, edited in session.info.get(EDITS_KEY, ()):
+        fields = json.dumps(changed_fields(version.get_data_dict(), edited.snapshot()), separators=(',', ':'))
+        if version.changed_fields != fields:
+            version.changed_fields = fields
+
+
+@orm_event.listens_for(Session, 'after_commit')
+@orm_event.listens_for(Session, 'after_rollback')
+def _forget_edits(session):
+    session.info.pop(EDITS_KEY, None)
+
+
+def encode_event_versions(event_id, interval, encoding):
+    """Rewrite the stored versions of one event with keyframes every ``interval`` versions.
+
+    Returns the number of rows whose stored form changed.
+    """
+    rows = EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.version_number).all()
+    decoded = [state for _, state in _replay(rows)]
+
+    changed = 0
+    previous = keyframe = None
+    for position, (row, state) in enumerate(zip(rows, decoded)):
+        if position % interval == 0:
+            value, keyframe_version, keyframe = state, None, row.version_number
+        else:
+            value, keyframe_version = compute_delta(previous, state), keyframe
+        stored = encode(value, encoding)
+        if (row.encoding, row.data, row.payload) != stored or row.keyframe_version != keyframe_version:
+            row.encoding, row.data, row.payload = stored
+            row.keyframe_version = keyframe_version
+            changed += 1
+        if row.start_time is None:
+            _set_times(row, state)
+        row._decoded = state
+        previous = state
+    return changed
+
+
+def encode_all_versions(interval=None, encoding=None, batch_size=200, log=None):
+    """Convert every event's version history to keyframe + delta form, committing per batch."""
+    interval = interval or current_app.config['VERSION_KEYFRAME_INTERVAL']
+    encoding = encoding or configured_encoding()
+    last_id = 0
+    total = 0
+    while True:
+        event_ids = db.session.scalars(
+            select(EventVersion.event_id).where(EventVersion.event_id > last_id).distinct()
+            .order_by(EventVersion.event_id).limit(batch_size)
+        ).all()
+        if not event_ids:
+            return total
+        for event_id in event_ids:
+            total += encode_event_versions(event_id, interval, encoding)
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = event_ids[-1]
+        if log:
+            log(f'Re-encoded versions up to event {last_id} ({total} rows changed)')
+
+
+def decode_chain(rows):
+    """Decode every row of one event's complete history, ordered by version_number."""
+    for row, state in _replay(rows):
+        row._decoded = state
+
+
+def fill_version_times(batch_size=200):
+    """Fill the snapshot time columns of versions written before they existed; returns the rows filled."""
+    last_id = 0
+    total = 0
+    while True:
+        event_ids = db.session.scalars(
+            select(EventVersion.event_id).where(EventVersion.event_id > last_id, EventVersion.start_time.is_(None))
+            .distinct().order_by(EventVersion.event_id).limit(batch_size)
+        ).all()
+        if not event_ids:
+            return total
+
+        histories = {}
+        for row in EventVersion.query.filter(EventVersion.event_id.in_(event_ids)).order_by(
+            EventVersion.event_id, EventVersion.version_number
+        ):
+            histories.setdefault(row.event_id, []).append(row)
+        for rows in histories.values():
+            decode_chain(rows)
+            for row in rows:
+                if row.start_time is None:
+                    _set_times(row, row.get_data_dict())
+                    total += 1
+
+        db.session.commit()
+        db.session.expunge_all()
+        last_id = event_ids[-1]
+
+
+def drop_versions(rows, dropped, interval):
+    """Delete the ``dropped`` version numbers of one event and repair the remaining chains.
+
+    ``rows`` is the event's complete history, decoded with ``decode_chain``.
+    A delta that lost a version of its chain is re-encoded against the
+    previous remaining version, or as a keyframe when that chain is full;
+    intact chains are left as they are. Returns the number of rows rewritten.
+    """
+    removed = []
+    rewritten = 0
+    keyframe = previous = None
+    chain_length = 0
+    gap = False
+
+    for row in rows:
+        if row.version_number in dropped:
+            removed.append(row.id)
+            gap = True
+            continue
+
+        state = row.get_data_dict()
+        if row.keyframe_version is None:
+            keyframe, chain_length = row.version_number, 1
+        elif not gap and row.keyframe_version == keyframe:
+            chain_length += 1
+        elif keyframe is None or chain_length >= interval:
+            _set_payload(row, state)
+            row.keyframe_version = None
+            keyframe, chain_length = row.version_number, 1
+            rewritten += 1
+        else:
+            _set_payload(row, compute_delta(previous, state))
+            row.keyframe_version = keyframe
+            chain_length += 1
+            rewritten += 1
+        gap = False
+        previous = state
+
+    if removed:
+        db.session.execute(
+            delete(EventVersion).where(EventVersion.id.in_(removed)),
+            execution_options={'synchronize_session': False}
+        )
+    return rewritten
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+# Keeps IN lists and executemany batches below SQLite's bound-parameter limit.
+PARAMETER_BATCH_SIZE = 5000
+
+
+def chunks(items, size=PARAMETER_BATCH_SIZE):
+    """Yield consecutive slices of ``items`` with at most ``size`` entries."""
+    for offset in range(0, len(items), size):
+        yield items[offset:offset + size]
@@ -2,6 +2,7 @@ from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from app.models.permission import Permission, RoleType
+from app.services.permission_cache import resolve_permission
 from app import db
 
 def jwt_required_with_role(roles=None):
@@ -26,10 +27,7 @@ def jwt_required_with_role(roles=None):
                 return fn(*args, **kwargs)
             
             # Get permission
-            permission = Permission.query.filter_by(
-                event_id=event_id,
-                user_id=user_id
-            ).first()
+            permission = resolve_permission(user_id, event_id)
             
             if not permission or permission.role.value not in roles:
                 return jsonify({'error': 'Insufficient permissions'}), 403
@@ -76,10 +74,7 @@ def owner_required(fn):
         user_id = get_jwt_identity()
         event_id = kwargs.get('id')
         
-        permission = Permission.query.filter_by(
-            event_id=event_id,
-            user_id=user_id
-        ).first()
+        permission = resolve_permission(user_id, event_id)
         
         if not permission or permission.role != RoleType.OWNER:
             return jsonify({'error': 'Only the owner can perform this action'}), 403
@@ -96,10 +91,7 @@ def editor_required(fn):
         user_id = get_jwt_identity()
         event_id = kwargs.get('id')
         
-        permission = Permission.query.filter_by(
-            event_id=event_id,
-            user_id=user_id
-        ).first()
+        permission = resolve_permission(user_id, event_id)
         
         if not permission or not permission.can_edit():
             return jsonify({'error': 'Editor or owner permissions required'}), 403
@@ -39,6 +39,11 @@ class ConflictError(APIError):
     def __init__(self, message="Resource conflict", payload=None):
         super().__init__(message, status_code=409, payload=payload)
 
+class ServiceUnavailableError(APIError):
+    """Exception raised when the server is temporarily overloaded."""
+    def __init__(self, message="Service temporarily unavailable", payload=None):
+        super().__init__(message, status_code=503, payload=payload)
+
 def register_error_handlers(app):
     """Register error handlers with the Flask app."""
     
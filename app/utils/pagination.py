@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+import json
+import threading
+import time
+
+from sqlalchemy import DateTime, tuple_
+
+_count_cache = OrderedDict()
+_count_lock = threading.Lock()
+COUNT_CACHE_SIZE = 1024
+COUNT_CACHE_TTL = 60
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor produced by ``encode_cursor``, raising ValueError if it is malformed."""
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Invalid cursor')
+
+    return [datetime.fromisoformat(value) if isinstance(column.type, DateTime) and value is not None else value
+            for column, value in zip(columns, values)]
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=10, descending=False):
+    """Return (items, next_cursor) for the page after ``cursor``.
+
+    The page is located with a row-value comparison on ``columns`` rather
+    than an OFFSET, so every page costs the same regardless of depth.
+    ``columns`` must form a unique sort key on the queried entity.
+    """
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+
+    ordering = [column.desc() for column in columns] if descending else list(columns)
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    items = rows[:per_page]
+    next_cursor = None
+    if len(rows) > per_page:
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+
+    return items, next_cursor
+
+
+def cached_count(key, query, ttl=COUNT_CACHE_TTL):
+    """Return ``query.count()``, reusing a recent result for the same key."""
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    total = query.order_by(None).count()
+
+    with _count_lock:
+        _count_cache[key] = (now + ttl, total)
+        _count_cache.move_to_end(key)
+        while len(_count_cache) > COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+
+    return total
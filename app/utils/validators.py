@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
-from datetime import datetime
+from datetime import datetime, timezone
 from app.utils.errors import ValidationError
 import re
-from marshmallow import Schema, fields, validate, ValidationError as MarshmallowValidationError
+from marshmallow import Schema, fields, post_load, validate, ValidationError as MarshmallowValidationError
 
 
 class UserSchema(Schema):
@@ -25,17 +25,32 @@ class LoginSchema(Schema):
         return data
 
 
+def _validate_days_of_week(value):
+    from app.services.recurrence import parse_days_of_week
+    try:
+        parse_days_of_week(value)
+    except ValueError as e:
+        raise MarshmallowValidationError(str(e))
+
+
 class RecurrencePatternSchema(Schema):
     """Schema for recurrence pattern validation."""
     type = fields.Str(required=True, validate=validate.OneOf(['daily', 'weekly', 'monthly', 'yearly', 'custom']))
     interval = fields.Int(required=False, default=1, validate=validate.Range(min=1, max=365))
-    days_of_week = fields.Str(required=False)
+    days_of_week = fields.Str(required=False, validate=_validate_days_of_week)
     day_of_month = fields.Int(required=False, validate=validate.Range(min=1, max=31))
     month_of_year = fields.Int(required=False, validate=validate.Range(min=1, max=12))
     end_date = fields.DateTime(required=False)
     count = fields.Int(required=False, validate=validate.Range(min=1))
     custom_rule = fields.Str(required=False)
 
+    @post_load
+    def normalize_times(self, data, **kwargs):
+        """Store end_date as naive UTC like every other datetime column."""
+        if 'end_date' in data:
+            data['end_date'] = to_naive_utc(data['end_date'])
+        return data
+
 
 class EventSchema(Schema):
     """Schema for event data validation."""
@@ -47,6 +62,14 @@ class EventSchema(Schema):
     is_recurring = fields.Bool(required=False, default=False)
     recurrence_pattern = fields.Nested(RecurrencePatternSchema, required=False)
     
+    @post_load
+    def normalize_times(self, data, **kwargs):
+        """Convert offset-aware start and end times to naive UTC."""
+        for field in ('start_time', 'end_time'):
+            if field in data:
+                data[field] = to_naive_utc(data[field])
+        return data
+    
     def validate_event(self, data):
         """Validate event data."""
         
@@ -66,11 +89,50 @@ class PermissionSchema(Schema):
     role = fields.Str(required=True, validate=validate.OneOf(['owner', 'editor', 'viewer']))
 
 
+class GroupPermissionSchema(Schema):
+    """Schema for sharing an event with a group."""
+    group_id = fields.Int(required=True)
+    role = fields.Str(required=True, validate=validate.OneOf(['editor', 'viewer']))
+
+
+class GroupSchema(Schema):
+    """Schema for group data validation."""
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=120))
+    description = fields.Str(allow_none=True)
+
+
+class GroupMembersSchema(Schema):
+    """Schema for adding members to a group."""
+    user_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1))
+
+
+class FreeBusySchema(Schema):
+    """Schema for free/busy queries."""
+    user_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=500))
+    start_date = fields.DateTime(required=True)
+    end_date = fields.DateTime(required=True)
+
+
 class BatchEventSchema(Schema):
     """Schema for batch event creation."""
     events = fields.List(fields.Nested(EventSchema), required=True, validate=validate.Length(min=1))
 
 
+class EventUpdateSchema(EventSchema):
+    """Schema for one entry of a batch update; load with partial=True."""
+    id = fields.Int(required=True)
+
+
+class BatchUpdateSchema(Schema):
+    """Schema for batch event updates."""
+    events = fields.List(fields.Nested(EventUpdateSchema), required=True, validate=validate.Length(min=1, max=1000))
+
+
+class BatchDeleteSchema(Schema):
+    """Schema for batch event deletion."""
+    ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=1000))
+
+
 def validate_email(email):
     """Validate email format."""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -92,6 +154,18 @@ def validate_password(password):
     return password
 
 
+def to_naive_utc(value):
+    """Convert an aware datetime to naive UTC, leaving naive datetimes untouched."""
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_datetime(value):
+    """Parse an ISO 8601 string into a naive UTC datetime, raising ValueError if invalid."""
+    return to_naive_utc(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+
 def validate_date_range(start_time, end_time):
     """Validate that start_time is before end_time."""
     start = datetime.fromisoformat(start_time.replace('Z', '+00:00')) if isinstance(start_time, str) else start_time
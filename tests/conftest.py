@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from contextlib import contextmanager
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app, db
+from app.utils.errors import register_error_handlers
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+        'TESTING': True,
+        'RATELIMIT_ENABLED': False,
+        'BCRYPT_ROUNDS': 4,
+        'OCCURRENCE_INDEX_WORKER': False,
+        'CHANGELOG_WORKERS': 0,
+        'SHARED_CACHE_URL': None,
+    })
+    register_error_handlers(app)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def register(client):
+    """Register a user and return (auth headers, user id)."""
+    def register(username):
+        response = client.post('/api/auth/register', json={
+            'username': username,
+            'email': f'{username}@example.com',
+            'password': 'password123'
+        })
+        assert response.status_code == 201, response.json
+        return {'Authorization': f'Bearer {response.json["access_token"]}'}, response.json['user']['id']
+    return register
+
+
+@pytest.fixture
+def create_event(client):
+    """Create an event through the API and return its JSON."""
+    def create_event(headers, **fields):
+        body = {'title': 'Standup', 'start_time': '2030-01-07T09:00:00', 'end_time': '2030-01-07T09:30:00'}
+        body.update(fields)
+        response = client.post('/api/events', headers=headers, json=body)
+        assert response.status_code == 201, response.json
+        return response.json['event']
+    return create_event
+
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Fail with the offending statements if a block executes more than ``limit`` queries on this thread."""
+    @contextmanager
+    def assert_max_queries(limit):
+        statements = []
+        thread = threading.get_ident()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if threading.get_ident() == thread:
+                statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        if len(statements) > limit:
+            raise AssertionError(f'Expected at most {limit} queries, got {len(statements)}:\n' + '\n'.join(statements))
+    return assert_max_queries
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+from datetime import date, datetime, timedelta
+import random
+
+from app.services.conflicts import find_conflicts, find_overlaps
+from app.services.recurrence import Occurrence
+
+BASE = datetime(2030, 1, 1)
+
+
+def occurrence(event_id, start_minutes, end_minutes, index=0):
+    return Occurrence(event_id, index, BASE + timedelta(minutes=start_minutes), BASE + timedelta(minutes=end_minutes))
+
+
+def pairs(conflicts):
+    return sorted(tuple(sorted((first.event_id, first.index, second.event_id, second.index)))
+                  for first, second in conflicts)
+
+
+def test_touching_occurrences_do_not_conflict():
+    assert find_conflicts([occurrence(1, 0, 30)], [occurrence(2, 30, 60), occurrence(3, -30, 0)]) == []
+
+
+def test_overlap_reports_candidate_first():
+    candidate, other = occurrence(1, 0, 30), occurrence(2, 29, 60)
+    assert find_conflicts([candidate], [other]) == [(candidate, other)]
+
+
+def test_equal_starts_are_reported_once():
+    candidate, other = occurrence(1, 0, 30), occurrence(2, 0, 30)
+    assert find_conflicts([candidate], [other]) == [(candidate, other)]
+
+
+def test_empty_occurrences_never_conflict():
+    assert find_conflicts([occurrence(1, 10, 10)], [occurrence(2, 0, 30)]) == []
+
+
+def test_same_event_and_existing_pairs_are_ignored():
+    candidates = [occurrence(1, 0, 60, index=0), occurrence(1, 30, 90, index=1)]
+    existing = [occurrence(2, 200, 300), occurrence(3, 250, 350)]
+    assert find_conflicts(candidates, existing) == []
+
+
+def test_matches_pairwise_comparison():
+    rng = random.Random(7)
+
+    def generate(first_id, number):
+        items = []
+        for event_id in range(first_id, first_id + number):
+            start = rng.randrange(0, 2000, 5)
+            items.append(occurrence(event_id, start, start + rng.choice([0, 5, 15, 30, 60, 240])))
+        return items
+
+    candidates, existing = generate(1, 60), generate(1000, 150)
+
+    def overlap(first, second):
+        return (first.event_id != second.event_id and first.start < first.end and second.start < second.end
+                and max(first.start, second.start) < min(first.end, second.end))
+
+    expected = [(first, second) for first in candidates for second in existing if overlap(first, second)]
+    expected += [(first, second) for position, first in enumerate(candidates)
+                 for second in candidates[position + 1:] if overlap(first, second)]
+
+    assert pairs(find_conflicts(candidates, existing)) == pairs(expected)
+    assert pairs(find_overlaps(existing)) == pairs(
+        (first, second) for position, first in enumerate(existing)
+        for second in existing[position + 1:] if overlap(first, second)
+    )
+
+
+def test_create_with_check_conflicts(client, register, create_event):
+    headers, _ = register('alice')
+    existing = create_event(headers, start_time='2030-01-07T09:00:00', end_time='2030-01-07T10:00:00')
+
+    response = client.post('/api/events?check_conflicts=true', headers=headers, json={
+        'title': 'Clash', 'start_time': '2030-01-07T09:30:00', 'end_time': '2030-01-07T10:30:00'
+    })
+    assert response.status_code == 409
+    assert [conflict['conflicts_with']['event_id'] for conflict in response.json['conflicts']] == [existing['id']]
+
+    response = client.post('/api/events?check_conflicts=true', headers=headers, json={
+        'title': 'Back to back', 'start_time': '2030-01-07T10:00:00', 'end_time': '2030-01-07T11:00:00'
+    })
+    assert response.status_code == 201, response.json
+
+
+def test_check_conflicts_against_a_series_past_the_horizon(client, register, create_event):
+    headers, _ = register('alice')
+    monday = (datetime.utcnow() + timedelta(days=7 - datetime.utcnow().weekday())).date()
+    series = create_event(headers, title='Weekly', start_time=f'{monday}T09:00:00', end_time=f'{monday}T10:00:00',
+                          is_recurring=True, recurrence_pattern={'type': 'weekly'})
+
+    response = client.post('/api/events?check_conflicts=true', headers=headers, json={
+        'title': 'Clash', 'start_time': '2030-01-07T09:30:00', 'end_time': '2030-01-07T10:30:00'
+    })
+    assert response.status_code == 409
+    assert [conflict['conflicts_with'] for conflict in response.json['conflicts']] == [{
+        'event_id': series['id'], 'title': 'Weekly', 'occurrence_index': (date(2030, 1, 7) - monday).days // 7,
+        'start_time': '2030-01-07T09:00:00', 'end_time': '2030-01-07T10:00:00'
+    }]
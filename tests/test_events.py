@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+import csv
+import io
+import json
+import time
+
+import pytest
+
+from app.models.occurrence import EventOccurrence
+from app.models.version import ChangeLog, ChangeLogOutbox
+from app.services.changelog_outbox import process_outbox
+from app.services.occurrence_index import extend_horizon
+
+
+@pytest.mark.parametrize('start_time, end_time, expected_start', [
+    ('2030-11-01T10:00:00Z', '2030-11-01T11:00:00Z', '2030-11-01T10:00:00'),
+    ('2030-11-01T10:00:00+02:00', '2030-11-01T11:00:00+02:00', '2030-11-01T08:00:00'),
+])
+def test_offset_times_are_stored_as_utc(client, register, start_time, end_time, expected_start):
+    headers, _ = register('alice')
+
+    response = client.post('/api/events', headers=headers, json={
+        'title': 'Review', 'start_time': start_time, 'end_time': end_time
+    })
+    assert response.status_code == 201, response.json
+    assert response.json['event']['start_time'] == expected_start
+
+    event_id = response.json['event']['id']
+    response = client.put(f'/api/events/{event_id}', headers=headers, json={
+        'title': 'Review', 'start_time': start_time, 'end_time': end_time
+    })
+    assert response.status_code == 200, response.json
+    assert response.json['event']['start_time'] == expected_start
+
+
+def test_recurring_offset_times_keep_the_offset(client, register):
+    headers, _ = register('alice')
+
+    response = client.post('/api/events', headers=headers, json={
+        'title': 'Weekly', 'start_time': '2030-01-07T09:00:00+02:00', 'end_time': '2030-01-07T10:00:00+02:00',
+        'is_recurring': True,
+        'recurrence_pattern': {'type': 'weekly', 'end_date': '2030-02-01T00:00:00+02:00'}
+    })
+    assert response.status_code == 201, response.json
+
+    response = client.get('/api/events?expand=true&start_date=2030-01-01T00:00:00&end_date=2030-03-01T00:00:00',
+                          headers=headers)
+    starts = [occurrence['start_time'] for occurrence in response.json['occurrences']]
+    assert starts == ['2030-01-07T07:00:00', '2030-01-14T07:00:00', '2030-01-21T07:00:00', '2030-01-28T07:00:00']
+
+
+def test_delete_removes_changelog(client, register, create_event):
+    headers, _ = register('alice')
+    event = create_event(headers)
+    for title in ('Standup 2', 'Standup 3'):
+        response = client.put(f'/api/events/{event["id"]}', headers=headers, json={
+            'title': title, 'start_time': event['start_time'], 'end_time': event['end_time']
+        })
+        assert response.status_code == 200, response.json
+    process_outbox(100)
+    client.put(f'/api/events/{event["id"]}', headers=headers, json={
+        'title': 'Standup 4', 'start_time': event['start_time'], 'end_time': event['end_time']
+    })
+    assert ChangeLog.query.filter_by(event_id=event['id']).count() == 2
+    assert ChangeLogOutbox.query.filter_by(event_id=event['id']).count() == 1
+
+    response = client.delete(f'/api/events/{event["id"]}', headers=headers)
+    assert response.status_code == 200, response.json
+    assert ChangeLog.query.filter_by(event_id=event['id']).count() == 0
+    assert ChangeLogOutbox.query.filter_by(event_id=event['id']).count() == 0
+
+
+def test_batch_create_returns_events_in_request_order(client, register, create_event):
+    headers, _ = register('alice')
+    for number in range(3):
+        create_event(headers, title=f'Existing {number}')
+    last = create_event(headers, title='Removed')
+    assert client.delete(f'/api/events/{last["id"]}', headers=headers).status_code == 200
+
+    titles = [f'Batch {number}' for number in range(250)]
+    response = client.post('/api/events/batch', headers=headers, json={'events': [
+        {'title': title, 'start_time': '2030-01-07T09:00:00', 'end_time': '2030-01-07T10:00:00'} for title in titles
+    ]})
+    assert response.status_code == 201, response.json
+    assert [event['title'] for event in response.json['events']] == titles
+
+    for event in response.json['events'][::50]:
+        assert client.get(f'/api/events/{event["id"]}', headers=headers).json['title'] == event['title']
+
+
+def test_as_of_lists_events_as_they_were(client, register, create_event):
+    headers, _ = register('alice')
+    moved = create_event(headers, title='Moved', start_time='2030-01-10T09:00:00', end_time='2030-01-10T10:00:00')
+    renamed = create_event(headers, title='Old name', start_time='2030-01-05T09:00:00', end_time='2030-01-05T10:00:00')
+    time.sleep(0.01)
+    before = datetime.utcnow().isoformat()
+    time.sleep(0.01)
+
+    client.put(f'/api/events/{moved["id"]}', headers=headers, json={
+        'title': 'Moved', 'start_time': '2030-01-01T09:00:00', 'end_time': '2030-01-01T10:00:00'
+    })
+    client.put(f'/api/events/{renamed["id"]}', headers=headers, json={
+        'title': 'New name', 'start_time': renamed['start_time'], 'end_time': renamed['end_time']
+    })
+    time.sleep(0.01)
+    after = datetime.utcnow().isoformat()
+
+    response = client.get(f'/api/events?as_of={before}', headers=headers)
+    assert response.status_code == 200, response.json
+    assert [(event['title'], event['start_time']) for event in response.json['events']] == [
+        ('Old name', '2030-01-05T09:00:00'), ('Moved', '2030-01-10T09:00:00')
+    ]
+    assert all(event['as_of_version'] is not None for event in response.json['events'])
+
+    # The window applies to the times in effect then, not the current ones.
+    response = client.get(f'/api/events?as_of={before}&start_date=2030-01-08T00:00:00', headers=headers)
+    assert [event['id'] for event in response.json['events']] == [moved['id']]
+
+    response = client.get(f'/api/events?as_of={before}&per_page=1&page=2', headers=headers)
+    assert (response.json['total'], response.json['pages']) == (2, 2)
+    assert [event['id'] for event in response.json['events']] == [moved['id']]
+
+    response = client.get(f'/api/events?as_of={after}', headers=headers)
+    assert [(event['title'], event['as_of_version']) for event in response.json['events']] == [
+        ('Moved', None), ('New name', None)
+    ]
+
+    assert client.get('/api/events?as_of=2000-01-01T00:00:00', headers=headers).json['total'] == 0
+    assert client.get('/api/events?as_of=yesterday', headers=headers).status_code == 400
+
+
+def test_events_past_the_index_horizon_are_listed(client, register, create_event):
+    headers, _ = register('alice')
+    single = create_event(headers, title='Offsite', start_time='2030-03-01T09:00:00', end_time='2030-03-01T17:00:00')
+    weekly = create_event(headers, title='Weekly', start_time='2030-03-04T09:00:00', end_time='2030-03-04T10:00:00',
+                          is_recurring=True, recurrence_pattern={'type': 'weekly'})
+
+    for window, expected in [
+        ('start_date=2030-03-01T00:00:00&end_date=2030-03-31T00:00:00', [single['id'], weekly['id']]),
+        ('start_date=2030-01-01T00:00:00', [single['id'], weekly['id']]),
+        ('start_date=2030-03-02T00:00:00', [weekly['id']]),
+        ('end_date=2030-03-02T00:00:00', [single['id']]),
+    ]:
+        response = client.get(f'/api/events?{window}', headers=headers)
+        assert response.status_code == 200, response.json
+        assert [event['id'] for event in response.json['events']] == expected, window
+
+    assert extend_horizon() == 0
+    assert EventOccurrence.query.filter_by(event_id=single['id']).count() == 1
+
+
+@pytest.mark.parametrize('export_format', ['ndjson', 'csv'])
+def test_export_window_includes_events_past_the_index_horizon(client, register, create_event, export_format):
+    headers, _ = register('alice')
+    create_event(headers, title='Offsite', start_time='2030-03-01T09:00:00', end_time='2030-03-01T17:00:00')
+    create_event(headers, title='Weekly', start_time='2030-03-04T09:00:00', end_time='2030-03-04T10:00:00',
+                 is_recurring=True, recurrence_pattern={'type': 'weekly'})
+    create_event(headers, title='Earlier', start_time='2030-02-01T09:00:00', end_time='2030-02-01T10:00:00')
+
+    response = client.get(f'/api/events/export?format={export_format}&start_date=2030-03-01T00:00:00'
+                          '&end_date=2030-03-31T00:00:00', headers=headers)
+    assert response.status_code == 200
+    if export_format == 'ndjson':
+        titles = [json.loads(line)['title'] for line in response.get_data(as_text=True).splitlines()]
+    else:
+        titles = [row['title'] for row in csv.DictReader(io.StringIO(response.get_data(as_text=True)))]
+    assert titles == ['Offsite', 'Weekly']
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.event import RecurrenceType
+from app.services.ical import event_to_vevent, parse_ics, pattern_to_rrule, rrule_to_pattern
+from app.services.recurrence import Series
+
+START = datetime(2030, 1, 2, 9, 0)  # a Wednesday
+
+
+def pattern(type, interval=1, days_of_week=None, day_of_month=None, month_of_year=None, end_date=None, count=None):
+    return SimpleNamespace(type=type, interval=interval, days_of_week=days_of_week, day_of_month=day_of_month,
+                           month_of_year=month_of_year, end_date=end_date, count=count, custom_rule=None)
+
+
+def event(recurrence, start=START):
+    return SimpleNamespace(id=1, title='Review', description=None, location=None, start_time=start,
+                           end_time=start + timedelta(hours=1), created_at=None, updated_at=datetime(2029, 12, 1),
+                           current_version=2, is_recurring=True, recurrence_pattern=recurrence)
+
+
+def starts(series, number=40):
+    return [occurrence.start for _, occurrence in zip(range(number), series.occurrences())]
+
+
+@pytest.mark.parametrize('recurrence, start, expected', [
+    (pattern(RecurrenceType.YEARLY, day_of_month=15), START, 'FREQ=YEARLY;BYMONTH=1;BYMONTHDAY=15'),
+    (pattern(RecurrenceType.MONTHLY, count=5), datetime(2030, 1, 31, 9),
+     'FREQ=MONTHLY;BYMONTHDAY=28,29,30,31;BYSETPOS=-1;COUNT=5'),
+    (pattern(RecurrenceType.YEARLY, month_of_year=2, day_of_month=29), START,
+     'FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=28,29;BYSETPOS=-1'),
+    (pattern(RecurrenceType.WEEKLY, interval=2), START, 'FREQ=WEEKLY;INTERVAL=2;BYDAY=WE'),
+])
+def test_pattern_to_rrule_spells_out_what_the_server_expands(recurrence, start, expected):
+    assert pattern_to_rrule(recurrence, start) == expected
+
+
+def test_custom_patterns_have_no_rrule():
+    assert pattern_to_rrule(pattern(RecurrenceType.CUSTOM), START) is None
+
+
+def test_feed_starts_at_the_first_occurrence():
+    vevent = event_to_vevent(event(pattern(RecurrenceType.WEEKLY, days_of_week='MO,FR')))
+    assert 'DTSTART:20300104T090000Z\r\n' in vevent
+    assert 'DTEND:20300104T100000Z\r\n' in vevent
+    assert 'RRULE:FREQ=WEEKLY;BYDAY=MO,FR\r\n' in vevent
+
+
+@pytest.mark.parametrize('recurrence, start', [
+    (pattern(RecurrenceType.DAILY, interval=3, count=20), START),
+    (pattern(RecurrenceType.WEEKLY, interval=2, days_of_week='MO,WE,FR', end_date=datetime(2031, 1, 1)), START),
+    (pattern(RecurrenceType.WEEKLY, days_of_week='TU'), START),
+    (pattern(RecurrenceType.MONTHLY, interval=2, day_of_month=31), START),
+    (pattern(RecurrenceType.MONTHLY, day_of_month=1, count=12), START),
+    (pattern(RecurrenceType.MONTHLY), datetime(2030, 1, 30, 9)),
+    (pattern(RecurrenceType.YEARLY, month_of_year=2, day_of_month=29), START),
+    (pattern(RecurrenceType.YEARLY, day_of_month=15), START),
+])
+def test_export_and_import_round_trip(recurrence, start):
+    original = event(recurrence, start)
+    [(_, imported)] = list(parse_ics(['BEGIN:VCALENDAR', *event_to_vevent(original).split('\r\n'), 'END:VCALENDAR']))
+    assert not isinstance(imported, Exception), imported
+
+    data = imported['recurrence_pattern']
+    round_tripped = pattern(
+        RecurrenceType(data['type']), data['interval'], data.get('days_of_week'), data.get('day_of_month'),
+        data.get('month_of_year'), datetime.fromisoformat(data['end_date']) if 'end_date' in data else None,
+        data.get('count')
+    )
+    imported_start = datetime.fromisoformat(imported['start_time'])
+    assert starts(Series(1, imported_start, imported_start + timedelta(hours=1), round_tripped)) == starts(
+        Series.from_event(original)
+    )
+
+
+@pytest.mark.parametrize('rule, start', [
+    ('FREQ=MONTHLY;BYDAY=2TU', datetime(2030, 1, 8, 9)),
+    ('FREQ=YEARLY;BYMONTHDAY=15', datetime(2030, 1, 15, 9)),
+    ('FREQ=MONTHLY;BYMONTHDAY=31', datetime(2030, 1, 31, 9)),
+    ('FREQ=MONTHLY', datetime(2030, 1, 31, 9)),
+    ('FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29', datetime(2032, 2, 29, 9)),
+    ('FREQ=WEEKLY;BYDAY=MO,FR', START),
+    ('FREQ=MONTHLY;BYMONTHDAY=20', START),
+    ('FREQ=WEEKLY;INTERVAL=2;WKST=SU;BYDAY=WE', START),
+    ('FREQ=DAILY;BYHOUR=9,17', START),
+    ('FREQ=HOURLY', START),
+])
+def test_rules_the_server_would_expand_differently_are_rejected(rule, start):
+    with pytest.raises(ValueError):
+        rrule_to_pattern(rule, start)
+
+
+def test_rejected_rules_are_reported_per_event():
+    lines = ['BEGIN:VCALENDAR', 'BEGIN:VEVENT', 'DTSTART:20300108T090000Z', 'DTEND:20300108T100000Z',
+             'SUMMARY:Second Tuesday', 'RRULE:FREQ=MONTHLY;BYDAY=2TU', 'END:VEVENT', 'END:VCALENDAR']
+    [(line_number, error)] = list(parse_ics(lines))
+    assert line_number == 2
+    assert isinstance(error, ValueError)
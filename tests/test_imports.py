@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+import io
+import json
+
+import pytest
+
+from app import db
+from app.models.event import Event
+from app.models.import_job import ImportJob, ImportStatus
+from app.services import imports
+from app.services.imports import _read_json, resume_import_jobs, run_import_job
+
+ROWS = [
+    {'title': f'Row {number} [a, b] {{"c": 1}}', 'start_time': '2030-01-07T09:00:00',
+     'end_time': '2030-01-07T10:00:00', 'count': 10 ** (number % 12), 'nested': {'list': [1.5, -2, None, True]}}
+    for number in range(50)
+]
+
+
+@pytest.mark.parametrize('document', [ROWS, {'name': 'cal', 'meta': {'events': []}, 'events': ROWS}, [], {}])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_read_json_streams_elements(monkeypatch, document, indent):
+    monkeypatch.setattr(imports, 'JSON_READ_SIZE', 7)
+    text = json.dumps(document, indent=indent)
+    expected = document if isinstance(document, list) else document.get('events', [])
+    assert list(_read_json(io.StringIO(text))) == expected
+
+
+@pytest.mark.parametrize('text', ['[{"title": 1}', '[1 2]', '{"events": [1,]}', '"events"', ''])
+def test_read_json_rejects_malformed_documents(monkeypatch, text):
+    monkeypatch.setattr(imports, 'JSON_READ_SIZE', 3)
+    with pytest.raises(ValueError):
+        list(_read_json(io.StringIO(text)))
+
+
+@pytest.fixture
+def import_file(app, tmp_path, register):
+    _, user_id = register('alice')
+
+    def import_file(rows, status, processed_rows=0, heartbeat_at=None):
+        path = tmp_path / f'{status.value}.ndjson'
+        path.write_text(''.join(json.dumps(row) + '\n' for row in rows))
+        job = ImportJob(user_id=user_id, filename=path.name, format='ndjson', path=str(path))
+        job.status = status
+        job.processed_rows = processed_rows
+        job.created_events = processed_rows
+        job.heartbeat_at = heartbeat_at
+        db.session.add(job)
+        db.session.commit()
+        return job.id
+    return import_file
+
+
+def test_stale_running_job_resumes_after_its_last_chunk(app, import_file):
+    stale = datetime.utcnow() - imports.HEARTBEAT_TIMEOUT - timedelta(seconds=1)
+    job_id = import_file(ROWS[:5], ImportStatus.RUNNING, processed_rows=2, heartbeat_at=stale)
+
+    run_import_job(app, job_id)
+
+    job = db.session.get(ImportJob, job_id)
+    assert (job.status, job.processed_rows, job.created_events) == (ImportStatus.COMPLETED, 5, 5)
+    assert [title for title, in db.session.query(Event.title).order_by(Event.id)] == [
+        row['title'] for row in ROWS[2:5]
+    ]
+
+
+def test_running_job_with_a_live_heartbeat_is_left_alone(app, import_file, monkeypatch):
+    retries = []
+
+    class Timer:
+        def __init__(self, delay, function):
+            retries.append(delay)
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(imports.threading, 'Timer', Timer)
+    job_id = import_file(ROWS[:5], ImportStatus.RUNNING, processed_rows=2, heartbeat_at=datetime.utcnow())
+
+    run_import_job(app, job_id)
+
+    # Checked again once the heartbeat could have gone stale.
+    assert len(retries) == 1 and 0 < retries[0] <= imports.HEARTBEAT_TIMEOUT.total_seconds() + 1
+    db.session.expire_all()
+    job = db.session.get(ImportJob, job_id)
+    assert (job.status, job.processed_rows) == (ImportStatus.RUNNING, 2)
+    assert Event.query.count() == 0
+
+
+def test_resume_queues_pending_and_stale_jobs(app, import_file, monkeypatch):
+    stale = datetime.utcnow() - imports.HEARTBEAT_TIMEOUT - timedelta(seconds=1)
+    pending = import_file(ROWS[:1], ImportStatus.PENDING)
+    crashed = import_file(ROWS[:1], ImportStatus.RUNNING, heartbeat_at=stale)
+    import_file(ROWS[:1], ImportStatus.RUNNING, heartbeat_at=datetime.utcnow())
+    import_file(ROWS[:1], ImportStatus.COMPLETED)
+
+    submitted = []
+    monkeypatch.setattr(imports, '_get_executor', lambda app: type('Executor', (), {
+        'submit': staticmethod(lambda function, app, job_id: submitted.append(job_id))
+    }))
+    assert resume_import_jobs(app) == [pending, crashed]
+    assert submitted == [pending, crashed]
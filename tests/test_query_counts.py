@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Pin the number of queries of the list endpoints so N+1 regressions fail loudly."""
+import pytest
+
+from app.services.changelog_outbox import process_outbox
+
+EVENTS = 30
+EDITS = 15
+COLLABORATORS = 10
+
+
+@pytest.fixture
+def calendar(client, register):
+    """An owner with many events, one of them edited often and shared with several users and a group."""
+    headers, _ = register('owner')
+    response = client.post('/api/events/batch', headers=headers, json={'events': [{
+        'title': f'Event {number}',
+        'start_time': f'2030-01-{number % 28 + 1:02d}T09:00:00',
+        'end_time': f'2030-01-{number % 28 + 1:02d}T10:00:00'
+    } for number in range(EVENTS)]})
+    assert response.status_code == 201, response.json
+    event = response.json['events'][0]
+
+    for number in range(EDITS):
+        response = client.put(f'/api/events/{event["id"]}', headers=headers, json={
+            'title': f'Edit {number}', 'description': f'Revision {number}',
+            'start_time': event['start_time'], 'end_time': event['end_time']
+        })
+        assert response.status_code == 200, response.json
+    while process_outbox(100) is not None:
+        pass
+
+    collaborators = [register(f'user{number}')[1] for number in range(COLLABORATORS)]
+    group = client.post('/api/groups', headers=headers, json={'name': 'Team'}).json['group']
+    response = client.post(f'/api/events/{event["id"]}/share', headers=headers, json={
+        'users': [{'user_id': user_id, 'role': 'viewer'} for user_id in collaborators],
+        'groups': [{'group_id': group['id'], 'role': 'editor'}]
+    })
+    assert response.status_code in (200, 201), response.json
+    return headers, event['id']
+
+
+@pytest.mark.parametrize('url, limit', [
+    ('/api/events?per_page=100', 3),
+    ('/api/events/{id}/history?per_page=100', 5),
+    ('/api/events/{id}/history?per_page=100&fields=summary', 3),
+    ('/api/events/{id}/changelog?per_page=100', 4),
+    ('/api/events/{id}/permissions', 6),
+])
+def test_list_endpoints_make_a_fixed_number_of_queries(client, calendar, assert_max_queries, url, limit):
+    headers, event_id = calendar
+    url = url.format(id=event_id)
+    client.get(url, headers=headers)
+
+    with assert_max_queries(limit):
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.json
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.event import RecurrenceType
+from app.services.recurrence import Series, expand_events, parse_days_of_week
+
+
+def pattern(type, interval=1, days_of_week=None, day_of_month=None, month_of_year=None, end_date=None, count=None):
+    return SimpleNamespace(type=type, interval=interval, days_of_week=days_of_week, day_of_month=day_of_month,
+                           month_of_year=month_of_year, end_date=end_date, count=count)
+
+
+def starts(series, window_start=None, window_end=None):
+    return [(occurrence.index, occurrence.start) for occurrence in series.occurrences(window_start, window_end)]
+
+
+START = datetime(2030, 1, 2, 9, 0)  # a Wednesday
+END = START + timedelta(hours=1)
+
+SERIES = [
+    pattern(RecurrenceType.DAILY, interval=3, count=200),
+    pattern(RecurrenceType.WEEKLY, interval=2, days_of_week='MO,WE,FR', count=200),
+    pattern(RecurrenceType.WEEKLY, days_of_week='0', end_date=datetime(2031, 6, 1)),
+    pattern(RecurrenceType.MONTHLY, interval=2, day_of_month=31, count=60),
+    pattern(RecurrenceType.MONTHLY, day_of_month=1, end_date=datetime(2034, 1, 1)),
+    pattern(RecurrenceType.YEARLY, month_of_year=2, day_of_month=29, count=20),
+]
+
+
+def test_weekly_interval_starts_in_the_first_partial_week():
+    series = Series(1, START, END, pattern(RecurrenceType.WEEKLY, interval=2, days_of_week='MO,WE,FR'))
+    assert starts(series, window_end=datetime(2030, 1, 31)) == [
+        (0, datetime(2030, 1, 2, 9)), (1, datetime(2030, 1, 4, 9)),
+        (2, datetime(2030, 1, 14, 9)), (3, datetime(2030, 1, 16, 9)), (4, datetime(2030, 1, 18, 9)),
+        (5, datetime(2030, 1, 28, 9)), (6, datetime(2030, 1, 30, 9)),
+    ]
+
+
+def test_monthly_clamps_to_the_last_day_of_short_months():
+    series = Series(1, datetime(2030, 1, 31, 9), datetime(2030, 1, 31, 10), pattern(RecurrenceType.MONTHLY, count=4))
+    assert [start for _, start in starts(series)] == [
+        datetime(2030, 1, 31, 9), datetime(2030, 2, 28, 9), datetime(2030, 3, 31, 9), datetime(2030, 4, 30, 9)
+    ]
+
+
+def test_monthly_day_before_the_start_day_begins_next_month():
+    series = Series(1, START, END, pattern(RecurrenceType.MONTHLY, day_of_month=1, count=2))
+    assert [start for _, start in starts(series)] == [datetime(2030, 2, 1, 9), datetime(2030, 3, 1, 9)]
+
+
+def test_count_and_until_end_the_series():
+    counted = Series(1, START, END, pattern(RecurrenceType.DAILY, count=3))
+    assert len(starts(counted)) == 3
+
+    until = Series(1, START, END, pattern(RecurrenceType.DAILY, end_date=datetime(2030, 1, 5, 9)))
+    assert [start for _, start in starts(until)][-1] == datetime(2030, 1, 5, 9)
+
+
+@pytest.mark.parametrize('recurrence', SERIES, ids=lambda recurrence: recurrence.type.value)
+@pytest.mark.parametrize('window_start, window_end', [
+    (datetime(2030, 1, 1), datetime(2030, 2, 1)),
+    (datetime(2030, 6, 15, 9, 30), datetime(2030, 9, 1)),
+    (datetime(2031, 3, 2), datetime(2031, 3, 3)),
+    (datetime(2033, 12, 1), datetime(2036, 1, 1)),
+])
+def test_skipping_to_a_window_matches_full_expansion(recurrence, window_start, window_end):
+    series = Series(1, START, END, recurrence)
+    expected = [(index, start) for index, start in starts(series)
+                if start <= window_end and start + series.duration >= window_start]
+    assert starts(series, window_start, window_end) == expected
+
+
+def test_expand_events_merges_series_in_start_order():
+    daily = SimpleNamespace(id=1, start_time=START, end_time=END, is_recurring=True,
+                            recurrence_pattern=pattern(RecurrenceType.DAILY))
+    single = SimpleNamespace(id=2, start_time=START + timedelta(days=1, hours=-1), end_time=START + timedelta(days=1),
+                             is_recurring=False, recurrence_pattern=None)
+    occurrences = list(expand_events([daily, single], datetime(2030, 1, 1), datetime(2030, 1, 4)))
+    assert [(occurrence.event_id, occurrence.start) for occurrence in occurrences] == [
+        (1, datetime(2030, 1, 2, 9)), (2, datetime(2030, 1, 3, 8)),
+        (1, datetime(2030, 1, 3, 9)),
+    ]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('0,2,4', [0, 2, 4]),
+    ('MO;we, Fri', [0, 2, 4]),
+    ('sunday,Sa', [5, 6]),
+    ('', []),
+])
+def test_parse_days_of_week(value, expected):
+    assert parse_days_of_week(value) == expected
+
+
+@pytest.mark.parametrize('value', ['Monday and Friday', 'm', '7', 'mox', 'weekdays'])
+def test_parse_days_of_week_rejects_unknown_days(value):
+    with pytest.raises(ValueError):
+        parse_days_of_week(value)
+
+
+def test_invalid_days_of_week_is_a_validation_error(client, register):
+    headers, _ = register('alice')
+    response = client.post('/api/events', headers=headers, json={
+        'title': 'Gym', 'start_time': '2030-01-07T07:00:00', 'end_time': '2030-01-07T08:00:00',
+        'is_recurring': True, 'recurrence_pattern': {'type': 'weekly', 'days_of_week': 'Monday and Friday'}
+    })
+    assert response.status_code == 400
+    assert 'days_of_week' in response.json['error']
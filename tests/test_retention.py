@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app import db
+from app.models.version import ChangeLog, EventVersion
+from app.services.changelog_outbox import process_outbox
+from app.services.retention import RetentionPolicy, compact_versions
+from app.services.version_store import decode_chain
+
+NOW = datetime(2030, 6, 14, 12, 0)  # a Friday
+
+
+def versions(ages, keyframes=None):
+    """(version_number, created_at, is_keyframe) tuples, oldest first; the newest is the only keyframe by default."""
+    numbers = range(1, len(ages) + 1)
+    keyframes = keyframes if keyframes is not None else {len(ages)}
+    return [(number, NOW - age, number in keyframes) for number, age in zip(numbers, ages)]
+
+
+def test_keeps_the_newest_versions():
+    history = versions([timedelta(minutes=10 - number) for number in range(10)])
+    assert RetentionPolicy(keep_last=3).dropped(history, NOW) == set(range(1, 8))
+
+
+def test_keeps_the_last_version_of_each_day():
+    ages = [timedelta(days=day, hours=hour) for day in range(4, -1, -1) for hour in (6, 4, 2)]
+    history = versions(ages)
+    dropped = RetentionPolicy(keep_last=0).dropped(history, NOW)
+    kept = sorted(set(range(1, len(ages) + 1)) - dropped)
+    assert [NOW - ages[number - 1] for number in kept] == [
+        NOW - timedelta(days=day, hours=2) for day in range(4, -1, -1)
+    ]
+
+
+def test_keeps_the_last_version_of_each_week_after_the_daily_window():
+    ages = [timedelta(days=day, hours=1) for day in range(70, 29, -1)]
+    history = versions(ages + [timedelta(hours=1)])
+    dropped = RetentionPolicy(keep_last=0, daily_days=30, weekly_weeks=52).dropped(history, NOW)
+
+    kept = [created_at for number, created_at, _ in history[:-1] if number not in dropped]
+    weeks = [created_at.isocalendar()[:2] for created_at in kept]
+    assert len(weeks) == len(set(weeks))
+    assert weeks == sorted({(NOW - age).isocalendar()[:2] for age in ages})
+    for created_at in kept:
+        same_week = [other for _, other, _ in history[:-1] if other.isocalendar()[:2] == created_at.isocalendar()[:2]]
+        assert created_at == max(same_week)
+
+
+def test_drops_everything_past_the_weekly_window():
+    history = versions([timedelta(weeks=60), timedelta(weeks=55), timedelta(days=1)])
+    assert RetentionPolicy(keep_last=0, weekly_weeks=52).dropped(history, NOW) == {1, 2}
+
+
+def test_max_age_overrides_keep_last_but_not_the_latest_chain():
+    ages = [timedelta(days=200 - number) for number in range(6)]
+    history = versions(ages, keyframes={1, 4})
+    policy = RetentionPolicy(keep_last=100, max_age_days=90)
+    assert policy.dropped(history, NOW) == {1, 2, 3}
+
+
+def test_never_drops_the_latest_keyframe_chain():
+    history = versions([timedelta(weeks=100 - number) for number in range(5)], keyframes={2})
+    assert RetentionPolicy(keep_last=0, weekly_weeks=1).dropped(history, NOW) == {1}
+
+
+def test_compaction_squashes_changelog_and_keeps_states(app, client, register, create_event):
+    headers, _ = register('alice')
+    event = create_event(headers)
+    for number in range(12):
+        response = client.put(f'/api/events/{event["id"]}', headers=headers, json={
+            'title': f'Edit {number}', 'start_time': event['start_time'], 'end_time': event['end_time']
+        })
+        assert response.status_code == 200, response.json
+    while process_outbox(100) is not None:
+        pass
+
+    # Two versions a day over the last week, so the daily checkpoints drop one of each pair.
+    rows = EventVersion.query.filter_by(event_id=event['id']).order_by(EventVersion.version_number).all()
+    now = datetime.utcnow()
+    for age, row in enumerate(reversed(rows)):
+        db.session.execute(update(EventVersion).where(EventVersion.id == row.id).values(
+            created_at=now - timedelta(days=age // 2, hours=age % 2 + 1)
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+    rows = EventVersion.query.filter_by(event_id=event['id']).order_by(EventVersion.version_number).all()
+    decode_chain(rows)
+    before = {row.version_number: row.get_data_dict() for row in rows}
+    expected = RetentionPolicy(keep_last=3).dropped(
+        [(row.version_number, row.created_at, row.keyframe_version is None) for row in rows], now
+    )
+    assert expected
+
+    removed, squashed = compact_versions(RetentionPolicy(keep_last=3), now=now, pause=0)
+    assert removed == len(expected)
+    assert squashed > 0
+    db.session.expunge_all()
+
+    rows = EventVersion.query.filter_by(event_id=event['id']).order_by(EventVersion.version_number).all()
+    decode_chain(rows)
+    assert {row.version_number: row.get_data_dict() for row in rows} == {
+        number: state for number, state in before.items() if number not in expected
+    }
+
+    # The changelog still links every retained version to the next one, and the last to the live event.
+    remaining = [row.version_number for row in rows]
+    entries = ChangeLog.query.filter_by(event_id=event['id']).order_by(ChangeLog.from_version).all()
+    links = [(entry.from_version, entry.to_version) for entry in entries]
+    assert links == list(zip(remaining, remaining[1:] + [remaining[-1] + 1]))[-len(links):]
+    assert len(links) >= len(remaining) - 1
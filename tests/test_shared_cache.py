@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from app.services import shared_cache
+from app.services.shared_cache import LocalStore, SharedCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_local_store_evicts_the_least_recently_used_value(clock):
+    store = LocalStore(maxsize=3)
+    for key in 'abc':
+        store.set(key, key.encode())
+    store.get_many(['a'])
+    store.set('d', b'd')
+    assert store.get_many(['a', 'b', 'c', 'd']) == [b'a', None, b'c', b'd']
+    assert len(store) == 3
+
+
+def test_local_store_sweeps_expired_keys_nobody_reads(clock):
+    store = LocalStore(sweep_interval=60)
+    cache = SharedCache(store, ttl=30)
+    for scope in range(100):
+        cache.set('acl', scope, 'user', 0, True)
+    cache.invalidate('acl', range(100))
+    assert len(store) == 200
+
+    clock[0] += 61
+    store.get_many(['unrelated'])
+    assert len(store) == 0
+
+
+def test_generation_keys_are_not_evicted_by_values(clock):
+    cache = SharedCache(LocalStore(maxsize=2), ttl=30)
+    cache.set('acl', 1, 'user', 0, 'editor')
+    cache.invalidate('acl', [1])
+    for key in range(10):
+        cache.set('acl', 2, key, 0, key)
+    assert cache.get('acl', 1, 'user') == (False, 1)
+
+
+def test_expired_generations_never_revive_orphaned_values(clock):
+    cache = SharedCache(LocalStore(), ttl=30)
+    cache.invalidate('acl', [1])
+    hit, generation = cache.get('acl', 1, 'user')
+    assert not hit
+
+    clock[0] += 20
+    cache.set('acl', 1, 'user', generation, 'editor')
+    clock[0] += 15  # the generation key expires, the value written under it does not
+
+    assert cache.get('acl', 1, 'user') == (False, 0)
+    cache.invalidate('acl', [1])
+    assert cache.get('acl', 1, 'user')[0] is False
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models.version import EventVersion
+from app.services import version_store
+from app.services.version_store import (
+    apply_delta, compute_delta, decode_chain, drop_versions, fill_version_times, load_version_data
+)
+
+EDITS = 25
+
+
+def history(event_id):
+    db.session.expunge_all()
+    return EventVersion.query.filter_by(event_id=event_id).order_by(EventVersion.version_number).all()
+
+
+def states(rows):
+    decode_chain(rows)
+    return {row.version_number: row.get_data_dict() for row in rows}
+
+
+def assert_valid_chains(rows, interval):
+    """Every delta points at the keyframe its chain starts from, and no chain is longer than ``interval``."""
+    keyframe = None
+    length = 0
+    for row in rows:
+        if row.keyframe_version is None:
+            keyframe, length = row.version_number, 1
+        else:
+            assert row.keyframe_version == keyframe
+            length += 1
+        assert length <= interval
+
+
+@pytest.fixture
+def edited_event(app, client, register, create_event):
+    headers, _ = register('alice')
+    event = create_event(headers, description='v0', location='Room 1')
+    for number in range(1, EDITS + 1):
+        body = {'title': f'Standup {number}', 'start_time': event['start_time'], 'end_time': event['end_time'],
+                'description': f'v{number}'}
+        if number % 4:
+            body['location'] = f'Room {number}'
+        response = client.put(f'/api/events/{event["id"]}', headers=headers, json=body)
+        assert response.status_code == 200, response.json
+    return event['id']
+
+
+def test_compute_delta_round_trips():
+    old = {'title': 'a', 'location': 'x', 'description': None}
+    new = {'title': 'b', 'description': None, 'is_recurring': True}
+    delta = compute_delta(old, new)
+    assert delta == {'set': {'title': 'b', 'is_recurring': True}, 'unset': ['location']}
+    assert apply_delta(old, delta) == new
+
+
+def test_edits_are_stored_as_keyframes_and_deltas(app, edited_event):
+    interval = app.config['VERSION_KEYFRAME_INTERVAL']
+    rows = history(edited_event)
+    assert len(rows) == EDITS + 1
+    assert [row.version_number for row in rows if row.keyframe_version is None] == [
+        row.version_number for position, row in enumerate(rows) if position % interval == 0
+    ]
+    assert_valid_chains(rows, interval)
+
+    # Creation stores the first version, then every edit stores the event as it was before it.
+    decoded = states(rows)
+    assert [decoded[row.version_number]['description'] for row in rows] == ['v0'] + [
+        f'v{number}' for number in range(EDITS)
+    ]
+
+
+def test_load_version_data_batches_chains(app, client, register, create_event, monkeypatch):
+    monkeypatch.setattr(version_store, 'LOAD_BATCH_SIZE', 2)
+    headers, _ = register('alice')
+    event_ids = []
+    for number in range(5):
+        event = create_event(headers, title=f'Event {number}')
+        for edit in range(3):
+            client.put(f'/api/events/{event["id"]}', headers=headers, json={
+                'title': f'Event {number}.{edit}', 'start_time': event['start_time'], 'end_time': event['end_time']
+            })
+        event_ids.append(event['id'])
+
+    db.session.expunge_all()
+    latest = EventVersion.query.filter(EventVersion.event_id.in_(event_ids)).order_by(
+        EventVersion.event_id, EventVersion.version_number.desc()
+    ).all()
+    latest = [version for version in latest if version.keyframe_version is not None]
+    load_version_data(latest)
+    titles = {(version.event_id, version.get_data_dict()['title']) for version in latest}
+    assert titles == {(event_id, title) for number, event_id in enumerate(event_ids)
+                      for title in (f'Event {number}', f'Event {number}.0', f'Event {number}.1')}
+
+
+@pytest.mark.parametrize('dropped', [
+    lambda numbers: {numbers[5]},                      # a delta inside a chain
+    lambda numbers: {numbers[10]},                     # a keyframe
+    lambda numbers: set(numbers[3:14]),                # a run across a keyframe boundary
+    lambda numbers: set(numbers[:-1:2]),               # every other version
+    lambda numbers: set(numbers[1:-1]),                # everything but the first and last
+])
+def test_drop_versions_keeps_remaining_states(app, edited_event, dropped):
+    interval = app.config['VERSION_KEYFRAME_INTERVAL']
+    rows = history(edited_event)
+    before = states(rows)
+    dropped = dropped([row.version_number for row in rows])
+
+    drop_versions(rows, dropped, interval)
+    db.session.commit()
+
+    rows = history(edited_event)
+    assert [row.version_number for row in rows] == sorted(set(before) - dropped)
+    assert_valid_chains(rows, interval)
+    assert states(rows) == {number: state for number, state in before.items() if number not in dropped}
+
+
+def test_fill_version_times_restores_snapshot_columns(app, edited_event):
+    rows = history(edited_event)
+    expected = [(row.start_time, row.end_time, row.is_recurring) for row in rows]
+    assert all(start is not None for start, _, _ in expected)
+
+    db.session.execute(update(EventVersion).values(start_time=None, end_time=None, is_recurring=None))
+    db.session.commit()
+
+    assert fill_version_times(batch_size=1) == len(rows)
+    assert [(row.start_time, row.end_time, row.is_recurring) for row in history(edited_event)] == expected